@@ -1,18 +1,35 @@
 import os
 import logging
+import threading
+import time
+from contextlib import asynccontextmanager
+from functools import partial
 from fastapi import FastAPI, HTTPException, Depends, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from pydantic import BaseModel
 from typing import List, Any, Optional
 from dotenv import load_dotenv
-import mlflow
 import joblib
 import numpy as np
-import shap
 import jwt
 from datetime import datetime, timedelta
 from api.routes import symptoms
 from api.routes import auth
+from app.core.budgeted_shap import EXPLAIN_BUDGET_MS
+from app.core.explainer_cache import explainer_cache
+from app.core.parallel_shap import as_float32, shap_pool, to_json_values
+from app.core.plot_renderer import plot_renderer, select_class
+from app.core.shap_store import SHAP_STORE_ARTIFACT, FastExplainer, ShapStoreCache
+from app.core.prediction_cache import prediction_cache
+from app.core.predict_batching import PREDICT_BATCHING, PredictBatcher, predict_with_confidences
+from app.services.explain_jobs import explain_jobs, JobQueueFullError
+from app.services.lifecycle import components, ComponentUnavailableError
+from app.services.model_cache import model_cache
+from app.services.model_registry import model_registry
+from app.services.shadow import shadow_scorer
+from app.utils.metrics import metrics_registry
 
 # --- Load environment variables ---
 load_dotenv()
@@ -66,36 +83,114 @@ class PredictResponse(BaseModel):
 
 class ExplainRequest(BaseModel):
     data: List[List[Any]]
+    # Time budget for sampling-based (Kernel) explanations; defaults to EXPLAIN_BUDGET_MS
+    # (per chunk of EXPLAIN_JOB_CHUNK_ROWS rows for async jobs)
+    budget_ms: Optional[float] = None
+    # Queue the explanation and return a job id (poll GET /explain/jobs/{job_id})
+    async_job: bool = False
+    # "waterfall" (first row) or "summary" (whole batch), returned as plot_base64 (async jobs: once done)
+    plot: Optional[str] = None
+    # Return SHAP values as float32 (about half the payload)
+    float32: bool = False
+    # "exact", or "fast": interpolate precomputed SHAP values of the nearest training rows
+    # (exact SHAP for rows too far from any of them, see app/core/shap_store.py)
+    mode: str = "exact"
 
 class ExplainResponse(BaseModel):
-    shap_values: List[List[float]]
+    shap_values: List[Any]
     base_values: List[float]
     feature_names: List[str]
+    quality: Optional[dict] = None
+    plot_base64: Optional[str] = None
+
+# --- Components (loaded lazily or at startup, see app/services/lifecycle.py) ---
+# "background": load in parallel after the server starts accepting probes,
+# "blocking": load before serving, "lazy": load on first use.
+STARTUP_LOAD_MODE = os.getenv("STARTUP_LOAD_MODE", "background")
+
+# --- Model: one shared, hot-swappable instance per worker (see app/services/model_registry.py) ---
+# /predict, /explain and /api/v1/symptoms all read the active version through the registry.
+model_registry.configure(name=MODEL_NAME, stage=MODEL_STAGE, tracking_uri=MLFLOW_TRACKING_URI)
+components.register("model", model_registry.load)
+# Optional candidate scored in the background on live traffic (SHADOW_MODEL_STAGE)
+if shadow_scorer is not None:
+    shadow_scorer.candidate.configure(name=MODEL_NAME, tracking_uri=MLFLOW_TRACKING_URI)
+
+# --- SHAP Explainers: one per model version, shared with /symptoms (see app/core/explainer_cache.py) ---
+components.register("explainer", lambda: explainer_cache, warmup=lambda cache: cache.get(model_registry.current()),
+                    required=False)
+model_registry.add_listener(explainer_cache.prebuild, before_swap=True)
+
+# --- Precomputed SHAP values logged by the training run, for /explain mode="fast" ---
+shap_stores = ShapStoreCache(
+    loader=lambda handle: model_registry.cache.fetch_artifact(handle.name, handle.version, SHAP_STORE_ARTIFACT)
+)
+fast_explainer = FastExplainer()
+model_registry.add_listener(shap_stores.prebuild, before_swap=True)
+
+# --- SHAP plots: rendered in a process pool, cached per model version and input (see app/core/plot_renderer.py) ---
+if plot_renderer is not None:
+    components.register("plot_renderer", lambda: plot_renderer, warmup=lambda renderer: renderer.warmup(),
+                        required=False)
+
+# --- Prediction cache: predict_proba rows memoized per model version, shared with /symptoms ---
+if prediction_cache is not None:
+    model_registry.add_listener(lambda handle: prediction_cache.invalidate(handle.version))
+
+def get_scorer():
+    handle = components.get("model").current()
+    if prediction_cache is not None and hasattr(handle.scorer, "predict_proba"):
+        return prediction_cache.wrap(handle.scorer, handle.version)
+    return handle.scorer
+
+# Concurrent /predict requests share one predict_proba pass (see app/core/predict_batching.py)
+predict_batcher = PredictBatcher(get_scorer) if PREDICT_BATCHING else None
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if STARTUP_LOAD_MODE == "blocking":
+        await run_in_threadpool(components.load_all)
+    elif STARTUP_LOAD_MODE == "background":
+        threading.Thread(target=components.load_all, name="component-startup", daemon=True).start()
+    yield
+    model_registry.stop()
+    if shadow_scorer is not None:
+        shadow_scorer.stop()
+        shadow_scorer.candidate.stop()
+    if predict_batcher is not None:
+        predict_batcher.stop()
+    explain_jobs.stop()
+    data_monitor = components.peek("data_monitor")
+    if data_monitor is not None:
+        data_monitor.stop()
+    shap_pool.stop()
+    if plot_renderer is not None:
+        plot_renderer.stop()
 
 # --- FastAPI App ---
-app = FastAPI(title="Early Disease Detection API", version="1.0.0")
+app = FastAPI(title="Early Disease Detection API", version="1.0.0", lifespan=lifespan)
 
 # Register API routes
 app.include_router(symptoms.router, prefix="/api/v1")
 app.include_router(auth.router, prefix="/api/v1")
 
-# --- Model Loading ---
-mlflow.set_tracking_uri(MLFLOW_TRACKING_URI)
-model_uri = f"models:/{MODEL_NAME}/{MODEL_STAGE}"
-logging.info(f"Loading model from MLflow Registry: {model_uri}")
-model = mlflow.sklearn.load_model(model_uri)
-logging.info("Model loaded from MLflow.")
-
-# Store model in app state for use in routes
-app.state.model = model
-
-# --- SHAP Explainer (TreeExplainer for RF/XGBoost) ---
-explainer = None
-try:
-    explainer = shap.TreeExplainer(model)
-    logging.info("SHAP explainer initialized.")
-except Exception as e:
-    logging.warning(f"SHAP explainer could not be initialized: {e}")
+# Store components in app state for use in routes
+app.state.components = components
+metrics_registry.register("components", components.status)
+metrics_registry.register("model_cache", model_cache.stats)
+metrics_registry.register("model_registry", model_registry.stats)
+metrics_registry.register("explainer_cache", explainer_cache.stats)
+metrics_registry.register("explain_jobs", explain_jobs.stats)
+metrics_registry.register("shap_pool", shap_pool.stats)
+metrics_registry.register("shap_store", lambda: {"stores": shap_stores.stats(), **fast_explainer.stats()})
+if plot_renderer is not None:
+    metrics_registry.register("plot_renderer", plot_renderer.stats)
+if predict_batcher is not None:
+    metrics_registry.register("predict_batcher", predict_batcher.stats)
+if prediction_cache is not None:
+    metrics_registry.register("prediction_cache", prediction_cache.stats)
+if shadow_scorer is not None:
+    metrics_registry.register("shadow", shadow_scorer.stats)
 
 # --- Auth Token Endpoint ---
 @app.post("/token")
@@ -106,48 +201,132 @@ def login(form_data: OAuth2PasswordRequestForm = Depends()):
     access_token = create_access_token(data={"sub": user["username"]})
     return {"access_token": access_token, "token_type": "bearer"}
 
-# --- Health Endpoint ---
+# --- Health Endpoints ---
+@app.get("/health/live")
+def liveness():
+    """
+    Liveness: the process is up and serving requests.
+    """
+    return {"status": "alive"}
+
+@app.get("/health/ready")
+def readiness():
+    """
+    Readiness: all required components are loaded and warmed up (cached state, no inference).
+    Failed components whose retry backoff has passed are reloaded in the background.
+    """
+    components.retry_failed()
+    status_report = components.status()
+    return JSONResponse(status_code=200 if status_report["ready"] else 503, content=status_report)
+
 @app.get("/health")
 def health():
-    try:
-        # Check model and DB status (DB check can be added here)
-        _ = model.predict(np.zeros((1, model.n_features_in_)))
-        return {"status": "ok", "model": "loaded"}
-    except Exception as e:
-        logging.error(f"Health check failed: {e}")
-        return {"status": "error", "detail": str(e)}
+    status_report = components.status()
+    model_state = status_report["components"]["model"]["state"]
+    if status_report["ready"]:
+        return {"status": "ok", "model": "loaded", "components": status_report["components"]}
+    return {"status": "error", "model": model_state, "components": status_report["components"]}
+
+# --- Metrics Endpoint ---
+@app.get("/metrics")
+def metrics():
+    """
+    Returns in-process serving metrics (batch sizes, queue depth, ...).
+    """
+    return metrics_registry.collect()
 
 # --- Predict Endpoint ---
 @app.post("/predict", response_model=PredictResponse)
 def predict(request: PredictRequest, user=Depends(get_current_user)):
     try:
         X = np.array(request.data)
-        preds = model.predict(X)
-        confidences = model.predict_proba(X)[:, 1].tolist() if hasattr(model, 'predict_proba') else None
+        if predict_batcher is not None:
+            preds, confidences = predict_batcher.predict(X)
+        else:
+            preds, confidences = predict_with_confidences(get_scorer(), X)
+        if shadow_scorer is not None:
+            handle = model_registry.peek()
+            shadow_scorer.submit(X, preds, confidences, handle.version if handle else None, source="predict")
         logging.info(f"Prediction made for user {user['username']}")
-        return PredictResponse(predictions=preds.tolist(), confidences=confidences)
+        return PredictResponse(predictions=preds, confidences=confidences)
+    except ComponentUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         logging.error(f"Prediction error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 # --- Explain Endpoint ---
+def render_plot(kind: Optional[str], version: str, explainer: Any, shap_values: Any, X: np.ndarray,
+                feature_names: List[str]) -> Optional[str]:
+    if kind is None or plot_renderer is None:
+        return None
+    values, base_value = select_class(shap_values, getattr(explainer, "expected_value", 0.0))
+    if kind == "waterfall":
+        return plot_renderer.waterfall(version, values[0], base_value, X[0], feature_names)
+    return plot_renderer.summary(version, values, X, feature_names)
+
 @app.post("/explain", response_model=ExplainResponse)
 def explain(request: ExplainRequest, user=Depends(require_role("doctor"))):
-    if explainer is None:
+    if request.plot not in (None, "waterfall", "summary"):
+        raise HTTPException(status_code=422, detail=f"Unknown plot kind: {request.plot}")
+    if request.mode not in ("exact", "fast"):
+        raise HTTPException(status_code=422, detail=f"Unknown explain mode: {request.mode}")
+    try:
+        handle = components.get("model").current()
+        explainer = components.get("explainer").get(handle)
+    except Exception as e:
+        logging.warning(f"SHAP explainer could not be initialized: {e}")
         raise HTTPException(status_code=503, detail="SHAP explainer not available")
+    if request.async_job:
+        try:
+            X = np.array(request.data)
+            feature_names = getattr(explainer, 'feature_names', None) or []
+            # Rendered once all rows are explained; returned as the job's plot_base64
+            render = (partial(render_plot, request.plot, handle.version, explainer, X=X, feature_names=feature_names)
+                      if request.plot is not None else None)
+            job = explain_jobs.submit(explainer, handle.version, X, request.budget_ms or EXPLAIN_BUDGET_MS,
+                                      owner=user["username"], float32=request.float32, render=render)
+        except JobQueueFullError as e:
+            raise HTTPException(status_code=503, detail=str(e))
+        logging.info(f"SHAP job {job['job_id']} ({job['rows']} rows) queued for user {user['username']}")
+        return JSONResponse(status_code=202, content={"job_id": job["job_id"], "status": job["status"],
+                                                      "status_url": f"/explain/jobs/{job['job_id']}"})
     try:
         X = np.array(request.data)
-        shap_values = explainer.shap_values(X)
-        base_values = explainer.expected_value.tolist() if hasattr(explainer, 'expected_value') else []
-        feature_names = getattr(explainer, 'feature_names', [])
+        budget_ms = request.budget_ms or EXPLAIN_BUDGET_MS
+        store = shap_stores.get(handle) if request.mode == "fast" else None
+        if store is not None:
+            started = time.perf_counter()
+            shap_values, approximation = fast_explainer.explain(
+                store, X, lambda rows: shap_pool.shap_values(explainer, handle.version, rows, budget_ms=budget_ms)[0])
+            quality = {"method": "shap_store", "elapsed_ms": (time.perf_counter() - started) * 1000.0,
+                       "budget_ms": budget_ms, "complete": approximation["approximated"] == 0, **approximation}
+        else:
+            # Large uploads are split across the SHAP process pool (see app/core/parallel_shap.py)
+            shap_values, quality = shap_pool.shap_values(explainer, handle.version, X, budget_ms=budget_ms)
+        base_values = np.atleast_1d(explainer.expected_value).tolist() if hasattr(explainer, 'expected_value') else []
+        feature_names = getattr(explainer, 'feature_names', None) or []
+        plot_base64 = render_plot(request.plot, handle.version, explainer, shap_values, X, feature_names)
         logging.info(f"SHAP explanation generated for user {user['username']}")
         return ExplainResponse(
-            shap_values=shap_values.tolist() if isinstance(shap_values, np.ndarray) else shap_values,
+            shap_values=to_json_values(as_float32(shap_values) if request.float32 else shap_values),
             base_values=base_values,
-            feature_names=feature_names
+            feature_names=feature_names,
+            quality=quality,
+            plot_base64=plot_base64
         )
     except Exception as e:
         logging.error(f"Explain error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/explain/jobs/{job_id}")
+def explain_job(job_id: str, include_results: bool = True, user=Depends(require_role("doctor"))):
+    """
+    Status, progress and the chunks explained so far of an async /explain job.
+    """
+    try:
+        return explain_jobs.get(job_id, owner=user["username"], include_results=include_results)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Explanation job not found or expired")
+
 # TODO: Add CORS, logging, and exception middleware if needed
@@ -0,0 +1,172 @@
+"""
+Pre-fork launcher: loads the heavy serving components once in a master process,
+then forks uvicorn workers that share the read-only model memory copy-on-write.
+
+Usage: python -m api.prefork [--workers 4] [--host 0.0.0.0] [--port 8000]
+"""
+import argparse
+import gc
+import logging
+import os
+import signal
+import socket
+import sys
+import time
+from typing import Dict, List
+
+import uvicorn
+
+from app.utils.memory import read_memory_kb
+
+PREFORK_WORKERS = int(os.getenv("PREFORK_WORKERS", "2"))
+# Seconds between per-worker PSS log lines in the master (0 disables)
+PREFORK_MEMORY_REPORT_SECONDS = float(os.getenv("PREFORK_MEMORY_REPORT_SECONDS", "60"))
+# Longest the master waits for a model refresh or mapping reload in progress before forking
+PREFORK_STOP_TIMEOUT_SECONDS = float(os.getenv("PREFORK_STOP_TIMEOUT_SECONDS", "30"))
+
+
+def fork_unsafe_components() -> List[str]:
+    """
+    Components that must be built inside each worker. ONNX Runtime creates its
+    thread pools when the session is created, and those threads do not survive
+    fork(), so the NLP engine is only preloaded for the torch backend.
+    """
+    from app.core.nlp import NLP_BACKEND
+    return [] if NLP_BACKEND == "torch" else ["nlp"]
+
+
+def share_torch_weights(nlp):
+    """
+    Moves torch weights into shared memory, so they stay shared even when a
+    worker touches the tensor objects (copy-on-write only protects untouched pages).
+    Warm-up is deferred to the workers, so torch's intra-op thread pool is never
+    started in the master.
+    """
+    if nlp is None or getattr(nlp, "backend", None) != "torch":
+        return
+    nlp.model.share_memory()
+    logging.info("Moved NLP model weights to shared memory.")
+
+
+def preload():
+    """
+    Imports the app and builds every fork-safe component (without warm-up) in the master.
+    """
+    from api.fastapi_app import app
+    from app.services.lifecycle import components
+    from app.services.model_registry import model_registry
+
+    started = time.perf_counter()
+    components.load_all(warmup=False, exclude=fork_unsafe_components())
+    share_torch_weights(components.peek("nlp"))
+    # Background threads do not survive fork(); workers restart their own. Both
+    # are joined so the fork never happens in the middle of a model swap or mapping reload
+    model_registry.stop(timeout=PREFORK_STOP_TIMEOUT_SECONDS)
+    mapping = components.peek("mapping")
+    if mapping is not None:
+        mapping.stop_watcher(timeout=PREFORK_STOP_TIMEOUT_SECONDS)
+    # Move everything allocated so far out of the GC's generations, so collections
+    # in the workers do not write to (and un-share) the preloaded objects' pages
+    gc.collect()
+    gc.freeze()
+    logging.info(f"Preloaded components in {time.perf_counter() - started:.2f}s; "
+                 f"master memory {read_memory_kb()}")
+    return app
+
+
+def restart_background_threads():
+    from app.services.lifecycle import components
+    from app.services.model_registry import model_registry
+
+    if model_registry.peek() is not None and model_registry.poll_interval > 0:
+        model_registry.start()
+    mapping = components.peek("mapping")
+    if mapping is not None:
+        mapping.start_watcher()
+
+
+def run_worker(app, sock: socket.socket, args):
+    restart_background_threads()
+    config = uvicorn.Config(app, host=args.host, port=args.port, lifespan="on", log_level=args.log_level)
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def spawn(app, sock: socket.socket, args) -> int:
+    pid = os.fork()
+    if pid == 0:
+        code = 0
+        try:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            run_worker(app, sock, args)
+        except Exception as e:
+            logging.error(f"Worker {os.getpid()} crashed: {e}")
+            code = 1
+        finally:
+            os._exit(code)
+    logging.info(f"Started worker {pid}")
+    return pid
+
+
+def report_memory(workers: Dict[int, int]):
+    total = 0
+    for pid in workers:
+        memory = read_memory_kb(pid)
+        total += memory["pss_kb"] or 0
+        logging.info(f"Worker {pid}: PSS {memory['pss_kb']} kB, RSS {memory['rss_kb']} kB, "
+                     f"shared {memory['shared_kb']} kB")
+    master = read_memory_kb()
+    logging.info(f"Master PSS {master['pss_kb']} kB; workers total PSS {total} kB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=PREFORK_WORKERS)
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args()
+
+    app = preload()
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((args.host, args.port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+
+    workers = {spawn(app, sock, args): i for i in range(args.workers)}
+    stopping = False
+
+    def shutdown(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(workers):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+    next_report = time.monotonic() + PREFORK_MEMORY_REPORT_SECONDS
+    while workers:
+        try:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+        except ChildProcessError:
+            break
+        if pid:
+            slot = workers.pop(pid, None)
+            if not stopping and slot is not None:
+                logging.warning(f"Worker {pid} exited with status {status}; restarting")
+                workers[spawn(app, sock, args)] = slot
+            continue
+        if PREFORK_MEMORY_REPORT_SECONDS > 0 and time.monotonic() >= next_report:
+            report_memory(workers)
+            next_report = time.monotonic() + PREFORK_MEMORY_REPORT_SECONDS
+        time.sleep(0.5)
+    sock.close()
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,58 +1,139 @@
 """
 FastAPI route for Symptom NLP Checker and Risk Prediction.
 """
-from fastapi import APIRouter, HTTPException, Request
+from fastapi import APIRouter, HTTPException, Request, Response
 from app.models.symptoms import SymptomInput, SymptomResponse
 from app.core.nlp import SymptomNLP
+from app.core.extraction import SymptomExtractor, EXTRACTION_MODE
+from app.core.symptom_matcher import SymptomMatcher, load_synonyms
+from app.core.symptom_normalizer import SymptomNormalizer, FUZZY_NORMALIZATION
 from app.core.mappings import SymptomMapping
 from app.core.panic_guard import PanicGuard
 from app.core.explainability import ExplainabilityEngine
+from app.core.explainer_cache import explainer_cache
+from app.core.plot_renderer import plot_renderer
 from app.core.lifestyle import LifestyleRecommender
 from app.core.predictor import Predictor
+from app.core.prediction_cache import prediction_cache
 from app.utils.exception_utils import handle_exception
 import logging
 from app.services.data_monitor import DataMonitor
+from app.services.lifecycle import components, ComponentUnavailableError
+from app.services.model_registry import model_registry
+from app.services.shadow import shadow_scorer
+from app.core.predict_batching import labels_and_confidences
+from app.utils.metrics import metrics_registry
 
 router = APIRouter()
 
-# TODO: Load model, mapping, and other dependencies via DI or app state
-nlp_engine = SymptomNLP()
-mapping_engine = SymptomMapping()
+# Heavy dependencies are registered here and built lazily / at startup by the
+# component manager; cheap rule-based engines are created directly.
+if EXTRACTION_MODE != "dictionary":
+    components.register("nlp", SymptomNLP, warmup=lambda nlp: nlp.extract_symptoms("fever and cough"))
+
+def load_mapping():
+    mapping = SymptomMapping()
+    mapping.add_listener(rebuild_vocabulary_indexes)
+    return mapping
+
+components.register("mapping", load_mapping, warmup=lambda mapping: mapping.map_symptoms(["fever"]))
+
+def load_extractor():
+    extractor = SymptomExtractor(SymptomMatcher.from_mapping(components.get("mapping")),
+                                 nlp_provider=lambda: components.get("nlp"))
+    metrics_registry.register("symptom_extraction", extractor.stats)
+    return extractor
+
+components.register("extractor", load_extractor, warmup=lambda e: e.matcher.match("fever and cough"))
+
+def build_normalizer(mapping: SymptomMapping) -> SymptomNormalizer:
+    normalizer = SymptomNormalizer(mapping.vocabulary(), load_synonyms())
+    metrics_registry.register("symptom_normalizer", normalizer.stats)
+    return normalizer
+
+def load_normalizer():
+    return build_normalizer(components.get("mapping"))
+
+if FUZZY_NORMALIZATION:
+    components.register("normalizer", load_normalizer, warmup=lambda n: n.lookup("headaches"), required=False)
+
+# Shares the registry's model with /predict and /explain instead of loading its own copy
+components.register(
+    "predictor", lambda: Predictor(registry=model_registry, cache=prediction_cache),
+    warmup=lambda p: p.predict_proba([0.0] * getattr(p.model, "n_features_in_", 1))
+)
+def load_data_monitor():
+    monitor = DataMonitor()
+    metrics_registry.register("drift", monitor.stats)
+    return monitor
+
+components.register("data_monitor", load_data_monitor, required=False)
+
+def rebuild_vocabulary_indexes(mapping: SymptomMapping):
+    """
+    After a mapping hot reload: swaps in a matcher and normalizer built from the
+    new vocabulary (on the watcher thread; requests keep the ones they hold).
+    """
+    extractor = components.peek("extractor")
+    if extractor is not None:
+        extractor.matcher = SymptomMatcher.from_mapping(mapping)
+    if components.peek("normalizer") is not None:
+        components.replace("normalizer", build_normalizer(mapping))
+
 panic_guard = PanicGuard()
 explain_engine = ExplainabilityEngine(model=None)  # TODO: Pass actual model
 lifestyle_engine = LifestyleRecommender()
 
-predictor = Predictor()  # Loads model from MLflow
-data_monitor = DataMonitor()
-
 @router.post("/symptoms", response_model=SymptomResponse)
-def check_symptoms(input_data: SymptomInput, request: Request):
+def check_symptoms(input_data: SymptomInput, request: Request, response: Response):
     """
     Parses free-text symptoms, predicts risk, explains results, and provides tips.
     """
     try:
-        # NLP: Extract symptoms
-        symptoms = nlp_engine.extract_symptoms(input_data.text)
+        extractor = components.get("extractor")
+        mapping_engine = components.get("mapping")
+        predictor = components.get("predictor")
+        data_monitor = components.get_optional("data_monitor")
+        # NLP: Extract symptoms (dictionary fast path, transformer when needed)
+        symptoms, extraction_path = extractor.extract(input_data.text)
+        response.headers["X-Symptom-Extraction-Path"] = extraction_path
+        logging.info(f"/symptoms extraction path: {extraction_path}")
+        # Normalization: map misspelled/variant entities onto canonical mapping symptoms
+        normalizer = components.get_optional("normalizer")
+        if normalizer is not None:
+            symptoms = normalizer.normalize(symptoms)
         # Mapping: Map symptoms to disease risk
         risk_scores = mapping_engine.map_symptoms(symptoms)
         # Real risk prediction using model
-        real_risk = {}
-        for disease, score in risk_scores.items():
-            # For demo, use mapping score as features; in production, use real features
-            proba = predictor.predict_proba([score])
-            real_risk[disease] = proba[1]  # Probability of positive class
+        # For demo, use mapping score as features; in production, use real features
+        diseases = list(risk_scores)
+        features = [[risk_scores[d]] for d in diseases]
+        # One model version for scoring, the shadow comparison and the explanation
+        handle = model_registry.current()
+        probas = predictor.predict_proba_batch(features, handle=handle)
+        if shadow_scorer is not None and features:
+            labels, confidences = labels_and_confidences(handle.model.classes_, probas)
+            shadow_scorer.submit(features, labels, confidences, handle.version, source="symptoms")
+        real_risk = {disease: proba[1] for disease, proba in zip(diseases, probas)}  # Probability of positive class
         risk = [
             {"disease": k, "risk_score": v} for k, v in real_risk.items()
         ]
-        # Data Drift Monitoring
-        drift_report = data_monitor.check_drift([{k: v for k, v in risk_scores.items()}])
-        if drift_report["drift"]:
-            logging.warning("Drift detected in /symptoms input!")
-        # Use model from app state if available
-        model = getattr(request.app.state, "model", None)
-        explain_engine = ExplainabilityEngine(model) if model else explain_engine
-        # Explainability: Generate SHAP/LIME explanation
-        explanation = explain_engine.explain(input_data.text, real_risk)
+        # Data Drift Monitoring: only buffered here, checked over windows in the background
+        if data_monitor is not None:
+            data_monitor.record({k: v for k, v in risk_scores.items()})
+        # Use the shared production model's explainer if it is already built
+        explainer = explainer_cache.try_get(handle)
+        if explainer is not None:
+            engine = ExplainabilityEngine(handle.model, explainer=explainer, renderer=plot_renderer,
+                                          version=handle.version)
+        else:
+            engine = explain_engine
+        # Explainability: SHAP of the feature row the model scored for the highest-risk disease
+        if features:
+            top = max(range(len(diseases)), key=lambda i: real_risk[diseases[i]])
+            explanation = engine.explain(features[top], real_risk)
+        else:
+            explanation = {"shap_values": [], "plot_base64": None}
         # Panic Guard: Generate calm message
         message = panic_guard.rephrase(real_risk)
         # Lifestyle: Recommend tips
@@ -63,5 +144,8 @@ def check_symptoms(input_data: SymptomInput, request: Request):
             shap=explanation,
             lifestyle=[{"tip": t} for t in tips]
         )
+    except ComponentUnavailableError as e:
+        logging.error(f"/symptoms dependency unavailable: {e}")
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         handle_exception(e, context="/symptoms route") 
\ No newline at end of file
@@ -0,0 +1,137 @@
+"""
+Dynamic micro-batching: merges concurrent single-item calls into one batched call.
+"""
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional
+
+from app.utils.metrics import Histogram
+
+BATCH_SIZE_BUCKETS = [1, 2, 4, 8, 16, 32, 64, 128]
+QUEUE_WAIT_MS_BUCKETS = [0.5, 1, 2, 5, 10, 25, 50, 100, 250]
+
+_STOP = object()
+
+
+class MicroBatcher:
+    """
+    Collects items submitted from many threads for up to `max_wait_ms` (or until
+    `max_batch_size` items are queued), runs `process_batch` once on the whole
+    batch and hands each caller its own result.
+
+    `process_batch` must return one result per input item, in order.
+    """
+    def __init__(self, process_batch: Callable[[List[Any]], List[Any]], max_batch_size: int = 16,
+                 max_wait_ms: float = 5.0, name: str = "batcher"):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be >= 1")
+        self.process_batch = process_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.name = name
+        self._queue: "queue.Queue" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._batches = 0
+        self._items = 0
+        self._errors = 0
+        self.batch_size_hist = Histogram(BATCH_SIZE_BUCKETS)
+        self.queue_wait_hist = Histogram(QUEUE_WAIT_MS_BUCKETS)
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name=f"{self.name}-worker", daemon=True)
+                self._thread.start()
+                logging.info(f"MicroBatcher '{self.name}' started (max_batch_size={self.max_batch_size}, max_wait_ms={self.max_wait_ms}).")
+
+    def stop(self, timeout: Optional[float] = None):
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+        if thread is not None and thread.is_alive():
+            self._queue.put(_STOP)
+            thread.join(timeout)
+
+    def submit_async(self, item: Any) -> Future:
+        """
+        Enqueues an item and returns a Future for its result.
+        """
+        thread = self._thread
+        # Also restarts the worker in a forked child, where the parent's thread no longer runs
+        if thread is None or not thread.is_alive():
+            self.start()
+        future: Future = Future()
+        self._queue.put((item, future, time.perf_counter()))
+        return future
+
+    def submit(self, item: Any, timeout: Optional[float] = None) -> Any:
+        """
+        Enqueues an item and blocks until its batch has been processed.
+        """
+        return self.submit_async(item).result(timeout)
+
+    def _collect(self, first) -> List[Any]:
+        batch = [first]
+        deadline = first[2] + self.max_wait_ms / 1000.0
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                entry = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if entry is _STOP:
+                self._queue.put(_STOP)
+                break
+            batch.append(entry)
+        return batch
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is _STOP:
+                break
+            batch = self._collect(first)
+            self._dispatch(batch)
+
+    def _dispatch(self, batch: List[Any]):
+        started = time.perf_counter()
+        for _, _, enqueued_at in batch:
+            self.queue_wait_hist.observe((started - enqueued_at) * 1000.0)
+        self.batch_size_hist.observe(len(batch))
+        items = [entry[0] for entry in batch]
+        try:
+            results = self.process_batch(items)
+            if len(results) != len(items):
+                raise RuntimeError(f"Batch function returned {len(results)} results for {len(items)} items")
+        except Exception as e:
+            logging.error(f"MicroBatcher '{self.name}' batch error: {e}")
+            with self._lock:
+                self._batches += 1
+                self._items += len(batch)
+                self._errors += 1
+            for _, future, _ in batch:
+                future.set_exception(e)
+            return
+        with self._lock:
+            self._batches += 1
+            self._items += len(batch)
+        for (_, future, _), result in zip(batch, results):
+            future.set_result(result)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            batches, items, errors = self._batches, self._items, self._errors
+        return {
+            "queue_depth": self._queue.qsize(),
+            "batches": batches,
+            "items": items,
+            "errors": errors,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait_ms,
+            "batch_size": self.batch_size_hist.snapshot(),
+            "queue_wait_ms": self.queue_wait_hist.snapshot(),
+        }
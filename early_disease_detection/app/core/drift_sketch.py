@@ -0,0 +1,232 @@
+"""
+Mergeable drift sketches: fixed-bin histograms (bin edges at reference
+quantiles) for numeric features and capped frequency tables for categorical
+ones. A reference profile is saved once by the preprocessing pipeline; live
+windows are folded into sketches with the same bins, so PSI, KS and
+Jensen-Shannon scores need constant memory however many rows a window has.
+"""
+import json
+import logging
+import os
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+DRIFT_PROFILE_PATH = os.getenv("DRIFT_PROFILE_PATH", "data/processed/reference_profile.json")
+# Quantile bins per numeric feature (plus one open bin on each side)
+DRIFT_SKETCH_BINS = int(os.getenv("DRIFT_SKETCH_BINS", "20"))
+# Categories tracked per categorical feature; the rest are counted as "__other__"
+DRIFT_SKETCH_MAX_CATEGORIES = int(os.getenv("DRIFT_SKETCH_MAX_CATEGORIES", "50"))
+# A feature drifts when any score exceeds its threshold
+DRIFT_PSI_THRESHOLD = float(os.getenv("DRIFT_PSI_THRESHOLD", "0.2"))
+DRIFT_KS_THRESHOLD = float(os.getenv("DRIFT_KS_THRESHOLD", "0.1"))
+DRIFT_JS_THRESHOLD = float(os.getenv("DRIFT_JS_THRESHOLD", "0.1"))
+
+OTHER = "__other__"
+# Added to every bin proportion so empty bins do not make PSI / JS infinite
+EPSILON = 1e-4
+
+
+class NumericSketch:
+    """
+    Counts per bin: (-inf, e0], (e0, e1], ..., (e_last, inf), plus missing values.
+    """
+    kind = "numeric"
+
+    def __init__(self, edges: Iterable[float], counts: Optional[Iterable[int]] = None, missing: int = 0):
+        self.edges = np.asarray(list(edges), dtype=np.float64)
+        self.counts = (np.zeros(len(self.edges) + 1, dtype=np.int64) if counts is None
+                       else np.asarray(list(counts), dtype=np.int64))
+        self.missing = int(missing)
+
+    @classmethod
+    def from_values(cls, values: Any, bins: int = DRIFT_SKETCH_BINS) -> "NumericSketch":
+        values = pd.to_numeric(pd.Series(values), errors="coerce").to_numpy(dtype=np.float64)
+        present = values[~np.isnan(values)]
+        edges = np.unique(np.quantile(present, np.linspace(0, 1, bins + 1))) if len(present) else np.array([])
+        sketch = cls(edges)
+        sketch.update(values)
+        return sketch
+
+    def empty(self) -> "NumericSketch":
+        return NumericSketch(self.edges)
+
+    def update(self, values: Any):
+        values = pd.to_numeric(pd.Series(values), errors="coerce").to_numpy(dtype=np.float64)
+        nan = np.isnan(values)
+        self.missing += int(nan.sum())
+        self.counts += np.bincount(np.searchsorted(self.edges, values[~nan], side="left"),
+                                   minlength=len(self.counts))
+
+    def merge(self, other: "NumericSketch"):
+        self.counts += other.counts
+        self.missing += other.missing
+
+    @property
+    def total(self) -> int:
+        return int(self.counts.sum())
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"type": self.kind, "edges": self.edges.tolist(), "counts": self.counts.tolist(),
+                "missing": self.missing}
+
+
+class CategoricalSketch:
+    """
+    Counts per reference category, with everything else in "__other__".
+    """
+    kind = "categorical"
+
+    def __init__(self, categories: Iterable[str], counts: Optional[Iterable[int]] = None, missing: int = 0):
+        self.categories = [str(c) for c in categories]
+        if OTHER not in self.categories:
+            self.categories.append(OTHER)
+        self.index = {c: i for i, c in enumerate(self.categories)}
+        self.counts = (np.zeros(len(self.categories), dtype=np.int64) if counts is None
+                       else np.asarray(list(counts), dtype=np.int64))
+        self.missing = int(missing)
+
+    @classmethod
+    def from_values(cls, values: Any, max_categories: int = DRIFT_SKETCH_MAX_CATEGORIES) -> "CategoricalSketch":
+        frequent = pd.Series(values).dropna().astype(str).value_counts().index[:max_categories]
+        sketch = cls(frequent)
+        sketch.update(values)
+        return sketch
+
+    def empty(self) -> "CategoricalSketch":
+        return CategoricalSketch(self.categories)
+
+    def update(self, values: Any):
+        series = pd.Series(values)
+        self.missing += int(series.isna().sum())
+        for category, count in series.dropna().astype(str).value_counts().items():
+            self.counts[self.index.get(category, self.index[OTHER])] += int(count)
+
+    def merge(self, other: "CategoricalSketch"):
+        self.counts += other.counts
+        self.missing += other.missing
+
+    @property
+    def total(self) -> int:
+        return int(self.counts.sum())
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"type": self.kind, "categories": self.categories, "counts": self.counts.tolist(),
+                "missing": self.missing}
+
+
+def _sketch_from_dict(payload: Dict[str, Any]):
+    if payload["type"] == NumericSketch.kind:
+        return NumericSketch(payload["edges"], payload["counts"], payload.get("missing", 0))
+    return CategoricalSketch(payload["categories"], payload["counts"], payload.get("missing", 0))
+
+
+class Profile:
+    """
+    One sketch per feature. `empty()` gives a profile with the same bins, to be
+    filled from live data with `update` and combined with `merge`.
+    """
+    def __init__(self, sketches: Dict[str, Any]):
+        self.sketches = sketches
+
+    @classmethod
+    def from_frame(cls, frame: pd.DataFrame, bins: int = DRIFT_SKETCH_BINS,
+                   max_categories: int = DRIFT_SKETCH_MAX_CATEGORIES) -> "Profile":
+        sketches = {}
+        for column in frame.columns:
+            if pd.api.types.is_numeric_dtype(frame[column]):
+                sketches[str(column)] = NumericSketch.from_values(frame[column], bins)
+            else:
+                sketches[str(column)] = CategoricalSketch.from_values(frame[column], max_categories)
+        return cls(sketches)
+
+    @classmethod
+    def load(cls, path: str) -> "Profile":
+        with open(path) as f:
+            payload = json.load(f)
+        return cls({name: _sketch_from_dict(sketch) for name, sketch in payload["features"].items()})
+
+    def save(self, path: str) -> str:
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump({"features": {name: sketch.to_dict() for name, sketch in self.sketches.items()}}, f)
+        os.replace(tmp, path)
+        logging.info(f"Saved drift reference profile ({len(self.sketches)} features) to {path}")
+        return path
+
+    def empty(self) -> "Profile":
+        return Profile({name: sketch.empty() for name, sketch in self.sketches.items()})
+
+    def update(self, rows: Any):
+        """
+        Folds a DataFrame or a list of feature dicts into the sketches (unknown features are ignored).
+        """
+        frame = rows if isinstance(rows, pd.DataFrame) else pd.DataFrame(list(rows))
+        for name, sketch in self.sketches.items():
+            if name in frame.columns:
+                sketch.update(frame[name])
+
+    def merge(self, other: "Profile") -> "Profile":
+        for name, sketch in self.sketches.items():
+            if name in other.sketches:
+                sketch.merge(other.sketches[name])
+        return self
+
+    @property
+    def rows(self) -> int:
+        return max((sketch.total + sketch.missing for sketch in self.sketches.values()), default=0)
+
+
+def _proportions(counts: np.ndarray) -> np.ndarray:
+    p = counts / max(counts.sum(), 1) + EPSILON
+    return p / p.sum()
+
+
+def psi(reference: np.ndarray, current: np.ndarray) -> float:
+    p, q = _proportions(reference), _proportions(current)
+    return float(np.sum((q - p) * np.log(q / p)))
+
+
+def js_distance(reference: np.ndarray, current: np.ndarray) -> float:
+    """
+    Jensen-Shannon distance (base 2, in [0, 1]).
+    """
+    p, q = _proportions(reference), _proportions(current)
+    m = (p + q) / 2
+    divergence = 0.5 * np.sum(p * np.log2(p / m)) + 0.5 * np.sum(q * np.log2(q / m))
+    return float(np.sqrt(max(divergence, 0.0)))
+
+
+def ks_statistic(reference: np.ndarray, current: np.ndarray) -> float:
+    """
+    Kolmogorov-Smirnov statistic on the binned CDFs (exact at the bin edges,
+    a lower bound of the sample statistic in between).
+    """
+    p = np.cumsum(reference) / max(reference.sum(), 1)
+    q = np.cumsum(current) / max(current.sum(), 1)
+    return float(np.max(np.abs(p - q)))
+
+
+def drift_scores(reference: Profile, current: Profile, psi_threshold: float = DRIFT_PSI_THRESHOLD,
+                 ks_threshold: float = DRIFT_KS_THRESHOLD, js_threshold: float = DRIFT_JS_THRESHOLD) -> Dict[str, Any]:
+    """
+    Per-feature PSI, KS (numeric only) and Jensen-Shannon distance, and the
+    share of drifted features among those with live data ("drift_score").
+    """
+    features: Dict[str, Dict[str, Any]] = {}
+    for name, ref in reference.sketches.items():
+        cur = current.sketches.get(name)
+        if cur is None or cur.total == 0:
+            continue
+        scores = {"psi": psi(ref.counts, cur.counts), "js": js_distance(ref.counts, cur.counts),
+                  "ks": ks_statistic(ref.counts, cur.counts) if ref.kind == NumericSketch.kind else None,
+                  "rows": cur.total}
+        scores["drift"] = bool(scores["psi"] > psi_threshold or scores["js"] > js_threshold
+                               or (scores["ks"] is not None and scores["ks"] > ks_threshold))
+        features[name] = scores
+    drifted: List[str] = [name for name, scores in features.items() if scores["drift"]]
+    return {"drift_score": len(drifted) / len(features) if features else 0.0, "drifted_features": drifted,
+            "features": features}
@@ -2,37 +2,48 @@
 Explainability Layer: SHAP/LIME interface for predictions.
 """
 
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 import logging
-import shap
 import numpy as np
 
+from app.core.budgeted_shap import EXPLAIN_BUDGET_MS, explain_within_budget
+from app.core.explainer_cache import build_explainer, load_background
+from app.core.plot_renderer import select_class
+
 class ExplainabilityEngine:
     """
     Runs SHAP/LIME for model predictions and generates plots.
     """
-    def __init__(self, model):
+    def __init__(self, model, explainer=None, budget_ms: float = EXPLAIN_BUDGET_MS, renderer=None,
+                 version: Optional[str] = None):
         self.model = model
-        # For demonstration, use KernelExplainer if model is not None
-        self.explainer = None
-        if model is not None:
+        self.budget_ms = budget_ms
+        # PlotRenderer (app/core/plot_renderer.py) for the waterfall plot; cached per model version
+        self.renderer = renderer
+        self.version = version
+        # A prebuilt (cached, see app/core/explainer_cache.py) explainer skips construction
+        self.explainer = explainer
+        if explainer is None and model is not None:
             try:
-                self.explainer = shap.KernelExplainer(model.predict, np.zeros((1, model.n_features_in_)))
-                logging.info("SHAP KernelExplainer initialized.")
+                self.explainer = build_explainer(model, load_background(model))
             except Exception as e:
                 logging.warning(f"SHAP explainer could not be initialized: {e}")
 
-    def explain(self, input_data: Any, prediction: Any) -> Dict[str, Any]:
+    def explain(self, input_data: Any, prediction: Any, budget_ms: Optional[float] = None) -> Dict[str, Any]:
         """
         Generates explanation for a prediction using SHAP. Returns a placeholder if model is None.
+        KernelExplainer sampling is capped by `budget_ms` (see app/core/budgeted_shap.py);
+        the "quality" entry says how far it got.
         """
         try:
             if self.explainer is not None:
                 # Assume input_data is a 2D array or list
-                shap_values = self.explainer.shap_values(np.array([input_data]))
+                shap_values, quality = explain_within_budget(self.explainer, np.array([input_data]),
+                                                             budget_ms if budget_ms is not None else self.budget_ms)
                 explanation = {
                     "shap_values": shap_values[0].tolist() if isinstance(shap_values, list) else shap_values.tolist(),
-                    "plot_base64": None  # TODO: Add plot rendering
+                    "plot_base64": self.render_waterfall(shap_values, input_data),
+                    "quality": quality
                 }
                 logging.info(f"Generated SHAP explanation: {explanation}")
                 return explanation
@@ -48,4 +59,15 @@ class ExplainabilityEngine:
             logging.error(f"Explainability error: {e}")
             return {"shap_values": [], "plot_base64": None}
 
+    def render_waterfall(self, shap_values: Any, input_data: Any) -> Optional[str]:
+        """
+        Base64 PNG waterfall of the (positive class) SHAP values of one row, or None.
+        """
+        if self.renderer is None:
+            return None
+        values, base_value = select_class(shap_values, getattr(self.explainer, "expected_value", 0.0))
+        feature_names = getattr(self.model, "feature_names_in_", None)
+        return self.renderer.waterfall(self.version, values[0], base_value, np.asarray(input_data),
+                                       list(feature_names) if feature_names is not None else None)
+
 # TODO: Add unit tests and error handling 
\ No newline at end of file
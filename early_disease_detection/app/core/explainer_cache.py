@@ -0,0 +1,143 @@
+"""
+Explainer cache: one SHAP explainer per model version, built at warm-up and
+shared by /explain, /symptoms and anything else that explains predictions.
+"""
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+import numpy as np
+import pandas as pd
+import shap
+
+# Reference data the KernelExplainer background is summarized from (same file DataMonitor uses)
+EXPLAINER_BACKGROUND_PATH = os.getenv("EXPLAINER_BACKGROUND_PATH",
+                                      os.getenv("REFERENCE_DATA_PATH", "data/processed/processed_data.csv"))
+# Number of weighted k-means centroids summarizing the KernelExplainer background
+EXPLAINER_BACKGROUND_SIZE = int(os.getenv("EXPLAINER_BACKGROUND_SIZE", "50"))
+# Explainers kept (current version plus the previous one for requests still in flight)
+EXPLAINER_CACHE_VERSIONS = 2
+
+
+def load_background(model: Any, path: str = EXPLAINER_BACKGROUND_PATH) -> Optional[np.ndarray]:
+    """
+    Reference rows matching the model's features: `feature_names_in_` when the model
+    has them, else the numeric columns if their count matches. None if unavailable.
+    """
+    try:
+        frame = pd.read_csv(path)
+    except Exception as e:
+        logging.warning(f"Could not load explainer background from {path}: {e}")
+        return None
+    names = getattr(model, "feature_names_in_", None)
+    if names is not None and set(names).issubset(frame.columns):
+        frame = frame[list(names)]
+    else:
+        frame = frame.select_dtypes(include="number")
+    if frame.shape[1] != getattr(model, "n_features_in_", frame.shape[1]):
+        logging.warning(f"Explainer background {path} has {frame.shape[1]} numeric columns, "
+                        f"model expects {model.n_features_in_}; using a zero background")
+        return None
+    return frame.to_numpy(dtype=float)
+
+
+def summarize_background(background: Optional[np.ndarray], n_features: int, size: int = EXPLAINER_BACKGROUND_SIZE):
+    """
+    Weighted k-means summary of the background (KernelExplainer cost grows linearly with it).
+    """
+    if background is None or len(background) == 0:
+        return np.zeros((1, n_features))
+    if len(background) <= size:
+        return background
+    return shap.kmeans(background, size)
+
+
+def build_explainer(model: Any, background: Optional[np.ndarray] = None,
+                    background_size: int = EXPLAINER_BACKGROUND_SIZE) -> Any:
+    """
+    TreeExplainer for tree ensembles (exact and fast, no background needed),
+    otherwise a KernelExplainer over a k-means summarized background.
+    """
+    try:
+        explainer = shap.TreeExplainer(model)
+        logging.info(f"SHAP TreeExplainer initialized for {type(model).__name__}.")
+        return explainer
+    except Exception as e:
+        logging.info(f"TreeExplainer not applicable to {type(model).__name__} ({e}); using KernelExplainer")
+    predict = model.predict_proba if hasattr(model, "predict_proba") else model.predict
+    explainer = shap.KernelExplainer(predict, summarize_background(background, model.n_features_in_, background_size))
+    logging.info(f"SHAP KernelExplainer initialized for {type(model).__name__}.")
+    return explainer
+
+
+class ExplainerCache:
+    """
+    Explainers keyed by model version. `get` builds on first use (normally at
+    warm-up, or before a model swap via `prebuild`), so requests only pay a
+    dictionary lookup. Only the newest `max_versions` explainers are kept.
+    """
+    def __init__(self, background_loader: Callable[[Any], Optional[np.ndarray]] = load_background,
+                 background_size: int = EXPLAINER_BACKGROUND_SIZE, max_versions: int = EXPLAINER_CACHE_VERSIONS):
+        self.background_loader = background_loader
+        self.background_size = background_size
+        self.max_versions = max_versions
+        self._explainers: "OrderedDict[str, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self._hits = 0
+        self._builds: Dict[str, Dict[str, Any]] = {}
+
+    def get(self, handle: Any) -> Any:
+        """
+        Returns the explainer for a ModelHandle (anything with .version and .model).
+        """
+        with self._lock:
+            explainer = self._explainers.get(handle.version)
+            if explainer is not None:
+                self._hits += 1
+                return explainer
+        with self._build_lock:
+            with self._lock:
+                explainer = self._explainers.get(handle.version)
+            if explainer is not None:
+                return explainer
+            started = time.perf_counter()
+            explainer = build_explainer(handle.model, self.background_loader(handle.model), self.background_size)
+            seconds = time.perf_counter() - started
+            with self._lock:
+                self._explainers[handle.version] = explainer
+                while len(self._explainers) > self.max_versions:
+                    self._explainers.popitem(last=False)
+                self._builds[handle.version] = {"kind": type(explainer).__name__, "build_seconds": seconds}
+            return explainer
+
+    def peek(self, version: str) -> Optional[Any]:
+        with self._lock:
+            return self._explainers.get(version)
+
+    def try_get(self, handle: Any) -> Optional[Any]:
+        """
+        Like `get`, but logs and returns None if the explainer cannot be built.
+        """
+        try:
+            return self.get(handle)
+        except Exception as e:
+            logging.error(f"Could not build explainer for model version {handle.version}: {e}")
+            return None
+
+    def prebuild(self, handle: Any):
+        """
+        Builds the explainer for a new model version before it is swapped in
+        (registered with ModelRegistry.add_listener(..., before_swap=True)).
+        """
+        self.try_get(handle)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"versions": list(self._explainers), "hits": self._hits, "builds": dict(self._builds)}
+
+
+explainer_cache = ExplainerCache()
@@ -0,0 +1,84 @@
+"""
+Symptom extraction router: dictionary fast path first, transformer NER as fallback.
+"""
+import logging
+import os
+import threading
+from typing import Any, Callable, Dict, List, Tuple
+
+from app.core.symptom_matcher import SymptomMatcher
+from app.utils.text import normalize_text
+
+# "auto": dictionary first, BERT only when needed; "dictionary": never BERT; "transformer": always BERT
+EXTRACTION_MODE = os.getenv("SYMPTOM_EXTRACTION_MODE", "auto").lower()
+EXTRACTION_MODES = ("auto", "dictionary", "transformer")
+# Inputs longer than this many words go to the transformer in "auto" mode
+FAST_PATH_MAX_WORDS = int(os.getenv("SYMPTOM_FAST_PATH_MAX_WORDS", "12"))
+# Negation/hedging cues the dictionary cannot interpret ("no fever", "not coughing")
+AMBIGUITY_CUES = frozenset(["no", "not", "without", "denies", "denied", "never", "none", "nor", "negative"])
+
+PATH_DICTIONARY = "dictionary"
+PATH_TRANSFORMER = "transformer"
+
+
+class SymptomExtractor:
+    """
+    Chooses, per request, between the dictionary matcher and the SymptomNLP
+    transformer and records which path served the request.
+    """
+    def __init__(self, matcher: SymptomMatcher, nlp_provider: Callable[[], Any], mode: str = EXTRACTION_MODE,
+                 max_fast_path_words: int = FAST_PATH_MAX_WORDS):
+        if mode not in EXTRACTION_MODES:
+            raise ValueError(f"Unknown extraction mode '{mode}', expected one of {EXTRACTION_MODES}")
+        self.matcher = matcher
+        self.nlp_provider = nlp_provider
+        self.mode = mode
+        self.max_fast_path_words = max_fast_path_words
+        self._lock = threading.Lock()
+        self._counts: Dict[str, int] = {}
+
+    def _count(self, key: str):
+        with self._lock:
+            self._counts[key] = self._counts.get(key, 0) + 1
+
+    def _fallback_reason(self, text: str, matched: List[str]) -> str:
+        words = normalize_text(text).split()
+        if not matched:
+            return "no_match"
+        if len(words) > self.max_fast_path_words:
+            return "long_input"
+        if AMBIGUITY_CUES.intersection(words):
+            return "ambiguous"
+        return ""
+
+    def extract(self, text: str) -> Tuple[List[str], str]:
+        """
+        Returns (symptoms, path) where path is "dictionary" or "transformer".
+        """
+        if self.mode == PATH_TRANSFORMER:
+            self._count("transformer:forced")
+            return self.nlp_provider().extract_symptoms(text), PATH_TRANSFORMER
+        matched = self.matcher.match(text)
+        if self.mode == PATH_DICTIONARY:
+            self._count("dictionary:forced")
+            return matched, PATH_DICTIONARY
+        reason = self._fallback_reason(text, matched)
+        if not reason:
+            self._count("dictionary:matched")
+            return matched, PATH_DICTIONARY
+        self._count(f"transformer:{reason}")
+        logging.info(f"Symptom fast path fell back to transformer ({reason})")
+        return self.nlp_provider().extract_symptoms(text), PATH_TRANSFORMER
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counts = dict(self._counts)
+        total = sum(counts.values())
+        dictionary = sum(n for k, n in counts.items() if k.startswith(PATH_DICTIONARY))
+        return {
+            "mode": self.mode,
+            "vocabulary_size": self.matcher.size,
+            "requests": total,
+            "paths": counts,
+            "dictionary_fraction": dictionary / total if total else 0.0,
+        }
@@ -0,0 +1,158 @@
+"""
+Compiled, memory-mappable binary artifact for the symptom mapping table.
+
+Layout (little-endian):
+    8 bytes   magic b"CALMAP01"
+    8 bytes   uint64 header length
+    N bytes   JSON header (version, source, array dtypes/shapes/offsets)
+    ...       64-byte aligned arrays: indptr, disease_ids, weights and the
+              NUL-separated UTF-8 string tables for symptoms and diseases
+
+Arrays are opened with np.memmap, so every worker on a host shares the same
+page-cache pages instead of holding its own parsed DataFrame.
+
+Usage:
+    python -m app.core.mapping_artifact compile ml/symptom_mapping.csv ml/symptom_mapping.calmap
+    python -m app.core.mapping_artifact info ml/symptom_mapping.calmap
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import struct
+import time
+from typing import Any, Dict, Tuple
+
+import numpy as np
+import pandas as pd
+
+MAGIC = b"CALMAP01"
+ALIGNMENT = 64
+_PREFIX = struct.Struct("<8sQ")
+
+
+def _align(offset: int) -> int:
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def _string_table(values) -> np.ndarray:
+    return np.frombuffer("\0".join(str(v) for v in values).encode("utf-8"), dtype=np.uint8)
+
+
+def _read_strings(blob: np.ndarray, count: int):
+    if count == 0:
+        return []
+    return blob.tobytes().decode("utf-8").split("\0")
+
+
+def write_artifact(index, out_path: str, version: str, source: str = "") -> str:
+    """
+    Serializes a MappingIndex. The file is written next to `out_path` and renamed
+    into place, so readers never observe a partially written artifact.
+    """
+    arrays = {
+        "indptr": np.ascontiguousarray(index.indptr, dtype=np.int64),
+        "disease_ids": np.ascontiguousarray(index.disease_ids, dtype=np.int32),
+        "weights": np.ascontiguousarray(index.weights, dtype=np.float64),
+        "symptoms": _string_table(index.symptoms),
+        "diseases": _string_table(index.diseases),
+    }
+    header = {
+        "version": version,
+        "source": source,
+        "created_at": time.time(),
+        "n_symptoms": len(index.symptoms),
+        "n_diseases": len(index.diseases),
+        "arrays": {},
+    }
+    # Offsets depend on the header length, so lay out with a provisional header first
+    for _ in range(2):
+        header_bytes = json.dumps(header, sort_keys=True).encode("utf-8")
+        offset = _align(_PREFIX.size + len(header_bytes) + 512)
+        for name, arr in arrays.items():
+            header["arrays"][name] = {"dtype": arr.dtype.str, "shape": list(arr.shape), "offset": offset}
+            offset = _align(offset + arr.nbytes)
+    header_bytes = json.dumps(header, sort_keys=True).encode("utf-8")
+    tmp_path = f"{out_path}.tmp-{os.getpid()}"
+    if os.path.dirname(out_path):
+        os.makedirs(os.path.dirname(out_path), exist_ok=True)
+    with open(tmp_path, "wb") as f:
+        f.write(_PREFIX.pack(MAGIC, len(header_bytes)))
+        f.write(header_bytes)
+        for name, arr in arrays.items():
+            f.seek(header["arrays"][name]["offset"])
+            f.write(arr.tobytes())
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, out_path)
+    return out_path
+
+
+def read_header(path: str) -> Dict[str, Any]:
+    with open(path, "rb") as f:
+        magic, header_len = _PREFIX.unpack(f.read(_PREFIX.size))
+        if magic != MAGIC:
+            raise ValueError(f"Not a compiled symptom mapping artifact: {path}")
+        return json.loads(f.read(header_len))
+
+
+def load_artifact(path: str) -> Tuple[Any, Dict[str, Any]]:
+    """
+    Memory-maps an artifact and returns (MappingIndex, header).
+    """
+    from app.core.mappings import MappingIndex
+    header = read_header(path)
+    raw = np.memmap(path, dtype=np.uint8, mode="r")
+    arrays = {}
+    for name, spec in header["arrays"].items():
+        dtype = np.dtype(spec["dtype"])
+        count = int(np.prod(spec["shape"]))
+        start = spec["offset"]
+        arrays[name] = raw[start:start + count * dtype.itemsize].view(dtype).reshape(spec["shape"])
+    index = MappingIndex(
+        symptoms=_read_strings(arrays["symptoms"], header["n_symptoms"]),
+        diseases=_read_strings(arrays["diseases"], header["n_diseases"]),
+        indptr=arrays["indptr"],
+        disease_ids=arrays["disease_ids"],
+        weights=arrays["weights"],
+    )
+    return index, header
+
+
+def compile_mapping(csv_path: str, out_path: str, version: str = None) -> Dict[str, Any]:
+    """
+    Builds the binary artifact from the mapping CSV. The version defaults to a
+    hash of the CSV contents.
+    """
+    from app.core.mappings import MappingIndex
+    with open(csv_path, "rb") as f:
+        digest = hashlib.sha256(f.read()).hexdigest()[:12]
+    index = MappingIndex.from_frame(pd.read_csv(csv_path))
+    write_artifact(index, out_path, version=version or digest, source=os.path.abspath(csv_path))
+    header = read_header(out_path)
+    logging.info(f"Compiled {csv_path} -> {out_path} (version {header['version']}, "
+                 f"{header['n_symptoms']} symptoms, {header['n_diseases']} diseases)")
+    return header
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile or inspect symptom mapping artifacts.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    compile_cmd = sub.add_parser("compile", help="Build an artifact from the mapping CSV")
+    compile_cmd.add_argument("csv_path")
+    compile_cmd.add_argument("out_path")
+    compile_cmd.add_argument("--version", help="Artifact version (default: hash of the CSV)")
+    info_cmd = sub.add_parser("info", help="Print an artifact header")
+    info_cmd.add_argument("artifact_path")
+    args = parser.parse_args()
+    if args.command == "compile":
+        header = compile_mapping(args.csv_path, args.out_path, version=args.version)
+    else:
+        header = read_header(args.artifact_path)
+    print(json.dumps({k: v for k, v in header.items() if k != "arrays"}, indent=2))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+    main()
@@ -2,50 +2,322 @@
 Symptom-to-disease mapping utilities.
 """
 
+import numpy as np
 import pandas as pd
-from typing import Dict, List
+from scipy import sparse
+from typing import Any, Callable, Dict, List, Optional, Sequence, Union
 import logging
 import os
+import threading
+
+from app.core.mapping_artifact import load_artifact
+from app.utils.metrics import metrics_registry
 
 # TODO: Load mapping file path from config/env
 MAPPING_CSV_PATH = "ml/symptom_mapping.csv"
+# Compiled artifact (python -m app.core.mapping_artifact compile ...); preferred over the CSV when present
+MAPPING_ARTIFACT_PATH = os.getenv("MAPPING_ARTIFACT_PATH", "ml/symptom_mapping.calmap")
+MAPPING_WATCH_INTERVAL_SECONDS = float(os.getenv("MAPPING_WATCH_INTERVAL_SECONDS", "30"))
+BATCH_OUTPUTS = ("dict", "dense", "sparse")
+
+class MappingIndex:
+    """
+    Inverted index over the mapping table: normalized symptom -> contiguous
+    slice of disease ids and weights (CSR layout, rows kept in table order).
+    """
+    def __init__(self, symptoms: List[str], diseases: List[Any], indptr: np.ndarray, disease_ids: np.ndarray,
+                 weights: np.ndarray):
+        self.symptoms = symptoms
+        self.diseases = diseases
+        self.indptr = indptr
+        self.disease_ids = disease_ids
+        self.weights = weights
+        self.symptom_ids = {s: i for i, s in enumerate(symptoms)}
+        self._matrix = None
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "MappingIndex":
+        # Assume CSV has columns: 'symptom', 'disease', 'weight' (optional)
+        df = df[df['symptom'].notna()]
+        keys = df['symptom'].astype(str).str.lower().to_numpy()
+        disease_codes, diseases = pd.factorize(df['disease'], use_na_sentinel=False)
+        if 'weight' in df.columns:
+            weights = pd.to_numeric(df['weight']).fillna(1.0).to_numpy(dtype=np.float64)
+        else:
+            weights = np.ones(len(df), dtype=np.float64)
+        symptom_codes, symptoms = pd.factorize(keys)
+        # Stable sort keeps each symptom's rows in their original table order
+        order = np.argsort(symptom_codes, kind='stable')
+        indptr = np.zeros(len(symptoms) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(symptom_codes, minlength=len(symptoms)), out=indptr[1:])
+        return cls(
+            symptoms=[str(s) for s in symptoms],
+            diseases=list(diseases),
+            indptr=indptr,
+            disease_ids=disease_codes[order].astype(np.int64),
+            weights=weights[order],
+        )
+
+    def __len__(self) -> int:
+        return len(self.symptoms)
+
+    def row(self, symptom: str) -> Optional[int]:
+        return self.symptom_ids.get(symptom.lower())
+
+    @property
+    def matrix(self) -> sparse.csr_matrix:
+        """
+        S x D sparse symptom -> disease weight matrix (duplicate pairs summed).
+        """
+        if self._matrix is None:
+            matrix = sparse.csr_matrix((self.weights, self.disease_ids, self.indptr),
+                                       shape=(len(self.symptoms), len(self.diseases)), copy=True)
+            matrix.sum_duplicates()
+            self._matrix = matrix
+        return self._matrix
+
+    def encode(self, symptom_lists: Sequence[List[str]]) -> sparse.csr_matrix:
+        """
+        Encodes N symptom lists as an N x S sparse count matrix (unknown symptoms dropped).
+        """
+        lookup = self.symptom_ids
+        indptr = np.zeros(len(symptom_lists) + 1, dtype=np.int64)
+        columns = []
+        for i, symptoms in enumerate(symptom_lists):
+            for symptom in symptoms:
+                r = lookup.get(symptom.lower())
+                if r is not None:
+                    columns.append(r)
+            indptr[i + 1] = len(columns)
+        columns = np.asarray(columns, dtype=np.int64)
+        return sparse.csr_matrix((np.ones(len(columns)), columns, indptr),
+                                 shape=(len(symptom_lists), len(self.symptoms)))
+
+    def score_batch(self, symptom_lists: Sequence[List[str]]) -> sparse.csr_matrix:
+        """
+        Scores N symptom lists at once: (N x S indicator) @ (S x D weights), then each
+        row divided by its max. Returns an N x D sparse matrix; rows with no match are empty.
+        """
+        scores = (self.encode(symptom_lists) @ self.matrix).tocsr()
+        scores.sort_indices()
+        nnz_per_row = np.diff(scores.indptr)
+        row_max = np.zeros(scores.shape[0])
+        nonempty = nnz_per_row > 0
+        row_max[nonempty] = np.maximum.reduceat(scores.data, scores.indptr[:-1][nonempty])
+        row_max[row_max == 0] = np.inf  # all-zero rows stay zero instead of dividing by zero
+        scores.data = scores.data / np.repeat(row_max, nnz_per_row)
+        return scores
+
+    def score(self, symptoms: List[str]) -> Dict[Any, float]:
+        """
+        Sums weights per disease over all matched rows and normalizes by the max score.
+        """
+        rows = [r for r in (self.row(s) for s in symptoms) if r is not None]
+        if not rows:
+            return {}
+        slices = [slice(self.indptr[r], self.indptr[r + 1]) for r in rows]
+        ids = np.concatenate([self.disease_ids[s] for s in slices])
+        if ids.size == 0:
+            return {}
+        weights = np.concatenate([self.weights[s] for s in slices])
+        totals = np.bincount(ids, weights=weights, minlength=len(self.diseases))
+        # Diseases in order of first occurrence, as the row-by-row scan produced them
+        _, first_seen = np.unique(ids, return_index=True)
+        hit = ids[np.sort(first_seen)]
+        max_score = totals[hit].max()
+        if max_score == 0:
+            raise ZeroDivisionError("float division by zero")
+        normalized = totals[hit] / max_score
+        return {self.diseases[d]: float(v) for d, v in zip(hit.tolist(), normalized.tolist())}
+
 
 class SymptomMapping:
     """
     Loads and queries symptom-to-disease mappings.
+
+    If a compiled artifact (see app/core/mapping_artifact.py) exists it is
+    memory-mapped instead of parsing the CSV, and a watcher thread swaps in new
+    artifact versions without blocking in-flight lookups. Indexes derived from
+    the vocabulary (matcher, normalizer) subscribe with `add_listener` to be
+    rebuilt on every new version.
     """
-    def __init__(self, mapping_csv: str = MAPPING_CSV_PATH):
-        if not os.path.exists(mapping_csv):
-            logging.error(f"Mapping file not found: {mapping_csv}")
-            raise FileNotFoundError(f"Mapping file not found: {mapping_csv}")
-        self.df = pd.read_csv(mapping_csv)
-        logging.info(f"Loaded symptom mapping from {mapping_csv}")
+    def __init__(self, mapping_csv: str = MAPPING_CSV_PATH, artifact_path: Optional[str] = MAPPING_ARTIFACT_PATH,
+                 watch_interval: float = MAPPING_WATCH_INTERVAL_SECONDS):
+        self.df = None
+        self.artifact_path = artifact_path if artifact_path and os.path.exists(artifact_path) else None
+        self.version = None
+        self.reloads = 0
+        self._watcher = None
+        self._listeners: List[Callable[["SymptomMapping"], Any]] = []
+        self.watch_interval = watch_interval
+        if self.artifact_path:
+            self.index, header = load_artifact(self.artifact_path)
+            self.version = header["version"]
+            self._artifact_stat = self._stat()
+            logging.info(f"Loaded compiled symptom mapping {self.artifact_path} (version {self.version}, "
+                         f"{len(self.index)} symptoms, {len(self.index.diseases)} diseases)")
+            self.start_watcher()
+        else:
+            if not os.path.exists(mapping_csv):
+                logging.error(f"Mapping file not found: {mapping_csv}")
+                raise FileNotFoundError(f"Mapping file not found: {mapping_csv}")
+            self.df = pd.read_csv(mapping_csv)
+            self.index = MappingIndex.from_frame(self.df)
+            logging.info(f"Loaded symptom mapping from {mapping_csv} ({len(self.index)} symptoms, "
+                         f"{len(self.index.diseases)} diseases)")
+        metrics_registry.register("symptom_mapping", self.stats)
+
+    def start_watcher(self):
+        """
+        Starts the artifact watcher if hot reload is enabled and it is not running
+        (e.g. again in a forked worker, where the parent's thread does not exist).
+        """
+        if not self.artifact_path or not self.watch_interval or self.watch_interval <= 0:
+            return
+        if self._watcher is None or not self._watcher.is_alive():
+            self._watcher = MappingWatcher(self, self.watch_interval)
+            self._watcher.start()
+
+    def add_listener(self, listener: Callable[["SymptomMapping"], Any]):
+        """
+        Registers a callback run with this mapping (on the watcher thread) after
+        every hot reload to a new version.
+        """
+        self._listeners.append(listener)
+
+    def stop_watcher(self, timeout: Optional[float] = None):
+        """
+        Stops the artifact watcher (e.g. in a pre-fork master before forking); `start_watcher` restarts it.
+        """
+        watcher, self._watcher = self._watcher, None
+        if watcher is not None:
+            watcher.stop(timeout)
+
+    def _stat(self):
+        st = os.stat(self.artifact_path)
+        return st.st_ino, st.st_mtime_ns, st.st_size
+
+    def reload_if_changed(self) -> bool:
+        """
+        Swaps in the artifact on disk if it was replaced by a new version.
+        The swap is a single reference assignment: calls already running keep
+        the index they started with.
+        """
+        if not self.artifact_path:
+            return False
+        stat = self._stat()
+        if stat == self._artifact_stat:
+            return False
+        index, header = load_artifact(self.artifact_path)
+        self._artifact_stat = stat
+        if header["version"] == self.version:
+            return False
+        self.index = index
+        previous, self.version = self.version, header["version"]
+        self.reloads += 1
+        logging.info(f"Hot-reloaded symptom mapping {self.artifact_path}: {previous} -> {self.version}")
+        for listener in self._listeners:
+            try:
+                listener(self)
+            except Exception as e:
+                logging.error(f"Symptom mapping reload listener failed: {e}")
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "source": self.artifact_path or "csv",
+            "version": self.version,
+            "symptoms": len(self.index),
+            "diseases": len(self.index.diseases),
+            "reloads": self.reloads,
+        }
+
+    def vocabulary(self) -> List[str]:
+        """
+        Returns the unique, lower-cased symptom names of the mapping table.
+        """
+        return sorted(self.index.symptoms)
 
     def map_symptoms(self, symptoms: List[str]) -> Dict[str, float]:
         """
-        Maps symptoms to likely disease classes using the loaded CSV mapping.
+        Maps symptoms to likely disease classes using the precomputed symptom index.
         """
         try:
-            if not hasattr(self, 'df') or self.df is None:
-                logging.error("Mapping DataFrame not loaded.")
+            index = self.index  # single read: a concurrent hot reload cannot mix versions
+            if index is None:
+                logging.error("Mapping index not loaded.")
                 return {}
-            # Assume CSV has columns: 'symptom', 'disease', 'weight' (optional)
-            scores = {}
-            for symptom in symptoms:
-                matches = self.df[self.df['symptom'].str.lower() == symptom.lower()]
-                for _, row in matches.iterrows():
-                    disease = row['disease']
-                    weight = row['weight'] if 'weight' in row and not pd.isnull(row['weight']) else 1.0
-                    scores[disease] = scores.get(disease, 0) + float(weight)
-            # Normalize scores to [0,1]
-            if scores:
-                max_score = max(scores.values())
-                for k in scores:
-                    scores[k] = scores[k] / max_score
+            scores = index.score(symptoms)
             logging.info(f"Mapped symptoms to disease scores (CSV): {scores}")
             return scores
         except Exception as e:
             logging.error(f"Mapping error: {e}")
             return {}
 
-# TODO: Add unit tests and error handling 
\ No newline at end of file
+    def map_symptoms_batch(self, symptom_lists: Sequence[List[str]],
+                           output: str = "dict") -> Union[List[Dict[str, float]], np.ndarray, sparse.csr_matrix]:
+        """
+        Vectorized map_symptoms over many symptom lists (offline re-scoring).
+        Args:
+            symptom_lists: N lists of symptoms.
+            output: "dict" (one score dict per list), "dense" (N x D ndarray) or
+                "sparse" (N x D CSR matrix). Matrix columns follow `disease_names()`.
+        Returns:
+            Scores normalized per row to [0,1], equal to map_symptoms up to
+            floating-point summation order (diseases whose summed weight is exactly
+            zero are left out of the sparse result).
+        """
+        if output not in BATCH_OUTPUTS:
+            raise ValueError(f"Unknown output '{output}', expected one of {BATCH_OUTPUTS}")
+        index = self.index
+        scores = index.score_batch(symptom_lists)
+        logging.info(f"Mapped {scores.shape[0]} symptom lists to disease scores (batch)")
+        if output == "sparse":
+            return scores
+        if output == "dense":
+            return scores.toarray()
+        diseases = index.diseases
+        return [
+            {diseases[d]: v for d, v in zip(scores.indices[start:end].tolist(), scores.data[start:end].tolist())}
+            for start, end in zip(scores.indptr[:-1], scores.indptr[1:])
+        ]
+
+    def disease_names(self) -> List[Any]:
+        """
+        Disease labels in column order of the batch score matrix.
+        """
+        return list(self.index.diseases)
+
+
+class MappingWatcher:
+    """
+    Polls the compiled mapping artifact and hot-reloads new versions.
+    """
+    def __init__(self, mapping: SymptomMapping, interval: float = MAPPING_WATCH_INTERVAL_SECONDS):
+        self.mapping = mapping
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="mapping-watcher", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        """
+        Stops polling and waits for a reload in progress to finish.
+        """
+        self._stop.set()
+        if self._thread.is_alive() and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+
+    def is_alive(self) -> bool:
+        return self._thread.is_alive()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.mapping.reload_if_changed()
+            except Exception as e:
+                logging.error(f"Symptom mapping reload failed: {e}")
+
+# TODO: Add unit tests and error handling
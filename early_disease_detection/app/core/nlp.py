@@ -5,37 +5,128 @@ Symptom NLP module using Hugging Face Transformers (BERT/RoBERTa).
 from transformers import pipeline, AutoTokenizer, AutoModelForTokenClassification
 from typing import List, Dict
 import logging
+import os
+
+from app.core.batching import MicroBatcher
+from app.core.onnx_backend import load_onnx_token_classifier
+from app.utils.cache import LRUCache, SQLiteCache
+from app.utils.metrics import metrics_registry
+from app.utils.text import normalize_text
 
 # TODO: Load model name from config/env
 MODEL_NAME = "emilyalsentzer/Bio_ClinicalBERT"
+NLP_BATCHING = os.getenv("NLP_BATCHING", "true").lower() in ("1", "true", "yes")
+NLP_BATCH_MAX_SIZE = int(os.getenv("NLP_BATCH_MAX_SIZE", "16"))
+NLP_BATCH_MAX_WAIT_MS = float(os.getenv("NLP_BATCH_MAX_WAIT_MS", "5"))
+# "torch" (default), "onnx" or "onnx-int8" (ONNX Runtime with dynamic int8 quantization)
+NLP_BACKEND = os.getenv("NLP_BACKEND", "torch").lower()
+NLP_BACKENDS = ("torch", "onnx", "onnx-int8")
+# Extraction result cache: "memory" (per worker), "sqlite" (shared on-disk) or "off"
+NLP_CACHE = os.getenv("NLP_CACHE", "memory").lower()
+NLP_CACHE_SIZE = int(os.getenv("NLP_CACHE_SIZE", "10000"))
+NLP_CACHE_TTL_SECONDS = float(os.getenv("NLP_CACHE_TTL_SECONDS", "3600"))
+NLP_CACHE_PATH = os.getenv("NLP_CACHE_PATH", "cache/nlp_cache.sqlite")
+NLP_MODEL_VERSION = os.getenv("NLP_MODEL_VERSION")
+
+SYMPTOM_LABELS = ["problem", "symptom", "disease", "condition"]
+
+def build_cache(kind: str = NLP_CACHE, maxsize: int = NLP_CACHE_SIZE, ttl_seconds: float = NLP_CACHE_TTL_SECONDS,
+                path: str = NLP_CACHE_PATH):
+    """
+    Builds the extraction cache backend selected by NLP_CACHE (None when disabled).
+    """
+    if kind in ("", "off", "none", "false", "0"):
+        return None
+    if kind == "memory":
+        return LRUCache(maxsize=maxsize, ttl_seconds=ttl_seconds)
+    if kind == "sqlite":
+        return SQLiteCache(path, maxsize=maxsize, ttl_seconds=ttl_seconds)
+    raise ValueError(f"Unknown NLP cache backend '{kind}', expected memory, sqlite or off")
 
 class SymptomNLP:
     """
     NLP engine for parsing free-text symptoms using Bio_ClinicalBERT.
     """
-    def __init__(self, model_name: str = MODEL_NAME):
+    def __init__(self, model_name: str = MODEL_NAME, batching: bool = NLP_BATCHING,
+                 max_batch_size: int = NLP_BATCH_MAX_SIZE, max_wait_ms: float = NLP_BATCH_MAX_WAIT_MS,
+                 backend: str = NLP_BACKEND, cache=NLP_CACHE):
+        if backend not in NLP_BACKENDS:
+            raise ValueError(f"Unknown NLP backend '{backend}', expected one of {NLP_BACKENDS}")
+        self.model_name = model_name
+        self.backend = backend
         self.tokenizer = AutoTokenizer.from_pretrained(model_name)
-        self.model = AutoModelForTokenClassification.from_pretrained(model_name)
+        if backend == "torch":
+            self.model = AutoModelForTokenClassification.from_pretrained(model_name)
+        else:
+            self.model = load_onnx_token_classifier(model_name, quantize=(backend == "onnx-int8"))
         self.ner_pipeline = pipeline("ner", model=self.model, tokenizer=self.tokenizer, aggregation_strategy="simple")
-        logging.info(f"Loaded Bio_ClinicalBERT NER model: {model_name}")
+        logging.info(f"Loaded Bio_ClinicalBERT NER model: {model_name} (backend={backend})")
+        # Concurrent requests share one padded forward pass instead of one pass each
+        self.batcher = None
+        if batching:
+            self.batcher = MicroBatcher(self._run_ner_batch, max_batch_size=max_batch_size,
+                                        max_wait_ms=max_wait_ms, name="nlp_ner")
+            metrics_registry.register("nlp_ner_batcher", self.batcher.stats)
+        # Results are cached per normalized text; the key carries the model name/version
+        self.model_version = NLP_MODEL_VERSION or getattr(self.model.config, "_commit_hash", None) or "unversioned"
+        self.cache = build_cache(cache) if isinstance(cache, str) else cache
+        if self.cache is not None:
+            metrics_registry.register("nlp_cache", self.cache.stats)
+
+    @staticmethod
+    def _entities_to_symptoms(entities: List[Dict]) -> List[str]:
+        # Extract unique entities labeled as symptoms/medical problems
+        symptoms = set()
+        for ent in entities:
+            # Bio_ClinicalBERT may use labels like 'PROBLEM', 'SYMPTOM', etc.
+            if ent.get("entity_group", "").lower() in SYMPTOM_LABELS:
+                symptoms.add(ent["word"].lower())
+        return list(symptoms)
+
+    def _cache_key(self, text: str) -> str:
+        return f"{self.model_name}@{self.model_version}/{self.backend}:{normalize_text(text)}"
 
     def extract_symptoms(self, text: str) -> List[str]:
         """
         Extracts symptoms/medical entities from free-text input using Bio_ClinicalBERT NER.
         """
+        key = None
+        if self.cache is not None:
+            key = self._cache_key(text)
+            cached = self.cache.get(key)
+            if cached is not None:
+                return list(cached)
         try:
-            entities = self.ner_pipeline(text)
-            # Extract unique entities labeled as symptoms/medical problems
-            symptoms = set()
-            for ent in entities:
-                # Bio_ClinicalBERT may use labels like 'PROBLEM', 'SYMPTOM', etc.
-                if ent.get("entity_group", "").lower() in ["problem", "symptom", "disease", "condition"]:
-                    symptoms.add(ent["word"].lower())
+            if self.batcher is not None:
+                symptoms = self.batcher.submit(text)
+            else:
+                symptoms = self._entities_to_symptoms(self.ner_pipeline(text))
             logging.info(f"Extracted symptoms/entities: {symptoms}")
-            return list(symptoms)
         except Exception as e:
             logging.error(f"NLP extraction error: {e}")
             return []
+        if key is not None:
+            self.cache.set(key, symptoms)
+        return symptoms
+
+    def _run_ner_batch(self, texts: List[str]) -> List[List[str]]:
+        entities = self.ner_pipeline(texts, batch_size=len(texts))
+        return [self._entities_to_symptoms(ents) for ents in entities]
+
+    def extract_symptoms_batch(self, texts: List[str]) -> List[List[str]]:
+        """
+        Extracts symptoms for several texts with a single padded forward pass.
+        """
+        texts = list(texts)
+        if not texts:
+            return []
+        try:
+            results = self._run_ner_batch(texts)
+            logging.info(f"Extracted symptoms/entities for batch of {len(texts)}: {results}")
+            return results
+        except Exception as e:
+            logging.error(f"NLP batch extraction error: {e}")
+            return [[] for _ in texts]
 
     def get_embedding(self, text: str):
         """
@@ -43,4 +134,4 @@ class SymptomNLP:
         """
         return self.nlp(text)
 
-# TODO: Add unit tests and error handling 
\ No newline at end of file
+# TODO: Add unit tests and error handling
@@ -0,0 +1,85 @@
+"""
+ONNX Runtime CPU backend for the clinical NER model (optional int8 dynamic quantization).
+"""
+import logging
+import os
+import re
+from typing import Any, Dict, List
+
+ONNX_CACHE_DIR = os.getenv("NLP_ONNX_DIR", "models/onnx")
+ONNX_FILE_NAME = "model.onnx"
+QUANTIZED_FILE_NAME = "model_quantized.onnx"
+
+
+def onnx_model_dir(model_name: str, cache_dir: str = ONNX_CACHE_DIR) -> str:
+    """
+    Returns the local export directory for a Hugging Face model name.
+    """
+    return os.path.join(cache_dir, re.sub(r"[^A-Za-z0-9_.-]+", "__", model_name))
+
+
+def export_onnx(model_name: str, output_dir: str = None, quantize: bool = False) -> str:
+    """
+    Exports a token-classification model to ONNX (and an int8 copy if `quantize`).
+    Returns the path of the ONNX file to serve.
+    """
+    try:
+        from optimum.onnxruntime import ORTModelForTokenClassification
+    except ImportError as e:
+        raise ImportError("ONNX backend requires `optimum[onnxruntime]` (pip install optimum[onnxruntime])") from e
+    output_dir = output_dir or onnx_model_dir(model_name)
+    onnx_path = os.path.join(output_dir, ONNX_FILE_NAME)
+    if not os.path.exists(onnx_path):
+        os.makedirs(output_dir, exist_ok=True)
+        ort_model = ORTModelForTokenClassification.from_pretrained(model_name, export=True)
+        ort_model.save_pretrained(output_dir)
+        logging.info(f"Exported {model_name} to ONNX: {onnx_path}")
+    if not quantize:
+        return onnx_path
+    quantized_path = os.path.join(output_dir, QUANTIZED_FILE_NAME)
+    if not os.path.exists(quantized_path):
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        quantize_dynamic(onnx_path, quantized_path, weight_type=QuantType.QInt8)
+        logging.info(f"Wrote int8 dynamically quantized model: {quantized_path}")
+    return quantized_path
+
+
+def load_onnx_token_classifier(model_name: str, quantize: bool = False, output_dir: str = None):
+    """
+    Loads (exporting on first use) an ONNX Runtime token-classification model that
+    plugs into the Hugging Face `pipeline("ner", ...)` like the PyTorch model does.
+    """
+    from optimum.onnxruntime import ORTModelForTokenClassification
+    onnx_path = export_onnx(model_name, output_dir=output_dir, quantize=quantize)
+    model = ORTModelForTokenClassification.from_pretrained(
+        os.path.dirname(onnx_path), file_name=os.path.basename(onnx_path), provider="CPUExecutionProvider"
+    )
+    logging.info(f"Loaded ONNX Runtime NER model: {onnx_path}")
+    return model
+
+
+def entity_parity(reference: List[List[str]], candidate: List[List[str]]) -> Dict[str, Any]:
+    """
+    Compares `extract_symptoms` outputs of two backends text by text.
+    Returns the exact-match rate, mean Jaccard overlap and the mismatching indices.
+    """
+    if len(reference) != len(candidate):
+        raise ValueError("reference and candidate must have the same number of texts")
+    matches = 0
+    jaccard_total = 0.0
+    mismatches = []
+    for i, (ref, cand) in enumerate(zip(reference, candidate)):
+        ref_set, cand_set = set(ref), set(cand)
+        union = ref_set | cand_set
+        jaccard_total += len(ref_set & cand_set) / len(union) if union else 1.0
+        if ref_set == cand_set:
+            matches += 1
+        else:
+            mismatches.append({"index": i, "reference": sorted(ref_set), "candidate": sorted(cand_set)})
+    n = len(reference)
+    return {
+        "texts": n,
+        "exact_match_rate": matches / n if n else 1.0,
+        "mean_jaccard": jaccard_total / n if n else 1.0,
+        "mismatches": mismatches,
+    }
@@ -0,0 +1,200 @@
+"""
+Parallel SHAP: rows split into chunks, explained across a process pool and
+stitched back in order. Shared by /explain, the async explanation jobs and
+the training pipeline's explainability step.
+"""
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.core.budgeted_shap import explain_within_budget
+
+SHAP_WORKERS = int(os.getenv("SHAP_WORKERS", str(min(4, os.cpu_count() or 1))))
+SHAP_CHUNK_ROWS = int(os.getenv("SHAP_CHUNK_ROWS", "256"))
+# Smaller requests are explained in-process: pool round-trips would cost more than they save
+SHAP_PARALLEL_MIN_ROWS = int(os.getenv("SHAP_PARALLEL_MIN_ROWS", "512"))
+# "spawn" keeps the pool independent of the API's threads; "fork" starts faster
+SHAP_START_METHOD = os.getenv("SHAP_START_METHOD", "spawn")
+
+
+# --- Pool worker side: the explainer is sent once per process, not per chunk ---
+_worker_explainer = None
+
+
+def _init_worker(explainer: Any):
+    global _worker_explainer
+    _worker_explainer = explainer
+
+
+def explain_chunk(X: Any, budget_ms: Optional[float] = None):
+    """
+    SHAP values of one chunk with the process's explainer: plain shap_values()
+    when `budget_ms` is None, else latency-budgeted (app/core/budgeted_shap.py).
+    """
+    return _explain(_worker_explainer, X, budget_ms)
+
+
+def _explain(explainer: Any, X: Any, budget_ms: Optional[float]):
+    if budget_ms is None:
+        started = time.perf_counter()
+        values = explainer.shap_values(X)
+        return values, {"method": type(explainer).__name__, "nsamples": None,
+                        "elapsed_ms": (time.perf_counter() - started) * 1000.0,
+                        "budget_ms": None, "complete": True, "relative_change": None}
+    return explain_within_budget(explainer, X, budget_ms)
+
+
+def _rows(X: Any, start: int, stop: int) -> Any:
+    return X.iloc[start:stop] if hasattr(X, "iloc") else X[start:stop]
+
+
+def stitch(chunks: List[Any]) -> Any:
+    """
+    Concatenates per-chunk SHAP values along the row axis (per class for list outputs).
+    """
+    if isinstance(chunks[0], list):
+        return [np.concatenate([chunk[i] for chunk in chunks], axis=0) for i in range(len(chunks[0]))]
+    return np.concatenate([np.asarray(chunk) for chunk in chunks], axis=0)
+
+
+def merge_quality(qualities: List[Dict[str, Any]], elapsed_ms: float, budget_ms: Optional[float]) -> Dict[str, Any]:
+    """
+    One quality dict for a chunked explanation: the weakest chunk's sample count
+    and convergence, the wall-clock time of the whole request.
+    """
+    samples = [q["nsamples"] for q in qualities if q["nsamples"] is not None]
+    changes = [q["relative_change"] for q in qualities if q["relative_change"] is not None]
+    return {"method": qualities[0]["method"], "nsamples": min(samples) if samples else None,
+            "elapsed_ms": elapsed_ms, "budget_ms": budget_ms, "complete": all(q["complete"] for q in qualities),
+            "relative_change": max(changes) if changes else None, "chunks": len(qualities)}
+
+
+def as_float32(values: Any) -> Any:
+    if isinstance(values, list):
+        return [np.asarray(v, dtype=np.float32) for v in values]
+    return np.asarray(values, dtype=np.float32)
+
+
+def to_json_values(values: Any) -> Any:
+    """
+    Nested lists for a JSON response. float32 arrays are written with their
+    shortest float32 representation (about half the digits of float64).
+    """
+    if isinstance(values, list):
+        return [to_json_values(v) for v in values]
+    values = np.asarray(values)
+    if values.dtype == np.float32:
+        return values.astype(str).astype(np.float64).tolist()
+    return values.tolist()
+
+
+def parallel_shap_values(explainer: Any, X: Any, workers: int = SHAP_WORKERS, chunk_rows: int = SHAP_CHUNK_ROWS,
+                         executor: Optional[ProcessPoolExecutor] = None, budget_ms: Optional[float] = None,
+                         start_method: str = SHAP_START_METHOD) -> Tuple[Any, Dict[str, Any]]:
+    """
+    Returns (shap_values, quality) for all rows of X, computed in chunks of
+    `chunk_rows` across a process pool and stitched back in row order. Exact
+    explainers (Tree, ...) give the same values as one shap_values(X) call.
+
+    `executor` must have been started with this explainer (see ShapPool);
+    without one a temporary pool is created. A `budget_ms` is split so the
+    whole request, not each chunk, stays within it.
+    """
+    started = time.perf_counter()
+    n_rows = len(X)
+    starts = list(range(0, n_rows, chunk_rows)) or [0]
+    if workers <= 1 or len(starts) == 1:
+        values, quality = _explain(explainer, X, budget_ms)
+        return values, merge_quality([quality], (time.perf_counter() - started) * 1000.0, budget_ms)
+    chunk_budget_ms = None if budget_ms is None else budget_ms * min(workers, len(starts)) / len(starts)
+    own_executor = executor is None
+    if own_executor:
+        executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(start_method),
+                                       initializer=_init_worker, initargs=(explainer,))
+    try:
+        futures = [executor.submit(explain_chunk, _rows(X, start, start + chunk_rows), chunk_budget_ms)
+                   for start in starts]
+        results = [future.result() for future in futures]
+    finally:
+        if own_executor:
+            executor.shutdown()
+    values = stitch([values for values, _ in results])
+    return values, merge_quality([quality for _, quality in results], (time.perf_counter() - started) * 1000.0,
+                                 budget_ms)
+
+
+class ShapPool:
+    """
+    Long-lived SHAP process pool holding one explainer (sent once per worker
+    process). It is rebuilt when the model version changes; chunks already
+    submitted to the old pool still finish.
+    """
+    def __init__(self, workers: int = SHAP_WORKERS, chunk_rows: int = SHAP_CHUNK_ROWS,
+                 min_rows: int = SHAP_PARALLEL_MIN_ROWS, start_method: str = SHAP_START_METHOD):
+        self.workers = workers
+        self.chunk_rows = chunk_rows
+        self.min_rows = min_rows
+        self.start_method = start_method
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._version: Optional[str] = None
+        self._lock = threading.Lock()
+        self._rebuilds = 0
+        self._parallel_requests = 0
+        self._inline_requests = 0
+
+    def executor(self, explainer: Any, version: str) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None or self._version != version:
+                if self._pool is not None:
+                    self._pool.shutdown(wait=False)
+                self._pool = ProcessPoolExecutor(max_workers=self.workers,
+                                                 mp_context=multiprocessing.get_context(self.start_method),
+                                                 initializer=_init_worker, initargs=(explainer,))
+                self._version = version
+                self._rebuilds += 1
+            return self._pool
+
+    def reset(self):
+        """
+        Drops a broken pool; the next call builds a new one.
+        """
+        with self._lock:
+            pool, self._pool, self._version = self._pool, None, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def stop(self):
+        self.reset()
+
+    def shap_values(self, explainer: Any, version: str, X: Any,
+                    budget_ms: Optional[float] = None) -> Tuple[Any, Dict[str, Any]]:
+        """
+        Like parallel_shap_values; requests under `min_rows` rows run in-process.
+        """
+        if len(X) < self.min_rows or self.workers <= 1:
+            with self._lock:
+                self._inline_requests += 1
+            return parallel_shap_values(explainer, X, workers=1, budget_ms=budget_ms)
+        with self._lock:
+            self._parallel_requests += 1
+        try:
+            return parallel_shap_values(explainer, X, self.workers, self.chunk_rows,
+                                        executor=self.executor(explainer, version), budget_ms=budget_ms)
+        except BrokenProcessPool:
+            self.reset()
+            raise
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"workers": self.workers, "chunk_rows": self.chunk_rows, "min_rows": self.min_rows,
+                    "version": self._version, "rebuilds": self._rebuilds,
+                    "parallel_requests": self._parallel_requests, "inline_requests": self._inline_requests}
+
+
+shap_pool = ShapPool()
@@ -0,0 +1,203 @@
+"""
+SHAP plot rendering: waterfall (one prediction) and summary (a batch) PNGs,
+rendered with the headless Agg backend in a separate process pool and cached
+by model version plus input hash.
+"""
+import base64
+import io
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from app.core.prediction_cache import row_key
+from app.utils.cache import LRUCache
+from app.utils.metrics import Histogram
+
+PLOT_RENDERING = os.getenv("PLOT_RENDERING", "true").lower() in ("1", "true", "yes")
+PLOT_RENDER_WORKERS = int(os.getenv("PLOT_RENDER_WORKERS", "1"))
+# Requests get no plot (plot_base64=None) rather than wait longer than this
+PLOT_RENDER_TIMEOUT_SECONDS = float(os.getenv("PLOT_RENDER_TIMEOUT_SECONDS", "10"))
+PLOT_CACHE_SIZE = int(os.getenv("PLOT_CACHE_SIZE", "1000"))
+PLOT_CACHE_TTL_SECONDS = float(os.getenv("PLOT_CACHE_TTL_SECONDS", "3600"))
+# Features shown before the rest are collapsed into "other features"
+PLOT_MAX_DISPLAY = int(os.getenv("PLOT_MAX_DISPLAY", "10"))
+PLOT_RENDER_START_METHOD = os.getenv("PLOT_RENDER_START_METHOD", "spawn")
+
+RENDER_MS_BUCKETS = [10, 25, 50, 100, 250, 500, 1000, 2500]
+
+
+def select_class(values: Any, base_values: Any, class_index: int = -1):
+    """
+    SHAP values and base value for one output: multi-output explainers return
+    a list per class or a trailing class axis; binary models default to the
+    positive (last) class.
+    """
+    base_values = np.atleast_1d(np.asarray(base_values, dtype=float))
+    if isinstance(values, list):
+        return np.asarray(values[class_index], dtype=float), float(base_values[class_index])
+    values = np.asarray(values, dtype=float)
+    if values.ndim == 3:
+        return values[..., class_index], float(base_values[class_index])
+    return values, float(base_values[0]) if len(base_values) else 0.0
+
+
+def _figure_png(fig) -> bytes:
+    import matplotlib.pyplot as plt
+    buffer = io.BytesIO()
+    try:
+        fig.savefig(buffer, format="png", bbox_inches="tight", dpi=100)
+    finally:
+        plt.close(fig)
+    return buffer.getvalue()
+
+
+def render_waterfall_png(values: np.ndarray, base_value: float, data: Optional[np.ndarray] = None,
+                         feature_names: Optional[Sequence[str]] = None, max_display: int = PLOT_MAX_DISPLAY) -> bytes:
+    """
+    Waterfall plot of one row's SHAP values (1-D) as PNG bytes.
+    """
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    import shap
+    explanation = shap.Explanation(values=np.asarray(values, dtype=float), base_values=base_value,
+                                   data=None if data is None else np.asarray(data),
+                                   feature_names=list(feature_names) if feature_names else None)
+    shap.plots.waterfall(explanation, max_display=max_display, show=False)
+    return _figure_png(plt.gcf())
+
+
+def render_summary_png(values: np.ndarray, data: Optional[np.ndarray] = None,
+                       feature_names: Optional[Sequence[str]] = None, max_display: int = PLOT_MAX_DISPLAY) -> bytes:
+    """
+    Summary (beeswarm) plot of a batch's SHAP values (rows x features) as PNG bytes.
+    """
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    import shap
+    shap.summary_plot(np.asarray(values, dtype=float), features=data,
+                      feature_names=list(feature_names) if feature_names else None,
+                      max_display=max_display, show=False)
+    return _figure_png(plt.gcf())
+
+
+# --- Pool worker side ---
+def _init_worker():
+    os.environ["MPLBACKEND"] = "Agg"
+    import matplotlib
+    matplotlib.use("Agg")
+
+
+def _render(kind: str, kwargs: Dict[str, Any]) -> str:
+    png = render_waterfall_png(**kwargs) if kind == "waterfall" else render_summary_png(**kwargs)
+    return base64.b64encode(png).decode("ascii")
+
+
+class PlotRenderer:
+    """
+    Renders plots in a process pool (matplotlib is slow and holds the GIL, so
+    it never runs on an API thread) and returns base64 PNGs. The calling
+    request thread only waits on the future. Results are cached per (model
+    version, plot kind, input hash); failures and timeouts return None.
+    """
+    def __init__(self, workers: int = PLOT_RENDER_WORKERS, timeout: float = PLOT_RENDER_TIMEOUT_SECONDS,
+                 cache_size: int = PLOT_CACHE_SIZE, cache_ttl_seconds: Optional[float] = PLOT_CACHE_TTL_SECONDS,
+                 max_display: int = PLOT_MAX_DISPLAY, start_method: str = PLOT_RENDER_START_METHOD):
+        self.workers = workers
+        self.timeout = timeout
+        self.max_display = max_display
+        self.start_method = start_method
+        self.cache = LRUCache(maxsize=cache_size, ttl_seconds=cache_ttl_seconds)
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._rendered = 0
+        self._errors = 0
+        self._timeouts = 0
+        self.render_ms_hist = Histogram(RENDER_MS_BUCKETS)
+
+    def _executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.workers,
+                                                 mp_context=multiprocessing.get_context(self.start_method),
+                                                 initializer=_init_worker)
+            return self._pool
+
+    def warmup(self):
+        """
+        Starts the pool and imports matplotlib/shap in it, so the first request does not pay for it.
+        """
+        self._executor().submit(_render, "waterfall", {"values": np.zeros(1), "base_value": 0.0}).result(
+            timeout=max(self.timeout, 60.0))
+
+    def stop(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def _get(self, key: Any, kind: str, kwargs: Dict[str, Any]) -> Optional[str]:
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        started = time.perf_counter()
+        try:
+            image = self._executor().submit(_render, kind, kwargs).result(timeout=self.timeout)
+        except FutureTimeoutError:
+            with self._lock:
+                self._timeouts += 1
+            logging.warning(f"SHAP {kind} plot not rendered within {self.timeout}s")
+            return None
+        except Exception as e:
+            with self._lock:
+                self._errors += 1
+                if isinstance(e, BrokenProcessPool):
+                    self._pool = None
+            logging.error(f"SHAP {kind} plot rendering failed: {e}")
+            return None
+        self.render_ms_hist.observe((time.perf_counter() - started) * 1000.0)
+        with self._lock:
+            self._rendered += 1
+        self.cache.set(key, image)
+        return image
+
+    def waterfall(self, version: Optional[str], values: Any, base_value: float, data: Any = None,
+                  feature_names: Optional[List[str]] = None) -> Optional[str]:
+        """
+        Base64 PNG waterfall for one row (1-D SHAP values for a single output).
+        """
+        data = None if data is None else np.asarray(data)
+        key = (version, "waterfall", self.max_display, tuple(feature_names or ()),
+               row_key(data) if data is not None else row_key(np.asarray(values, dtype=float)))
+        return self._get(key, "waterfall", {"values": np.asarray(values, dtype=float), "base_value": base_value,
+                                            "data": data, "feature_names": feature_names,
+                                            "max_display": self.max_display})
+
+    def summary(self, version: Optional[str], values: Any, data: Any = None,
+                feature_names: Optional[List[str]] = None) -> Optional[str]:
+        """
+        Base64 PNG summary plot for a batch (rows x features SHAP values for a single output).
+        """
+        data = None if data is None else np.asarray(data)
+        key = (version, "summary", self.max_display, tuple(feature_names or ()),
+               row_key(data) if data is not None else row_key(np.asarray(values, dtype=float)))
+        return self._get(key, "summary", {"values": np.asarray(values, dtype=float), "data": data,
+                                          "feature_names": feature_names, "max_display": self.max_display})
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            rendered, errors, timeouts = self._rendered, self._errors, self._timeouts
+        return {"cache": self.cache.stats(), "rendered": rendered, "errors": errors, "timeouts": timeouts,
+                "render_ms": self.render_ms_hist.snapshot()}
+
+
+plot_renderer = PlotRenderer() if PLOT_RENDERING else None
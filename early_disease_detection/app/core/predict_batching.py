@@ -0,0 +1,105 @@
+"""
+Server-side batching for /predict: concurrent requests are merged into one
+predict_proba pass and labels/confidences are scattered back per request.
+"""
+import logging
+import os
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.core.batching import MicroBatcher
+from app.utils.metrics import Histogram
+
+PREDICT_BATCHING = os.getenv("PREDICT_BATCHING", "true").lower() in ("1", "true", "yes")
+PREDICT_BATCH_MAX_SIZE = int(os.getenv("PREDICT_BATCH_MAX_SIZE", "32"))
+PREDICT_BATCH_MAX_WAIT_MS = float(os.getenv("PREDICT_BATCH_MAX_WAIT_MS", "2"))
+
+BATCH_ROWS_BUCKETS = [1, 4, 16, 64, 256, 1024, 4096]
+
+# (labels, positive-class confidences or None)
+Prediction = Tuple[List[Any], Optional[List[float]]]
+
+
+def labels_and_confidences(classes: Any, proba: Any) -> Prediction:
+    """
+    Argmax labels and positive-class confidences from a predict_proba matrix.
+    """
+    proba = np.asarray(proba)
+    labels = np.asarray(classes).take(np.argmax(proba, axis=1), axis=0)
+    confidences = proba[:, 1].tolist() if proba.shape[1] > 1 else proba[:, 0].tolist()
+    return labels.tolist(), confidences
+
+
+def predict_with_confidences(scorer: Any, X: np.ndarray) -> Prediction:
+    """
+    Labels and confidences from a single predict_proba pass (argmax over classes_),
+    instead of separate predict and predict_proba calls.
+    """
+    if not hasattr(scorer, "predict_proba"):
+        return scorer.predict(X).tolist(), None
+    return labels_and_confidences(scorer.classes_, scorer.predict_proba(X))
+
+
+class PredictBatcher:
+    """
+    Queues /predict feature matrices and scores all requests collected within
+    `max_wait_ms` (up to `max_batch_size` requests) with one model call.
+
+    `scorer_provider` is called once per batch, so a model swapped in between
+    batches is picked up without restarting the batcher. Requests are grouped by
+    feature width and dtype; if a group's merged call fails, its requests are
+    retried one by one so a malformed request only fails itself.
+    """
+    def __init__(self, scorer_provider: Callable[[], Any], max_batch_size: int = PREDICT_BATCH_MAX_SIZE,
+                 max_wait_ms: float = PREDICT_BATCH_MAX_WAIT_MS):
+        self.scorer_provider = scorer_provider
+        self.batch_rows_hist = Histogram(BATCH_ROWS_BUCKETS)
+        self.batcher = MicroBatcher(self._process_batch, max_batch_size=max_batch_size,
+                                    max_wait_ms=max_wait_ms, name="predict")
+
+    def _score_group(self, scorer: Any, matrices: List[np.ndarray]) -> List[Any]:
+        try:
+            labels, confidences = predict_with_confidences(scorer, np.concatenate(matrices, axis=0))
+        except Exception as e:
+            if len(matrices) == 1:
+                return [e]
+            logging.warning(f"Merged prediction failed ({e}); falling back to per-request prediction")
+            return [self._score_group(scorer, [X])[0] for X in matrices]
+        results, start = [], 0
+        for X in matrices:
+            end = start + len(X)
+            results.append((labels[start:end], confidences[start:end] if confidences is not None else None))
+            start = end
+        return results
+
+    def _process_batch(self, matrices: List[np.ndarray]) -> List[Any]:
+        scorer = self.scorer_provider()
+        self.batch_rows_hist.observe(sum(len(X) for X in matrices))
+        groups: Dict[Any, List[int]] = {}
+        for i, X in enumerate(matrices):
+            # Merging mixed dtypes would silently upcast (e.g. numbers to strings)
+            groups.setdefault((X.shape[1:], X.dtype.kind), []).append(i)
+        results: List[Any] = [None] * len(matrices)
+        for indices in groups.values():
+            for i, result in zip(indices, self._score_group(scorer, [matrices[i] for i in indices])):
+                results[i] = result
+        return results
+
+    def predict(self, X: Any, timeout: Optional[float] = None) -> Prediction:
+        """
+        Blocks until the batch containing X has been scored; re-raises this request's error.
+        """
+        X = np.asarray(X)
+        if X.ndim != 2 or len(X) == 0:
+            raise ValueError(f"Expected a non-empty 2-D feature matrix, got shape {X.shape}")
+        result = self.batcher.submit(X, timeout)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def stop(self):
+        self.batcher.stop()
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self.batcher.stats(), "batch_rows": self.batch_rows_hist.snapshot()}
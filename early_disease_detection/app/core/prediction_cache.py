@@ -0,0 +1,129 @@
+"""
+Prediction memoization: predict_proba results cached per (model version,
+canonical feature-row hash), so re-submitted rows skip the model.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+import numpy as np
+
+from app.utils.cache import LRUCache
+
+PREDICTION_CACHE = os.getenv("PREDICTION_CACHE", "true").lower() in ("1", "true", "yes")
+PREDICTION_CACHE_SIZE = int(os.getenv("PREDICTION_CACHE_SIZE", "50000"))
+PREDICTION_CACHE_TTL_SECONDS = float(os.getenv("PREDICTION_CACHE_TTL_SECONDS", "3600"))
+
+
+def row_key(row: np.ndarray) -> bytes:
+    """
+    Canonical hash of one feature row: numeric rows are hashed as float64 (so 1,
+    1.0 and -0.0/0.0 collide, as they do for the model); anything else via JSON.
+    """
+    row = np.asarray(row)
+    if row.dtype.kind in "biuf":
+        payload = (np.ascontiguousarray(row, dtype=np.float64) + 0.0).tobytes()
+    else:
+        payload = json.dumps(row.tolist(), default=str).encode("utf-8")
+    digest = hashlib.blake2b(payload, digest_size=16)
+    digest.update(str(row.shape).encode("ascii"))
+    return digest.digest()
+
+
+class PredictionCache:
+    """
+    Bounded LRU/TTL cache of predict_proba rows. Keys carry the model version,
+    so a promotion never serves stale probabilities, and `invalidate` (hooked
+    to model swaps) drops the previous version's entries at once. Batched
+    lookups are per row: only missing (and de-duplicated) rows go to the model.
+    """
+    def __init__(self, maxsize: int = PREDICTION_CACHE_SIZE, ttl_seconds: Optional[float] = PREDICTION_CACHE_TTL_SECONDS):
+        self.cache = LRUCache(maxsize=maxsize, ttl_seconds=ttl_seconds)
+        self._lock = threading.Lock()
+        self._version: Optional[str] = None
+        self._invalidations = 0
+        self._rows_saved = 0
+        # Running mean of model time per missed row, used to estimate latency saved by hits
+        self._row_cost_ms = 0.0
+        self._cost_samples = 0
+
+    def invalidate(self, version: Optional[str] = None):
+        with self._lock:
+            self._version = version
+            self._invalidations += 1
+        self.cache.clear()
+
+    def predict_proba(self, version: str, predict_proba: Callable[[np.ndarray], np.ndarray], X: Any) -> np.ndarray:
+        """
+        Returns predict_proba(X), computing only the rows not cached for `version`.
+        """
+        X = np.asarray(X)
+        keys = [(version, row_key(row)) for row in X]
+        cached = [self.cache.get(key) for key in keys]
+        missing: Dict[Any, list] = {}
+        for i, value in enumerate(cached):
+            if value is None:
+                missing.setdefault(keys[i], []).append(i)
+        if missing:
+            first_rows = [rows[0] for rows in missing.values()]
+            started = time.perf_counter()
+            computed = np.asarray(predict_proba(X[first_rows]))
+            elapsed_ms = (time.perf_counter() - started) * 1000.0
+            for (key, rows), proba in zip(missing.items(), computed):
+                # A row of `computed` is a view that would keep the whole batch's array alive
+                proba = proba.copy()
+                self.cache.set(key, proba)
+                for i in rows:
+                    cached[i] = proba
+            with self._lock:
+                self._cost_samples += 1
+                self._row_cost_ms += (elapsed_ms / len(first_rows) - self._row_cost_ms) / self._cost_samples
+        with self._lock:
+            self._rows_saved += len(X) - len(missing)
+        return np.vstack(cached) if cached else np.zeros((0, 0))
+
+    def wrap(self, scorer: Any, version: str) -> "CachedScorer":
+        return CachedScorer(scorer, version, self)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            rows_saved, row_cost_ms = self._rows_saved, self._row_cost_ms
+            version, invalidations = self._version, self._invalidations
+        return {
+            **self.cache.stats(),
+            "model_version": version,
+            "invalidations": invalidations,
+            "rows_saved": rows_saved,
+            "model_ms_per_row": row_cost_ms,
+            "estimated_saved_ms": rows_saved * row_cost_ms,
+        }
+
+
+class CachedScorer:
+    """
+    Scorer wrapper (predict_proba / predict / classes_) that goes through a PredictionCache.
+    """
+    def __init__(self, scorer: Any, version: str, cache: PredictionCache):
+        self.scorer = scorer
+        self.version = version
+        self.cache = cache
+
+    @property
+    def classes_(self) -> np.ndarray:
+        return self.scorer.classes_
+
+    @property
+    def n_features_in_(self) -> int:
+        return self.scorer.n_features_in_
+
+    def predict_proba(self, X: Any) -> np.ndarray:
+        return self.cache.predict_proba(self.version, self.scorer.predict_proba, X)
+
+    def predict(self, X: Any) -> np.ndarray:
+        return np.asarray(self.classes_).take(np.argmax(self.predict_proba(X), axis=1), axis=0)
+
+
+prediction_cache = PredictionCache() if PREDICTION_CACHE else None
@@ -2,22 +2,66 @@
 Predictor: Loads and runs real ML model for risk prediction.
 """
 import logging
-from typing import List, Any
+from typing import List, Any, Sequence, Tuple
 import numpy as np
-import mlflow
 import os
 
+from app.core.compiled_forest import PREDICTOR_COMPILED, compile_model
+from app.services.model_cache import load_model
+
 class Predictor:
-    def __init__(self, model_uri: str = None):
-        self.model = None
-        if model_uri is None:
-            model_uri = os.getenv("MODEL_URI", "models:/disease_predictor/Production")
-        try:
-            self.model = mlflow.sklearn.load_model(model_uri)
-            logging.info(f"Loaded model from MLflow: {model_uri}")
-        except Exception as e:
-            logging.error(f"Failed to load model: {e}")
-            raise
+    """
+    Risk predictor over either a fixed model (`model` / `model_uri`) or the
+    shared ModelRegistry, in which case every call uses the currently active
+    version and promotions are picked up without rebuilding the predictor.
+    """
+    def __init__(self, model_uri: str = None, model: Any = None, compiled: bool = PREDICTOR_COMPILED,
+                 registry: Any = None, cache: Any = None):
+        self.registry = registry
+        # Optional PredictionCache; only used with a registry, whose handles carry the model version
+        self.cache = cache
+        self._model = model
+        self._compiled = None
+        if registry is not None:
+            return
+        if model is None:
+            if model_uri is None:
+                model_uri = os.getenv("MODEL_URI", "models:/disease_predictor/Production")
+            try:
+                self._model = load_model(model_uri)
+                logging.info(f"Loaded model from MLflow: {model_uri}")
+            except Exception as e:
+                logging.error(f"Failed to load model: {e}")
+                raise
+        # Optional flat-array evaluator for forests; same probabilities, less per-call overhead
+        self._compiled = compile_model(self._model) if compiled else None
+
+    @property
+    def model(self) -> Any:
+        return self.registry.current().model if self.registry is not None else self._model
+
+    @property
+    def compiled(self) -> Any:
+        return self.registry.current().compiled if self.registry is not None else self._compiled
+
+    def _resolve(self, handle: Any = None) -> Tuple[Any, Any]:
+        """
+        (scorer, model) for one call. With a registry both come from a single
+        handle (`handle`, or the current one), so a concurrent swap cannot mix
+        model versions within a call.
+        """
+        if self.registry is not None:
+            if handle is None:
+                handle = self.registry.current()
+            scorer = handle.scorer
+            if self.cache is not None and hasattr(scorer, "predict_proba"):
+                scorer = self.cache.wrap(scorer, handle.version)
+            return scorer, handle.model
+        return (self._compiled if self._compiled is not None else self._model), self._model
+
+    @property
+    def scorer(self) -> Any:
+        return self._resolve()[0]
 
     def predict_proba(self, features: List[Any]) -> List[float]:
         """
@@ -27,16 +71,49 @@ class Predictor:
         Returns:
             List[float]: Probabilities for each class.
         """
+        return self._predict_row(*self._resolve(), features)
+
+    def _predict_row(self, scorer: Any, model: Any, features: List[Any]) -> List[float]:
         try:
             X = np.array([features])
-            if hasattr(self.model, "predict_proba"):
-                probs = self.model.predict_proba(X)[0]
+            if hasattr(scorer, "predict_proba"):
+                probs = scorer.predict_proba(X)[0]
                 logging.info(f"Predicted probabilities: {probs}")
                 return probs.tolist()
             else:
                 # Fallback: use predict and return as [1-p, p]
-                pred = self.model.predict(X)[0]
+                pred = model.predict(X)[0]
                 return [1 - pred, pred]
         except Exception as e:
             logging.error(f"Prediction error: {e}")
-            return [0.0, 0.0] 
\ No newline at end of file
+            return [0.0, 0.0]
+
+    def predict_proba_batch(self, features: Sequence[Sequence[Any]], handle: Any = None) -> List[List[float]]:
+        """
+        Predicts risk probabilities for many samples with a single model call.
+        Args:
+            features (Sequence[Sequence[Any]]): 2-D feature matrix, one row per sample.
+            handle (ModelHandle, optional): Registry handle to score with, so the caller
+                can attribute the result to its version; defaults to the current one.
+        Returns:
+            List[List[float]]: Probabilities for each class, one list per row.
+        If the batched call fails, rows are retried one by one (on the same
+        model version) so a bad row only affects its own result.
+        """
+        if len(features) == 0:
+            return []
+        scorer, model = self._resolve(handle)
+        try:
+            X = np.array(features)
+            if X.ndim != 2:
+                raise ValueError(f"Expected a 2-D feature matrix, got shape {X.shape}")
+            if hasattr(scorer, "predict_proba"):
+                probs = scorer.predict_proba(X)
+                logging.info(f"Predicted probabilities for {len(X)} rows")
+                return probs.tolist()
+            # Fallback: use predict and return as [1-p, p]
+            preds = model.predict(X)
+            return [[1 - p, p] for p in preds.tolist()]
+        except Exception as e:
+            logging.warning(f"Batch prediction failed ({e}); falling back to per-row prediction")
+            return [self._predict_row(scorer, model, list(row)) for row in features]
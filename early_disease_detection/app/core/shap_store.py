@@ -0,0 +1,237 @@
+"""
+Precomputed SHAP store: SHAP values of the training/test rows, saved by the
+training pipeline next to the model, and a nearest-neighbour lookup that
+approximates explanations for live inputs close to those rows.
+"""
+import logging
+import os
+import random
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.utils.metrics import Histogram
+
+# Artifact path of the store in the training run (and file name next to the local model)
+SHAP_STORE_ARTIFACT = os.getenv("SHAP_STORE_ARTIFACT", "explainability/shap_store.npz")
+# Local store used instead of the registry artifact (e.g. in development)
+SHAP_STORE_PATH = os.getenv("SHAP_STORE_PATH", "")
+# Rows kept in the store (test rows first, then a sample of training rows)
+SHAP_STORE_MAX_ROWS = int(os.getenv("SHAP_STORE_MAX_ROWS", "20000"))
+SHAP_STORE_NEIGHBOURS = int(os.getenv("SHAP_STORE_NEIGHBOURS", "5"))
+# RMS distance in standardized units beyond which exact SHAP is computed instead
+SHAP_STORE_MAX_DISTANCE = float(os.getenv("SHAP_STORE_MAX_DISTANCE", "0.25"))
+# Fraction of approximated rows re-explained exactly in the background to measure the error
+SHAP_STORE_AUDIT_RATE = float(os.getenv("SHAP_STORE_AUDIT_RATE", "0.01"))
+
+LOOKUP_MS_BUCKETS = [0.1, 0.25, 0.5, 1, 2, 5, 10, 25, 50]
+ERROR_BUCKETS = [0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1.0]
+# Query rows per distance block (bounds the rows x store distance matrix)
+QUERY_BLOCK_ROWS = 256
+MAX_PENDING_AUDITS = 16
+
+
+def stack_classes(values: Any) -> np.ndarray:
+    """
+    SHAP values as one array; older SHAP versions return one array per class,
+    stacked here on a trailing class axis (the layout current versions use).
+    """
+    if isinstance(values, list):
+        return np.stack([np.asarray(v) for v in values], axis=-1)
+    return np.asarray(values)
+
+
+def save_shap_store(path: str, X: Any, shap_values: Any, base_values: Any,
+                    feature_names: Optional[Sequence[str]] = None) -> str:
+    """
+    Writes rows, their SHAP values (float32) and the standardization to one .npz.
+    """
+    X = np.asarray(X, dtype=np.float64)
+    mean = X.mean(axis=0)
+    scale = X.std(axis=0)
+    scale[scale == 0] = 1.0
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    np.savez_compressed(path, X=X.astype(np.float32), values=stack_classes(shap_values).astype(np.float32),
+                        base_values=np.atleast_1d(np.asarray(base_values, dtype=np.float64)),
+                        mean=mean, scale=scale, feature_names=np.asarray(list(feature_names or []), dtype=str))
+    logging.info(f"Saved SHAP store with {len(X)} rows to {path}")
+    return path
+
+
+class ShapStore:
+    """
+    Precomputed SHAP values with a vectorized k-NN index over standardized
+    features (squared distances via one matrix product per query block).
+    """
+    def __init__(self, X: np.ndarray, values: np.ndarray, base_values: np.ndarray, mean: np.ndarray,
+                 scale: np.ndarray, feature_names: Optional[List[str]] = None):
+        self.values = values
+        self.base_values = base_values
+        self.mean = mean
+        self.scale = scale
+        self.feature_names = feature_names or []
+        self.Z = self._standardize(X)
+        self.sq_norms = np.einsum("ij,ij->i", self.Z, self.Z)
+
+    @classmethod
+    def load(cls, path: str) -> "ShapStore":
+        with np.load(path) as data:
+            return cls(data["X"], data["values"], data["base_values"], data["mean"], data["scale"],
+                       data["feature_names"].tolist())
+
+    def __len__(self) -> int:
+        return len(self.Z)
+
+    def _standardize(self, X: Any) -> np.ndarray:
+        # float64: distances come from |a|^2 + |b|^2 - 2ab, which cancels badly in float32 for near matches
+        return (np.asarray(X, dtype=np.float64) - self.mean) / self.scale
+
+    def neighbours(self, X: Any, k: int = SHAP_STORE_NEIGHBOURS) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        (distances, indices) of the k nearest stored rows, nearest first.
+        Distances are RMS over features in standardized units.
+        """
+        Q = self._standardize(X)
+        k = min(k, len(self.Z))
+        distances = np.empty((len(Q), k))
+        indices = np.empty((len(Q), k), dtype=np.int64)
+        for start in range(0, len(Q), QUERY_BLOCK_ROWS):
+            block = Q[start:start + QUERY_BLOCK_ROWS]
+            d2 = np.einsum("ij,ij->i", block, block)[:, None] + self.sq_norms[None, :] - 2.0 * (block @ self.Z.T)
+            nearest = np.argpartition(d2, k - 1, axis=1)[:, :k] if k < d2.shape[1] else np.tile(
+                np.arange(d2.shape[1]), (len(block), 1))
+            nearest_d2 = np.take_along_axis(d2, nearest, axis=1)
+            order = np.argsort(nearest_d2, axis=1)
+            indices[start:start + len(block)] = np.take_along_axis(nearest, order, axis=1)
+            distances[start:start + len(block)] = np.sqrt(
+                np.maximum(np.take_along_axis(nearest_d2, order, axis=1), 0.0) / self.Z.shape[1])
+        return distances, indices
+
+    def approximate(self, X: Any, k: int = SHAP_STORE_NEIGHBOURS,
+                    max_distance: float = SHAP_STORE_MAX_DISTANCE) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Inverse-distance weighted SHAP values of the k nearest stored rows.
+        Returns (values, confidence, hit); confidence is 1 for an exact match
+        and falls linearly to 0 at `max_distance`; `hit` marks rows within it.
+        """
+        distances, indices = self.neighbours(X, k)
+        weights = 1.0 / (distances + 1e-6)
+        weights /= weights.sum(axis=1, keepdims=True)
+        neighbour_values = self.values[indices].astype(np.float64)
+        values = np.einsum("rk,rk...->r...", weights, neighbour_values)
+        nearest = distances[:, 0]
+        confidence = np.clip(1.0 - nearest / max_distance, 0.0, 1.0) if max_distance > 0 else (nearest == 0) * 1.0
+        return values, confidence, nearest <= max_distance
+
+
+class FastExplainer:
+    """
+    "fast" explain mode: rows near a stored row get interpolated SHAP values,
+    the rest fall back to exact SHAP (`exact(rows)` -> values). A sample of
+    approximated rows is re-explained exactly on a background thread to
+    track the approximation error.
+    """
+    def __init__(self, k: int = SHAP_STORE_NEIGHBOURS, max_distance: float = SHAP_STORE_MAX_DISTANCE,
+                 audit_rate: float = SHAP_STORE_AUDIT_RATE):
+        self.k = k
+        self.max_distance = max_distance
+        self.audit_rate = audit_rate
+        self._lock = threading.Lock()
+        self._rows = 0
+        self._hits = 0
+        self._pending_audits = 0
+        self._auditor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="shap-store-audit")
+        self.lookup_ms_hist = Histogram(LOOKUP_MS_BUCKETS)
+        self.error_hist = Histogram(ERROR_BUCKETS)
+
+    def explain(self, store: ShapStore, X: Any, exact: Callable[[np.ndarray], Any]) -> Tuple[np.ndarray, Dict[str, Any]]:
+        """
+        Returns (values, info) with info = {"approximated", "exact", "confidence"}.
+        """
+        X = np.asarray(X)
+        started = time.perf_counter()
+        values, confidence, hit = store.approximate(X, self.k, self.max_distance)
+        self.lookup_ms_hist.observe((time.perf_counter() - started) * 1000.0)
+        misses = np.flatnonzero(~hit)
+        if len(misses):
+            values[misses] = stack_classes(exact(X[misses]))
+            confidence[misses] = 1.0
+        with self._lock:
+            self._rows += len(X)
+            self._hits += int(hit.sum())
+        self._maybe_audit(X[hit], values[hit], exact)
+        return values, {"approximated": int(hit.sum()), "exact": len(misses), "confidence": confidence.tolist()}
+
+    def _maybe_audit(self, X: np.ndarray, approximated: np.ndarray, exact: Callable[[np.ndarray], Any]):
+        if not len(X) or self.audit_rate <= 0 or random.random() >= self.audit_rate:
+            return
+        with self._lock:
+            if self._pending_audits >= MAX_PENDING_AUDITS:
+                return
+            self._pending_audits += 1
+        row = random.randrange(len(X))
+        self._auditor.submit(self._audit, X[row:row + 1], approximated[row:row + 1], exact)
+
+    def _audit(self, X: np.ndarray, approximated: np.ndarray, exact: Callable[[np.ndarray], Any]):
+        try:
+            reference = stack_classes(exact(X)).astype(np.float64)
+            scale = np.mean(np.abs(reference)) or 1.0
+            self.error_hist.observe(float(np.mean(np.abs(approximated - reference)) / scale))
+        except Exception as e:
+            logging.warning(f"SHAP store audit failed: {e}")
+        finally:
+            with self._lock:
+                self._pending_audits -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            rows, hits = self._rows, self._hits
+        return {"rows": rows, "approximated": hits, "hit_ratio": hits / rows if rows else 0.0,
+                "lookup_ms": self.lookup_ms_hist.snapshot(), "relative_error": self.error_hist.snapshot()}
+
+
+class ShapStoreCache:
+    """
+    ShapStore per model version (newest two kept), loaded from the version's
+    training run artifact, or from SHAP_STORE_PATH when set. None when the
+    version has no store; a failed fetch or load (e.g. the registry is briefly
+    unreachable) is not cached, so the next request retries.
+    """
+    def __init__(self, loader: Optional[Callable[[Any], Optional[str]]] = None, path: str = SHAP_STORE_PATH,
+                 max_versions: int = 2):
+        self.loader = loader
+        self.path = path
+        self.max_versions = max_versions
+        self._stores: "OrderedDict[str, Optional[ShapStore]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, handle: Any) -> Optional[ShapStore]:
+        with self._lock:
+            if handle.version in self._stores:
+                return self._stores[handle.version]
+        store = None
+        try:
+            path = self.path or (self.loader(handle) if self.loader is not None else None)
+            if path:
+                store = ShapStore.load(path)
+                logging.info(f"Loaded SHAP store ({len(store)} rows) for model version {handle.version}")
+        except Exception as e:
+            logging.error(f"Could not load SHAP store for model version {handle.version}: {e}")
+            return None
+        with self._lock:
+            self._stores[handle.version] = store
+            while len(self._stores) > self.max_versions:
+                self._stores.popitem(last=False)
+        return store
+
+    def prebuild(self, handle: Any):
+        self.get(handle)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {version: len(store) if store is not None else None for version, store in self._stores.items()}
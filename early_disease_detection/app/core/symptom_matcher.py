@@ -0,0 +1,126 @@
+"""
+Dictionary fast path: Aho-Corasick multi-pattern matching of known symptom phrases.
+"""
+import csv
+import logging
+import os
+from collections import deque
+from typing import Dict, Iterable, List, Tuple
+
+from app.utils.text import normalize_text
+
+# Optional CSV with columns: 'synonym', 'symptom' (canonical name as used in the mapping table)
+SYNONYMS_CSV_PATH = os.getenv("SYMPTOM_SYNONYMS_PATH", "ml/symptom_synonyms.csv")
+
+
+def load_synonyms(path: str = SYNONYMS_CSV_PATH) -> Dict[str, str]:
+    """
+    Loads synonym -> canonical symptom pairs. A missing file yields no synonyms.
+    """
+    if not path or not os.path.exists(path):
+        return {}
+    synonyms = {}
+    with open(path, newline="") as f:
+        for row in csv.DictReader(f):
+            synonym, symptom = row.get("synonym"), row.get("symptom")
+            if synonym and symptom:
+                synonyms[normalize_text(synonym)] = symptom.strip().lower()
+    logging.info(f"Loaded {len(synonyms)} symptom synonyms from {path}")
+    return synonyms
+
+
+class AhoCorasick:
+    """
+    Aho-Corasick automaton over normalized phrases. Finds every occurrence of
+    every pattern in one pass over the text, independent of vocabulary size.
+    """
+    def __init__(self, patterns: Dict[str, str]):
+        # patterns: normalized phrase -> payload returned on match
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[Tuple[int, str]]] = [[]]
+        for phrase, payload in patterns.items():
+            if phrase:
+                self._add(phrase, payload)
+        self._build()
+
+    def _add(self, phrase: str, payload: str):
+        state = 0
+        for ch in phrase:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            state = nxt
+        self._output[state].append((len(phrase), payload))
+
+    def _build(self):
+        # Depth-1 states fail back to the root; deeper states follow their parent's failure chain
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(ch, 0) if state else 0
+                self._output[nxt] = self._output[nxt] + self._output[self._fail[nxt]]
+
+    def __len__(self) -> int:
+        return len(self._goto)
+
+    def iter_matches(self, text: str):
+        """
+        Yields (start, end, payload) for every pattern occurrence in `text`.
+        """
+        state = 0
+        goto, fail, output = self._goto, self._fail, self._output
+        for i, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for length, payload in output[state]:
+                yield i - length + 1, i + 1, payload
+
+
+class SymptomMatcher:
+    """
+    Extracts known symptoms (mapping vocabulary plus synonyms) verbatim from text.
+    Matches must fall on word boundaries; overlapping matches resolve to the
+    leftmost-longest phrase ("shortness of breath" wins over "breath").
+    """
+    def __init__(self, vocabulary: Iterable[str], synonyms: Dict[str, str] = None):
+        patterns = {normalize_text(s): s.strip().lower() for s in vocabulary if isinstance(s, str) and s.strip()}
+        for synonym, symptom in (synonyms or {}).items():
+            patterns.setdefault(normalize_text(synonym), symptom)
+        self.size = len(patterns)
+        self.automaton = AhoCorasick(patterns)
+        logging.info(f"Compiled symptom matcher over {self.size} phrases ({len(self.automaton)} states)")
+
+    @classmethod
+    def from_mapping(cls, mapping, synonyms_path: str = SYNONYMS_CSV_PATH) -> "SymptomMatcher":
+        return cls(mapping.vocabulary(), load_synonyms(synonyms_path))
+
+    def match(self, text: str) -> List[str]:
+        """
+        Returns the canonical symptoms found in `text`, in order of first occurrence.
+        """
+        normalized = normalize_text(text)
+        n = len(normalized)
+        candidates = [
+            (start, end, payload) for start, end, payload in self.automaton.iter_matches(normalized)
+            if (start == 0 or normalized[start - 1] == " ") and (end == n or normalized[end] == " ")
+        ]
+        candidates.sort(key=lambda m: (m[0], -(m[1] - m[0])))
+        symptoms, covered_until = [], 0
+        for start, end, payload in candidates:
+            if start < covered_until:
+                continue
+            covered_until = end
+            if payload not in symptoms:
+                symptoms.append(payload)
+        return symptoms
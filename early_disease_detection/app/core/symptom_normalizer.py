@@ -0,0 +1,155 @@
+"""
+Fuzzy symptom normalization: maps extracted entities ("headaches", "high temp",
+misspellings) onto canonical mapping-table symptoms via a character n-gram index.
+"""
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from app.utils.metrics import Histogram
+from app.utils.text import normalize_text
+
+FUZZY_NORMALIZATION = os.getenv("SYMPTOM_FUZZY", "true").lower() in ("1", "true", "yes")
+FUZZY_THRESHOLD = float(os.getenv("SYMPTOM_FUZZY_THRESHOLD", "0.6"))
+FUZZY_TIME_BUDGET_MS = float(os.getenv("SYMPTOM_FUZZY_BUDGET_MS", "2"))
+# Hard cap on posting-list entries scored per lookup (bounds the final counting step)
+FUZZY_MAX_POSTINGS = int(os.getenv("SYMPTOM_FUZZY_MAX_POSTINGS", "20000"))
+NGRAM_SIZE = 3
+# Candidates re-scored exactly when a lookup had to stop scanning early
+RERANK_CANDIDATES = 32
+
+LOOKUP_MS_BUCKETS = [0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10]
+
+
+def char_ngrams(term: str, n: int = NGRAM_SIZE) -> List[str]:
+    padded = f" {term} "
+    if len(padded) <= n:
+        return [padded]
+    return sorted({padded[i:i + n] for i in range(len(padded) - n + 1)})
+
+
+class SymptomNormalizer:
+    """
+    Character n-gram inverted index over the mapping vocabulary plus synonyms.
+    A lookup scores candidates by Dice similarity of their n-gram sets and returns
+    the best canonical symptom at or above `threshold`.
+
+    Posting lists are scanned rarest-gram first and the scan stops once
+    `time_budget_ms` is spent or `max_postings` entries have been gathered, so
+    lookup cost stays bounded as the vocabulary grows (at the price of possibly
+    missing a match whose only shared n-grams are very common ones).
+    """
+    def __init__(self, vocabulary: Iterable[str], synonyms: Optional[Dict[str, str]] = None,
+                 threshold: float = FUZZY_THRESHOLD, time_budget_ms: float = FUZZY_TIME_BUDGET_MS,
+                 max_postings: int = FUZZY_MAX_POSTINGS, n: int = NGRAM_SIZE):
+        self.threshold = threshold
+        self.time_budget_ms = time_budget_ms
+        self.max_postings = max_postings
+        self.n = n
+        canonical: Dict[str, str] = {}
+        for symptom in vocabulary:
+            if isinstance(symptom, str) and symptom.strip():
+                canonical.setdefault(normalize_text(symptom), symptom.strip().lower())
+        for synonym, symptom in (synonyms or {}).items():
+            canonical.setdefault(normalize_text(synonym), symptom)
+        self.terms = list(canonical)
+        self.canonical = [canonical[t] for t in self.terms]
+        self.exact = {t: i for i, t in enumerate(self.terms)}
+        postings: Dict[str, List[int]] = {}
+        gram_counts = np.zeros(len(self.terms), dtype=np.int32)
+        for i, term in enumerate(self.terms):
+            grams = char_ngrams(term, n)
+            gram_counts[i] = len(grams)
+            for gram in grams:
+                postings.setdefault(gram, []).append(i)
+        self.postings = {g: np.asarray(ids, dtype=np.int32) for g, ids in postings.items()}
+        self.gram_counts = gram_counts
+        self._lock = threading.Lock()
+        self._counts = {"lookups": 0, "exact": 0, "fuzzy": 0, "miss": 0, "budget_exceeded": 0}
+        self.latency_hist = Histogram(LOOKUP_MS_BUCKETS)
+        logging.info(f"Built fuzzy symptom index: {len(self.terms)} terms, {len(self.postings)} {n}-grams")
+
+    def _count(self, *keys: str):
+        with self._lock:
+            for key in keys:
+                self._counts[key] += 1
+
+    def lookup(self, entity: str) -> Tuple[Optional[str], float]:
+        """
+        Returns (canonical symptom or None, similarity in [0, 1]).
+        """
+        started = time.perf_counter()
+        try:
+            term = normalize_text(entity)
+            exact = self.exact.get(term)
+            if exact is not None:
+                self._count("lookups", "exact")
+                return self.canonical[exact], 1.0
+            grams = [g for g in char_ngrams(term, self.n) if g in self.postings]
+            if not grams:
+                self._count("lookups", "miss")
+                return None, 0.0
+            grams.sort(key=lambda g: len(self.postings[g]))
+            deadline = started + self.time_budget_ms / 1000.0
+            scanned = []
+            gathered = 0
+            exceeded = False
+            for gram in grams:
+                posting = self.postings[gram]
+                if scanned and (gathered + len(posting) > self.max_postings or time.perf_counter() > deadline):
+                    exceeded = True
+                    break
+                scanned.append(posting)
+                gathered += len(posting)
+            ids, overlap = np.unique(np.concatenate(scanned), return_counts=True)
+            query_grams = char_ngrams(term, self.n)
+            if exceeded:
+                # Overlaps are partial: re-score the best few candidates on their full n-gram sets
+                top = ids[np.argsort(-overlap, kind="stable")[:RERANK_CANDIDATES]]
+                query_set = set(query_grams)
+                dice = np.array([2.0 * len(query_set.intersection(char_ngrams(self.terms[i], self.n)))
+                                 / (len(query_set) + self.gram_counts[i]) for i in top])
+                ids = top
+            else:
+                dice = 2.0 * overlap / (len(query_grams) + self.gram_counts[ids])
+            best = int(np.argmax(dice))
+            score = float(dice[best])
+            keys = ["lookups"] + (["budget_exceeded"] if exceeded else [])
+            if score >= self.threshold:
+                self._count(*keys, "fuzzy")
+                return self.canonical[ids[best]], score
+            self._count(*keys, "miss")
+            return None, score
+        finally:
+            self.latency_hist.observe((time.perf_counter() - started) * 1000.0)
+
+    def normalize(self, symptoms: List[str]) -> List[str]:
+        """
+        Replaces each extracted symptom with its canonical form when one is found
+        (unmatched entities are kept as-is); duplicates are dropped, order kept.
+        """
+        normalized = []
+        for symptom in symptoms:
+            canonical, score = self.lookup(symptom)
+            if canonical is not None and canonical != symptom:
+                logging.info(f"Normalized symptom '{symptom}' -> '{canonical}' (similarity {score:.2f})")
+            value = canonical if canonical is not None else symptom
+            if value not in normalized:
+                normalized.append(value)
+        return normalized
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counts = dict(self._counts)
+        return {
+            "terms": len(self.terms),
+            "threshold": self.threshold,
+            "time_budget_ms": self.time_budget_ms,
+            "max_postings": self.max_postings,
+            **counts,
+            "latency_ms": self.latency_hist.snapshot(),
+        }
@@ -1,27 +1,97 @@
 """
-DataMonitor: Uses Evidently AI to check for input data drift and logs reports.
+DataMonitor: checks input data drift against the reference data and logs reports.
+
+Requests only `record` their inputs into a bounded ring buffer. A background
+thread folds new inputs into mergeable histogram sketches (app/core/drift_sketch.py)
+and scores the most recent window against the precomputed reference profile
+with PSI / KS / Jensen-Shannon every DRIFT_CHECK_EVERY_N samples or
+DRIFT_CHECK_INTERVAL_SECONDS; `latest` returns the last result. The full
+Evidently report (`check_drift`, `full_report`) is only built on demand.
 """
+import itertools
 import logging
-from typing import List, Dict, Any
-from evidently.report import Report
-from evidently.metrics import DataDriftPreset
+import math
+import threading
+import time
+from collections import deque
+from typing import List, Dict, Any, Optional
 import pandas as pd
 import os
 import datetime
 
+from app.core.drift_sketch import DRIFT_PROFILE_PATH, Profile, drift_scores
+from app.utils.metrics import Histogram
+
+# Recent raw inputs kept in memory (oldest dropped first); also the sample the full Evidently report uses
+DRIFT_BUFFER_SIZE = int(os.getenv("DRIFT_BUFFER_SIZE", "5000"))
+# Most recent samples each drift check compares against the reference profile (memory does not grow with it)
+DRIFT_WINDOW_SIZE = int(os.getenv("DRIFT_WINDOW_SIZE", "10000"))
+# The window slides in steps of DRIFT_WINDOW_SIZE / DRIFT_WINDOW_PANES samples
+DRIFT_WINDOW_PANES = int(os.getenv("DRIFT_WINDOW_PANES", "10"))
+# A check runs after this many new samples, or after DRIFT_CHECK_INTERVAL_SECONDS if any arrived
+DRIFT_CHECK_EVERY_N = int(os.getenv("DRIFT_CHECK_EVERY_N", "200"))
+DRIFT_CHECK_INTERVAL_SECONDS = float(os.getenv("DRIFT_CHECK_INTERVAL_SECONDS", "60"))
+# Windows smaller than this are not checked (too few samples for the statistical tests)
+DRIFT_MIN_SAMPLES = int(os.getenv("DRIFT_MIN_SAMPLES", "30"))
+
+CHECK_MS_BUCKETS = [1, 5, 10, 50, 100, 250, 500, 1000, 2500]
+RECORD_US_BUCKETS = [1, 2, 5, 10, 25, 50, 100]
+
 class DataMonitor:
-    def __init__(self, reference_data_path: str = None, drift_log_path: str = "logs/drift_events.log", drift_threshold: float = 0.5):
+    def __init__(self, reference_data_path: str = None, drift_log_path: str = "logs/drift_events.log", drift_threshold: float = 0.5,
+                 buffer_size: int = DRIFT_BUFFER_SIZE, window_size: int = DRIFT_WINDOW_SIZE,
+                 check_every_n: int = DRIFT_CHECK_EVERY_N, check_interval_seconds: float = DRIFT_CHECK_INTERVAL_SECONDS,
+                 min_samples: int = DRIFT_MIN_SAMPLES, profile_path: str = DRIFT_PROFILE_PATH,
+                 window_panes: int = DRIFT_WINDOW_PANES):
         self.reference_data = None
+        self.reference_profile: Optional[Profile] = None
         self.drift_log_path = drift_log_path
         self.drift_threshold = drift_threshold
+        self.window_size = window_size
+        self.pane_size = max(1, math.ceil(window_size / max(window_panes, 1)))
+        self.check_every_n = check_every_n
+        self.check_interval_seconds = check_interval_seconds
+        self.min_samples = min_samples
+        self._buffer: "deque[Dict[str, Any]]" = deque(maxlen=buffer_size)
+        # [sketch, rows] per pane, newest last; the window is their merge
+        self._panes: "deque[list]" = deque(maxlen=max(1, math.ceil(window_size / self.pane_size)))
+        self._lock = threading.Lock()
+        # Serializes folding into the panes (background thread vs. an explicit check_window)
+        self._fold_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+        self._samples_seen = 0
+        self._pending = 0
+        self._unfolded = 0
+        self._dropped = 0
+        self._checks = 0
+        self._errors = 0
+        self._state: Dict[str, Any] = {"drift": False, "drift_score": None, "window_size": 0,
+                                       "samples_seen": 0, "checked_at": None}
+        self.last_report: Optional[dict] = None
+        self.check_ms_hist = Histogram(CHECK_MS_BUCKETS)
+        self.record_us_hist = Histogram(RECORD_US_BUCKETS)
         if reference_data_path is None:
             reference_data_path = os.getenv("REFERENCE_DATA_PATH", "data/processed/processed_data.csv")
+        self.reference_data_path = reference_data_path
         try:
-            self.reference_data = pd.read_csv(reference_data_path)
-            logging.info(f"Loaded reference data for drift monitoring: {reference_data_path}")
+            if profile_path and os.path.exists(profile_path):
+                self.reference_profile = Profile.load(profile_path)
+                logging.info(f"Loaded drift reference profile: {profile_path}")
+            else:
+                # No profile saved by the preprocessing pipeline yet: build it from the reference data once
+                self.reference_profile = Profile.from_frame(self._reference_frame())
+                logging.info(f"Built drift reference profile from {reference_data_path}")
         except Exception as e:
             logging.error(f"Failed to load reference data: {e}")
-            self.reference_data = None
+            self.reference_profile = None
+
+    def _reference_frame(self) -> pd.DataFrame:
+        if self.reference_data is None:
+            self.reference_data = pd.read_csv(self.reference_data_path)
+            logging.info(f"Loaded reference data for drift monitoring: {self.reference_data_path}")
+        return self.reference_data
 
     def log_drift_event(self, drift_score: float, drift_detected: bool, report: dict):
         os.makedirs(os.path.dirname(self.drift_log_path), exist_ok=True)
@@ -31,19 +101,20 @@ class DataMonitor:
 
     def check_drift(self, input_data: List[Dict[str, Any]]) -> Dict[str, Any]:
         """
-        Checks for data drift using Evidently. Logs and returns drift report.
+        Checks for data drift using Evidently (the full, human-readable report;
+        background checks use the sketches instead). Logs and returns drift report.
         Args:
             input_data (List[Dict]): List of input feature dicts (single or batch).
         Returns:
             Dict: Drift report and alert flag.
         """
         try:
-            if self.reference_data is None:
-                logging.warning("No reference data loaded for drift check.")
-                return {"drift": False, "report": None}
+            from evidently.report import Report
+            from evidently.metrics import DataDriftPreset
+            reference_data = self._reference_frame()
             current_df = pd.DataFrame(input_data)
             report = Report(metrics=[DataDriftPreset()])
-            report.run(reference_data=self.reference_data, current_data=current_df)
+            report.run(reference_data=reference_data, current_data=current_df)
             result = report.as_dict()
             drift_score = result['metrics'][0]['result']['dataset_drift_score']
             drift_detected = drift_score > self.drift_threshold
@@ -56,4 +127,140 @@ class DataMonitor:
             return {"drift": drift_detected, "drift_score": drift_score, "report": result}
         except Exception as e:
             logging.error(f"Drift check error: {e}")
-            return {"drift": False, "report": None} 
\ No newline at end of file
+            return {"drift": False, "report": None}
+
+    def full_report(self) -> Dict[str, Any]:
+        """
+        Evidently report over the buffered raw inputs (up to DRIFT_BUFFER_SIZE most recent).
+        """
+        with self._lock:
+            rows = list(self._buffer)
+        return self.check_drift(rows)
+
+    def record(self, input_data: Any):
+        """
+        Queues one input (feature dict) or a list of them for the next drift
+        check; O(1), no drift computation on the caller's thread.
+        """
+        started = time.perf_counter()
+        rows = input_data if isinstance(input_data, list) else [input_data]
+        thread = self._thread
+        if thread is None or not thread.is_alive():
+            self.start()
+        with self._lock:
+            self._buffer.extend(rows)
+            self._samples_seen += len(rows)
+            self._pending += len(rows)
+            self._unfolded += len(rows)
+            due = self._pending >= self.check_every_n
+        if due:
+            self._wakeup.set()
+        self.record_us_hist.observe((time.perf_counter() - started) * 1e6)
+
+    def latest(self) -> Dict[str, Any]:
+        """
+        Result of the most recent windowed drift check (cached, no computation).
+        """
+        with self._lock:
+            return dict(self._state)
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stopping = False
+                self._thread = threading.Thread(target=self._run, name="drift-monitor", daemon=True)
+                self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        with self._lock:
+            thread, self._thread = self._thread, None
+            self._stopping = True
+        self._wakeup.set()
+        if thread is not None and thread.is_alive():
+            thread.join(timeout)
+
+    def _fold(self):
+        """
+        Adds the inputs recorded since the last fold to the window's pane
+        sketches, opening a new pane every `pane_size` rows (the oldest drops out).
+        """
+        with self._lock:
+            unfolded = min(self._unfolded, len(self._buffer))
+            self._dropped += self._unfolded - unfolded
+            self._unfolded = 0
+            rows = list(itertools.islice(reversed(self._buffer), unfolded))[::-1]
+        start = 0
+        while start < len(rows):
+            if not self._panes or self._panes[-1][1] >= self.pane_size:
+                self._panes.append([self.reference_profile.empty(), 0])
+            pane = self._panes[-1]
+            chunk = rows[start:start + self.pane_size - pane[1]]
+            pane[0].update(chunk)
+            pane[1] += len(chunk)
+            start += len(chunk)
+
+    def check_window(self) -> Optional[Dict[str, Any]]:
+        """
+        Scores the most recent window (DRIFT_WINDOW_SIZE samples, at pane
+        granularity) against the reference profile and updates `latest`.
+        Returns None if there were fewer than `min_samples`.
+        """
+        with self._lock:
+            self._pending = 0
+            samples_seen = self._samples_seen
+        if self.reference_profile is None:
+            logging.warning("No reference data loaded for drift check.")
+            with self._lock:
+                self._unfolded = 0
+                self._errors += 1
+            return None
+        started = time.perf_counter()
+        with self._fold_lock:
+            self._fold()
+            window_rows = sum(rows for _, rows in self._panes)
+            if window_rows < self.min_samples:
+                return None
+            window = self.reference_profile.empty()
+            for pane, _ in self._panes:
+                window.merge(pane)
+        result = drift_scores(self.reference_profile, window)
+        drift_detected = result["drift_score"] > self.drift_threshold
+        check_ms = (time.perf_counter() - started) * 1000.0
+        self.check_ms_hist.observe(check_ms)
+        self.log_drift_event(result["drift_score"], drift_detected, result)
+        if drift_detected:
+            logging.warning(f"Data drift detected! Score: {result['drift_score']:.3f} (Threshold: {self.drift_threshold}), "
+                            f"features: {result['drifted_features']}")
+        with self._lock:
+            self._checks += 1
+            self.last_report = result
+            self._state = {"drift": drift_detected, "drift_score": result["drift_score"],
+                           "drifted_features": result["drifted_features"], "window_size": window_rows,
+                           "samples_seen": samples_seen, "checked_at": datetime.datetime.now().isoformat(),
+                           "check_ms": check_ms}
+            return dict(self._state)
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.check_interval_seconds)
+            self._wakeup.clear()
+            with self._lock:
+                if self._stopping:
+                    return
+                pending = self._pending
+            if pending:
+                try:
+                    self.check_window()
+                except Exception as e:
+                    with self._lock:
+                        self._errors += 1
+                    logging.error(f"Background drift check failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            state = dict(self._state)
+            buffered, checks, errors, dropped = len(self._buffer), self._checks, self._errors, self._dropped
+        return {"latest": state, "buffered": buffered, "buffer_size": self._buffer.maxlen,
+                "window_size": self.window_size, "pane_size": self.pane_size, "checks": checks, "errors": errors,
+                "dropped": dropped, "check_ms": self.check_ms_hist.snapshot(),
+                "record_us": self.record_us_hist.snapshot()}
@@ -0,0 +1,310 @@
+"""
+Asynchronous explanation jobs: /explain uploads queued in-process, explained in
+chunks by a local process pool, with progress and partial results persisted to
+a local store that any API worker can read.
+"""
+import json
+import logging
+import os
+import queue
+import shutil
+import threading
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from app.core.budgeted_shap import EXPLAIN_BUDGET_MS
+from app.core.parallel_shap import ShapPool, as_float32, explain_chunk, stitch, to_json_values
+
+# Processes computing SHAP chunks (the pool is started on the first job)
+EXPLAIN_JOB_WORKERS = int(os.getenv("EXPLAIN_JOB_WORKERS", "2"))
+# Rows per chunk; progress and partial results are published per chunk
+EXPLAIN_JOB_CHUNK_ROWS = int(os.getenv("EXPLAIN_JOB_CHUNK_ROWS", "16"))
+EXPLAIN_JOB_STORE_DIR = os.getenv("EXPLAIN_JOB_STORE_DIR", "cache/explain_jobs")
+# Jobs (and their results) are deleted this long after they finish; queued/running jobs never expire
+EXPLAIN_JOB_TTL_SECONDS = float(os.getenv("EXPLAIN_JOB_TTL_SECONDS", "3600"))
+# Jobs waiting for the pool; submissions beyond this are rejected
+EXPLAIN_JOB_QUEUE_SIZE = int(os.getenv("EXPLAIN_JOB_QUEUE_SIZE", "100"))
+# "spawn" keeps the pool independent of the API's threads; "fork" starts faster
+EXPLAIN_JOB_START_METHOD = os.getenv("EXPLAIN_JOB_START_METHOD", "spawn")
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+_STOP = object()
+# Job directories without job.json younger than this are being created, not abandoned
+CREATE_GRACE_SECONDS = 60.0
+
+
+class JobQueueFullError(RuntimeError):
+    """
+    Raised when an explanation job is submitted while the queue is full.
+    """
+
+
+class JobStore:
+    """
+    One directory per job: `job.json` (status, progress, metadata; replaced
+    atomically) and one `chunk-<start>.npy` per finished chunk.
+    """
+    def __init__(self, directory: str = EXPLAIN_JOB_STORE_DIR, ttl_seconds: float = EXPLAIN_JOB_TTL_SECONDS):
+        self.directory = directory
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+
+    def _job_dir(self, job_id: str) -> str:
+        # Job ids are generated hex strings; refuse anything that could escape the store
+        if not job_id or not all(c in "0123456789abcdef" for c in job_id):
+            raise KeyError(job_id)
+        return os.path.join(self.directory, job_id)
+
+    def _write(self, job: Dict[str, Any]):
+        path = os.path.join(self._job_dir(job["job_id"]), "job.json")
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(job, f)
+        os.replace(tmp, path)
+
+    def create(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        os.makedirs(self._job_dir(job["job_id"]), exist_ok=True)
+        # The expiry is only set once the job finishes (see update)
+        job.setdefault("expires_at", None)
+        self._write(job)
+        return job
+
+    def update(self, job_id: str, **fields) -> Dict[str, Any]:
+        with self._lock:
+            job = self.load(job_id)
+            job.update(fields)
+            if job["status"] in (DONE, FAILED):
+                job["expires_at"] = time.time() + self.ttl_seconds
+            self._write(job)
+            return job
+
+    def save_chunk(self, job_id: str, start: int, values: np.ndarray):
+        path = os.path.join(self._job_dir(job_id), f"chunk-{start:09d}.npy")
+        tmp = f"{path}.tmp.npy"
+        np.save(tmp, values)
+        os.replace(tmp, path)
+
+    def load(self, job_id: str) -> Dict[str, Any]:
+        """
+        Job metadata; raises KeyError for unknown or expired jobs.
+        """
+        try:
+            with open(os.path.join(self._job_dir(job_id), "job.json")) as f:
+                job = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            raise KeyError(job_id)
+        if job.get("expires_at") is not None and job["expires_at"] < time.time():
+            raise KeyError(job_id)
+        return job
+
+    def chunks(self, job_id: str) -> List[Dict[str, Any]]:
+        """
+        Finished chunks in row order: [{"start", "rows", "shap_values"}, ...].
+        """
+        job_dir = self._job_dir(job_id)
+        results = []
+        for name in sorted(os.listdir(job_dir)):
+            if name.startswith("chunk-") and name.endswith(".npy") and ".tmp" not in name:
+                values = np.load(os.path.join(job_dir, name))
+                results.append({"start": int(name[6:-4]), "rows": len(values), "shap_values": to_json_values(values)})
+        return results
+
+    def purge_expired(self) -> int:
+        if not os.path.isdir(self.directory):
+            return 0
+        purged = 0
+        for job_id in os.listdir(self.directory):
+            job_dir = os.path.join(self.directory, job_id)
+            try:
+                if (not os.path.exists(os.path.join(job_dir, "job.json"))
+                        and time.time() - os.path.getmtime(job_dir) < CREATE_GRACE_SECONDS):
+                    continue
+                self.load(job_id)
+            except FileNotFoundError:
+                continue
+            except KeyError:
+                shutil.rmtree(job_dir, ignore_errors=True)
+                purged += 1
+        return purged
+
+
+class ExplainJobQueue:
+    """
+    In-process job queue (no external broker). `submit` persists the job and
+    returns its id at once; a dispatcher thread takes jobs in order, splits
+    them into chunks and fans the chunks out to a process pool, saving each
+    chunk as it finishes. The pool (a ShapPool, separate from the one serving
+    synchronous /explain requests) is rebuilt when the model version changes.
+    """
+    def __init__(self, store: Optional[JobStore] = None, workers: int = EXPLAIN_JOB_WORKERS,
+                 chunk_rows: int = EXPLAIN_JOB_CHUNK_ROWS, queue_size: int = EXPLAIN_JOB_QUEUE_SIZE,
+                 start_method: str = EXPLAIN_JOB_START_METHOD):
+        self.store = store or JobStore()
+        self.chunk_rows = chunk_rows
+        self.pool = ShapPool(workers=workers, chunk_rows=chunk_rows, start_method=start_method)
+        self._queue: "queue.Queue" = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._counts = {"submitted": 0, "rejected": 0, DONE: 0, FAILED: 0}
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="explain-jobs", daemon=True)
+                self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+        if thread is not None and thread.is_alive():
+            try:
+                self._queue.put(_STOP, timeout=timeout)
+            except queue.Full:
+                return
+            thread.join(timeout)
+        self.pool.stop()
+
+    def submit(self, explainer: Any, version: str, X: Any, budget_ms: float = EXPLAIN_BUDGET_MS,
+               owner: Optional[str] = None, float32: bool = False,
+               render: Optional[Callable[[Any], Optional[str]]] = None) -> Dict[str, Any]:
+        """
+        Queues an explanation of every row of X; returns the stored job.
+        With `float32`, results are stored and returned as float32. `render`
+        is called with the SHAP values of all rows once they are done and its
+        result (a base64 plot) is stored as the job's "plot_base64".
+        Raises JobQueueFullError if the queue is full.
+        """
+        thread = self._thread
+        if thread is None or not thread.is_alive():
+            self.start()
+        X = np.asarray(X)
+        job = {
+            "job_id": uuid.uuid4().hex,
+            "status": QUEUED,
+            "owner": owner,
+            "model_version": version,
+            "rows": len(X),
+            "rows_done": 0,
+            "chunk_rows": self.chunk_rows,
+            "budget_ms": budget_ms,
+            "float32": float32,
+            "base_values": np.atleast_1d(getattr(explainer, "expected_value", [])).tolist(),
+            "feature_names": list(getattr(explainer, "feature_names", None) or []),
+            "quality": [],
+            "plot_base64": None,
+            "error": None,
+            "created_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+        }
+        self.store.create(job)
+        try:
+            self._queue.put_nowait((job["job_id"], explainer, version, X, budget_ms, float32, render))
+        except queue.Full:
+            self.store.update(job["job_id"], status=FAILED, error="explanation queue is full")
+            with self._lock:
+                self._counts["rejected"] += 1
+            raise JobQueueFullError("Explanation queue is full")
+        with self._lock:
+            self._counts["submitted"] += 1
+        return job
+
+    def get(self, job_id: str, owner: Optional[str] = None, include_results: bool = True) -> Dict[str, Any]:
+        """
+        Status, progress and (partial) results of a job; KeyError if it is
+        unknown, expired or belongs to another user.
+        """
+        job = self.store.load(job_id)
+        if owner is not None and job.get("owner") != owner:
+            raise KeyError(job_id)
+        job["progress"] = job["rows_done"] / job["rows"] if job["rows"] else 1.0
+        job["chunks"] = self.store.chunks(job_id) if include_results else []
+        return job
+
+    def wait(self, job_id: str, timeout: float = 30.0) -> Dict[str, Any]:
+        """
+        Polls until the job finishes (used by tests and benchmarks).
+        """
+        deadline = time.monotonic() + timeout
+        job = self.store.load(job_id)
+        while job["status"] not in (DONE, FAILED) and time.monotonic() < deadline:
+            time.sleep(0.02)
+            job = self.store.load(job_id)
+        return job
+
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            try:
+                if job is _STOP:
+                    return
+                self._process(*job)
+            except Exception as e:
+                # Never let one job kill the dispatcher (e.g. its store entry was removed)
+                logging.error(f"Explanation job dispatch failed: {e}")
+            finally:
+                self._queue.task_done()
+            try:
+                self.store.purge_expired()
+            except Exception as e:
+                logging.warning(f"Could not purge expired explanation jobs: {e}")
+
+    def _process(self, job_id: str, explainer: Any, version: str, X: np.ndarray, budget_ms: float,
+                 float32: bool = False, render: Optional[Callable[[Any], Optional[str]]] = None):
+        self.store.update(job_id, status=RUNNING, started_at=time.time())
+        rows_done, qualities, pending = 0, [], {}
+        # Per-chunk values in the explainer's own shape, kept only for the plot
+        raw: Dict[int, Any] = {}
+        try:
+            pool = self.pool.executor(explainer, version)
+            pending = {pool.submit(explain_chunk, X[start:start + self.chunk_rows], budget_ms): start
+                       for start in range(0, len(X), self.chunk_rows)}
+            while pending:
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    start = pending.pop(future)
+                    values, quality = future.result()
+                    if render is not None:
+                        raw[start] = values
+                    values = as_float32(values) if float32 else np.asarray(values)
+                    self.store.save_chunk(job_id, start, values)
+                    rows_done += len(values)
+                    qualities.append({"start": start, **quality})
+                self.store.update(job_id, rows_done=rows_done, quality=sorted(qualities, key=lambda q: q["start"]))
+            plot_base64 = None
+            if render is not None and raw:
+                try:
+                    plot_base64 = render(stitch([raw[start] for start in sorted(raw)]))
+                except Exception as e:
+                    logging.error(f"Plot for explanation job {job_id} failed: {e}")
+            with self._lock:
+                self._counts[DONE] += 1
+            self.store.update(job_id, status=DONE, finished_at=time.time(), plot_base64=plot_base64)
+        except Exception as e:
+            for future in pending:
+                future.cancel()
+            if isinstance(e, BrokenProcessPool):
+                self.pool.reset()
+            logging.error(f"Explanation job {job_id} failed: {e}")
+            with self._lock:
+                self._counts[FAILED] += 1
+            self.store.update(job_id, status=FAILED, error=str(e), finished_at=time.time())
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counts = dict(self._counts)
+        return {"queue_depth": self._queue.qsize(), "queue_size": self._queue.maxsize,
+                "pool": self.pool.stats(), **counts}
+
+
+explain_jobs = ExplainJobQueue()
@@ -0,0 +1,250 @@
+"""
+Component lifecycle manager: lazy/parallel loading, warm-up and readiness state.
+"""
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+REGISTERED = "registered"
+LOADING = "loading"
+# Built but not warmed up yet (e.g. preloaded in a pre-fork master, warmed in each worker)
+LOADED = "loaded"
+WARMING_UP = "warming_up"
+READY = "ready"
+FAILED = "failed"
+
+# A failed component is retried after this delay, doubling per consecutive failure up to the maximum
+COMPONENT_RETRY_SECONDS = float(os.getenv("COMPONENT_RETRY_SECONDS", "10"))
+COMPONENT_RETRY_MAX_SECONDS = float(os.getenv("COMPONENT_RETRY_MAX_SECONDS", "300"))
+
+
+class ComponentUnavailableError(RuntimeError):
+    """
+    Raised when a component is requested but failed to load.
+    """
+
+
+class Component:
+    """
+    A named, lazily constructed serving dependency (model, NLP engine, ...).
+    """
+    def __init__(self, name: str, factory: Callable[[], Any], warmup: Optional[Callable[[Any], Any]] = None,
+                 required: bool = True):
+        self.name = name
+        self.factory = factory
+        self.warmup = warmup
+        self.required = required
+        self.state = REGISTERED
+        self.instance = None
+        self.error: Optional[str] = None
+        self.load_seconds: Optional[float] = None
+        self.warmup_seconds: Optional[float] = None
+        self.failures = 0
+        self.failed_at: Optional[float] = None
+        self.retrying = False
+        self.lock = threading.Lock()
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "required": self.required,
+            "load_seconds": self.load_seconds,
+            "warmup_seconds": self.warmup_seconds,
+            "error": self.error,
+            "failures": self.failures,
+        }
+
+
+class ComponentManager:
+    """
+    Owns the serving components. Components are registered up front and built
+    either on first use (`get`) or all at once, in parallel, by `load_all`.
+    Readiness is answered from cached state so probes never touch the models.
+    A failed component is retried (on `get`, or in the background via
+    `retry_failed`) once its backoff delay has passed, so a transient error at
+    boot does not leave it failed for the life of the process.
+    """
+    def __init__(self, retry_seconds: float = COMPONENT_RETRY_SECONDS,
+                 retry_max_seconds: float = COMPONENT_RETRY_MAX_SECONDS):
+        self.retry_seconds = retry_seconds
+        self.retry_max_seconds = retry_max_seconds
+        self._lock = threading.Lock()
+        self._components: Dict[str, Component] = {}
+        self._created_at = time.perf_counter()
+        self._startup_started: Optional[float] = None
+        self.startup_seconds: Optional[float] = None
+
+    def register(self, name: str, factory: Callable[[], Any], warmup: Optional[Callable[[Any], Any]] = None,
+                 required: bool = True):
+        self._components[name] = Component(name, factory, warmup=warmup, required=required)
+
+    def names(self):
+        return list(self._components)
+
+    def _retry_due(self, component: Component) -> bool:
+        delay = min(self.retry_seconds * 2 ** max(component.failures - 1, 0), self.retry_max_seconds)
+        return time.monotonic() - (component.failed_at or 0.0) >= delay
+
+    def _load(self, component: Component, warmup: bool = True) -> Any:
+        with component.lock:
+            if component.state == READY or (component.state == LOADED and not warmup):
+                return component.instance
+            if component.state == FAILED and not self._retry_due(component):
+                raise ComponentUnavailableError(f"Component '{component.name}' failed to load: {component.error}")
+            try:
+                if component.state == LOADED:
+                    instance = component.instance
+                else:
+                    component.state = LOADING
+                    started = time.perf_counter()
+                    instance = component.factory()
+                    component.load_seconds = time.perf_counter() - started
+                if not warmup:
+                    component.instance = instance
+                    component.state = LOADED
+                    logging.info(f"Component '{component.name}' loaded in {component.load_seconds:.2f}s (warm-up deferred)")
+                    return instance
+                if component.warmup is not None:
+                    component.state = WARMING_UP
+                    started = time.perf_counter()
+                    component.warmup(instance)
+                    component.warmup_seconds = time.perf_counter() - started
+            except Exception as e:
+                component.state = FAILED
+                component.error = str(e)
+                component.failures += 1
+                component.failed_at = time.monotonic()
+                logging.error(f"Component '{component.name}' failed to load (attempt {component.failures}): {e}")
+                raise ComponentUnavailableError(f"Component '{component.name}' failed to load: {e}") from e
+            component.instance = instance
+            component.state = READY
+            component.error = None
+            component.failures = 0
+            logging.info(f"Component '{component.name}' ready (load {component.load_seconds:.2f}s, "
+                         f"warm-up {component.warmup_seconds or 0.0:.2f}s)")
+            return instance
+
+    def get(self, name: str) -> Any:
+        """
+        Returns the component instance, loading and warming it up on first use.
+        """
+        component = self._components.get(name)
+        if component is None:
+            raise KeyError(f"Unknown component: {name}")
+        if component.state == READY:
+            return component.instance
+        return self._load(component)
+
+    def get_optional(self, name: str) -> Any:
+        """
+        Like `get`, but returns None for unregistered or failed optional components.
+        """
+        if name not in self._components:
+            return None
+        try:
+            return self.get(name)
+        except ComponentUnavailableError:
+            return None
+
+    def peek(self, name: str) -> Any:
+        """
+        Returns the instance if it is already loaded (warmed up or not), else None
+        (never triggers a load).
+        """
+        component = self._components.get(name)
+        return component.instance if component is not None and component.state in (READY, LOADED) else None
+
+    def replace(self, name: str, instance: Any) -> bool:
+        """
+        Swaps the instance of a loaded component (e.g. an index rebuilt after its
+        source data was reloaded). Returns False if the component is not loaded;
+        its factory will then build from the new data anyway.
+        """
+        component = self._components[name]
+        with component.lock:
+            if component.state not in (READY, LOADED):
+                return False
+            component.instance = instance
+            return True
+
+    def retry_failed(self) -> List[str]:
+        """
+        Starts a background reload of every failed component whose backoff has
+        passed (called from the readiness probe, so an instance taken out of
+        rotation still recovers without traffic). Returns their names.
+        """
+        due = []
+        with self._lock:
+            for component in self._components.values():
+                if component.state == FAILED and not component.retrying and self._retry_due(component):
+                    component.retrying = True
+                    due.append(component)
+        for component in due:
+            threading.Thread(target=self._retry, args=(component,), name=f"component-retry-{component.name}",
+                             daemon=True).start()
+        return [component.name for component in due]
+
+    def _retry(self, component: Component):
+        try:
+            self._load(component)
+        except ComponentUnavailableError:
+            pass
+        finally:
+            with self._lock:
+                component.retrying = False
+
+    def reset(self, name: str):
+        """
+        Clears a failed (or loaded) component so the next `get` retries the factory.
+        """
+        component = self._components[name]
+        with component.lock:
+            component.state = REGISTERED
+            component.instance = None
+            component.error = None
+            component.failures = 0
+            component.failed_at = None
+
+    def load_all(self, parallel: bool = True, max_workers: Optional[int] = None, warmup: bool = True,
+                 exclude: Iterable[str] = ()) -> Dict[str, Any]:
+        """
+        Loads and warms up every registered component. Failures are recorded, not raised.
+        `warmup=False` only builds them (state "loaded"); the warm-up then runs on first use
+        or on the next `load_all()`. Components named in `exclude` are left untouched.
+        """
+        self._startup_started = time.perf_counter()
+        excluded = set(exclude)
+        components = [c for name, c in self._components.items() if name not in excluded]
+
+        def load(component):
+            try:
+                self._load(component, warmup=warmup)
+            except ComponentUnavailableError:
+                pass
+
+        if parallel and len(components) > 1:
+            with ThreadPoolExecutor(max_workers=max_workers or len(components), thread_name_prefix="component-load") as pool:
+                list(pool.map(load, components))
+        else:
+            for component in components:
+                load(component)
+        self.startup_seconds = time.perf_counter() - self._startup_started
+        logging.info(f"Component startup finished in {self.startup_seconds:.2f}s (ready={self.is_ready()})")
+        return self.status()
+
+    def is_ready(self) -> bool:
+        return all(c.state == READY for c in self._components.values() if c.required)
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "ready": self.is_ready(),
+            "startup_seconds": self.startup_seconds,
+            "uptime_seconds": time.perf_counter() - self._created_at,
+            "components": {name: c.status() for name, c in self._components.items()},
+        }
+
+
+components = ComponentManager()
@@ -0,0 +1,241 @@
+"""
+Local, content-addressed cache for MLflow registry models: pods load the model
+from disk (memory-mapped) instead of re-downloading it, and keep starting when
+the registry is unreachable.
+"""
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+import joblib
+import mlflow
+from mlflow.tracking import MlflowClient
+
+MODEL_CACHE_DIR = os.getenv("MODEL_CACHE_DIR", "cache/models")
+# Seconds a stage -> version resolution is trusted before asking the registry again
+MODEL_STAGE_TTL_SECONDS = float(os.getenv("MODEL_STAGE_TTL_SECONDS", "300"))
+# Load cached models with joblib mmap_mode="r" so workers share the array pages
+MODEL_CACHE_MMAP = os.getenv("MODEL_CACHE_MMAP", "true").lower() in ("1", "true", "yes")
+MODEL_CACHE_ENABLED = os.getenv("MODEL_CACHE", "true").lower() in ("1", "true", "yes")
+
+REGISTRY_STAGES = ("None", "Staging", "Production", "Archived")
+
+
+def parse_model_uri(model_uri: str) -> Optional[Tuple[str, str]]:
+    """
+    Splits "models:/<name>/<stage or version>" into (name, stage_or_version);
+    returns None for any other URI (runs:/, local paths, aliases with "@").
+    """
+    if not model_uri.startswith("models:/"):
+        return None
+    parts = model_uri[len("models:/"):].strip("/").split("/")
+    if len(parts) != 2 or "@" in model_uri:
+        return None
+    return parts[0], parts[1]
+
+
+def hash_directory(path: str) -> str:
+    """
+    sha256 over the relative paths and contents of every file under `path`.
+    """
+    digest = hashlib.sha256()
+    for root, dirs, files in os.walk(path):
+        dirs.sort()
+        for name in sorted(files):
+            file_path = os.path.join(root, name)
+            digest.update(os.path.relpath(file_path, path).encode("utf-8"))
+            with open(file_path, "rb") as f:
+                for chunk in iter(lambda: f.read(1 << 20), b""):
+                    digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _write_json(path: str, payload: Dict[str, Any]):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    with os.fdopen(fd, "w") as f:
+        json.dump(payload, f)
+    os.replace(tmp, path)
+
+
+def _read_json(path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+class ModelCache:
+    """
+    On-disk cache of registry model versions.
+
+    Layout under `cache_dir`:
+      blobs/<sha256>.joblib           the unpickled model re-dumped with joblib (uncompressed,
+                                      so large NumPy arrays can be memory-mapped); <sha256> is
+                                      the hash of the downloaded MLflow artifact directory
+      refs/<name>/<version>.json      {"sha256", "source", "cached_at"}
+      refs/<name>/stages.json         {stage: {"version", "resolved_at"}}
+      artifacts/<name>/<version>/...  run artifacts logged next to a version's model (fetch_artifact)
+
+    Stage resolutions are refreshed after `stage_ttl_seconds`; if the registry
+    cannot be reached the last persisted resolution is used, however old.
+    """
+    def __init__(self, cache_dir: str = MODEL_CACHE_DIR, tracking_uri: Optional[str] = None,
+                 stage_ttl_seconds: float = MODEL_STAGE_TTL_SECONDS, mmap: bool = MODEL_CACHE_MMAP):
+        self.cache_dir = cache_dir
+        self.tracking_uri = tracking_uri
+        self.stage_ttl_seconds = stage_ttl_seconds
+        self.mmap = mmap
+        self._lock = threading.Lock()
+        self._counts = {"hits": 0, "misses": 0, "stage_lookups": 0, "stale_stage_resolutions": 0}
+
+    def _client(self) -> MlflowClient:
+        return MlflowClient(tracking_uri=self.tracking_uri)
+
+    def _count(self, key: str):
+        with self._lock:
+            self._counts[key] += 1
+
+    def _ref_path(self, name: str, version: str) -> str:
+        return os.path.join(self.cache_dir, "refs", name, f"{version}.json")
+
+    def _stages_path(self, name: str) -> str:
+        return os.path.join(self.cache_dir, "refs", name, "stages.json")
+
+    def blob_path(self, sha256: str) -> str:
+        return os.path.join(self.cache_dir, "blobs", f"{sha256}.joblib")
+
+    def resolve(self, name: str, stage_or_version: str, refresh: bool = False) -> str:
+        """
+        Returns the concrete version for a stage (or the version itself).
+        `refresh=True` ignores the TTL and asks the registry (still falling back when offline).
+        """
+        if stage_or_version.isdigit():
+            return stage_or_version
+        stage = stage_or_version
+        stages_path = self._stages_path(name)
+        resolutions = _read_json(stages_path) or {}
+        cached = resolutions.get(stage)
+        if cached and not refresh and time.time() - cached["resolved_at"] < self.stage_ttl_seconds:
+            return cached["version"]
+        try:
+            self._count("stage_lookups")
+            if stage in REGISTRY_STAGES:
+                versions = self._client().get_latest_versions(name, stages=[stage])
+                if not versions:
+                    raise LookupError(f"No version of model '{name}' in stage '{stage}'")
+                version = str(versions[0].version)
+            else:
+                version = str(self._client().get_model_version_by_alias(name, stage).version)
+        except Exception as e:
+            if cached:
+                self._count("stale_stage_resolutions")
+                logging.warning(f"Could not resolve {name}/{stage} from the registry ({e}); "
+                                f"using cached version {cached['version']}")
+                return cached["version"]
+            raise
+        resolutions[stage] = {"version": version, "resolved_at": time.time()}
+        _write_json(stages_path, resolutions)
+        return version
+
+    def fetch(self, name: str, version: str) -> str:
+        """
+        Ensures the model version is in the cache and returns its blob path.
+        """
+        ref = _read_json(self._ref_path(name, version))
+        if ref and os.path.exists(self.blob_path(ref["sha256"])):
+            self._count("hits")
+            return self.blob_path(ref["sha256"])
+        self._count("misses")
+        source = f"models:/{name}/{version}"
+        logging.info(f"Model cache miss for {source}; downloading from the registry")
+        download_dir = tempfile.mkdtemp(prefix="model-cache-")
+        try:
+            if self.tracking_uri:
+                mlflow.set_tracking_uri(self.tracking_uri)
+            local_dir = mlflow.artifacts.download_artifacts(artifact_uri=source, dst_path=download_dir)
+            sha256 = hash_directory(local_dir)
+            blob = self.blob_path(sha256)
+            if not os.path.exists(blob):
+                model = mlflow.sklearn.load_model(local_dir)
+                os.makedirs(os.path.dirname(blob), exist_ok=True)
+                fd, tmp = tempfile.mkstemp(dir=os.path.dirname(blob), suffix=".tmp")
+                os.close(fd)
+                joblib.dump(model, tmp)
+                os.replace(tmp, blob)
+        finally:
+            shutil.rmtree(download_dir, ignore_errors=True)
+        _write_json(self._ref_path(name, version), {"sha256": sha256, "source": source, "cached_at": time.time()})
+        logging.info(f"Cached {source} as {os.path.basename(blob)}")
+        return blob
+
+    def fetch_artifact(self, name: str, version: str, artifact_path: str) -> Optional[str]:
+        """
+        Local path of an artifact logged in the run that produced a model version
+        (e.g. "explainability/shap_store.npz"), downloaded once; None if the run
+        has no such artifact. Registry / download errors are raised, so callers
+        can tell a missing artifact from a transient failure.
+        """
+        local_path = os.path.join(self.cache_dir, "artifacts", name, str(version), artifact_path)
+        if os.path.exists(local_path):
+            self._count("hits")
+            return local_path
+        self._count("misses")
+        if self.tracking_uri:
+            mlflow.set_tracking_uri(self.tracking_uri)
+        client = self._client()
+        run_id = client.get_model_version(name, str(version)).run_id
+        parent = os.path.dirname(artifact_path)
+        if artifact_path not in {a.path for a in client.list_artifacts(run_id, parent or None)}:
+            logging.info(f"No artifact {artifact_path} for models:/{name}/{version} (run {run_id})")
+            return None
+        download_dir = tempfile.mkdtemp(prefix="model-cache-")
+        try:
+            downloaded = mlflow.artifacts.download_artifacts(run_id=run_id, artifact_path=artifact_path,
+                                                             dst_path=download_dir)
+            os.makedirs(os.path.dirname(local_path), exist_ok=True)
+            shutil.move(downloaded, local_path + ".tmp")
+            os.replace(local_path + ".tmp", local_path)
+        finally:
+            shutil.rmtree(download_dir, ignore_errors=True)
+        return local_path
+
+    def load(self, name: str, stage_or_version: str) -> Any:
+        version = self.resolve(name, stage_or_version)
+        blob = self.fetch(name, version)
+        return joblib.load(blob, mmap_mode="r" if self.mmap else None)
+
+    def load_uri(self, model_uri: str) -> Any:
+        """
+        Loads "models:/<name>/<stage or version>" through the cache; other URIs
+        go straight to mlflow.sklearn.load_model.
+        """
+        parsed = parse_model_uri(model_uri)
+        if parsed is None:
+            return mlflow.sklearn.load_model(model_uri)
+        return self.load(*parsed)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counts = dict(self._counts)
+        return {"cache_dir": self.cache_dir, "mmap": self.mmap, **counts}
+
+
+model_cache = ModelCache()
+
+
+def load_model(model_uri: str) -> Any:
+    """
+    Drop-in replacement for mlflow.sklearn.load_model(model_uri) that goes
+    through the shared local cache (disable with MODEL_CACHE=false).
+    """
+    if not MODEL_CACHE_ENABLED:
+        return mlflow.sklearn.load_model(model_uri)
+    return model_cache.load_uri(model_uri)
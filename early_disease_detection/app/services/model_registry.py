@@ -0,0 +1,197 @@
+"""
+In-process model registry: one shared, versioned production model per worker,
+hot-swapped when a new version is promoted in the MLflow registry.
+"""
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import mlflow
+import numpy as np
+
+from app.core.compiled_forest import PREDICTOR_COMPILED, compile_model
+from app.services.model_cache import ModelCache, model_cache
+
+MLFLOW_TRACKING_URI = os.getenv("MLFLOW_TRACKING_URI", "http://localhost:5000")
+MODEL_NAME = os.getenv("MODEL_NAME", "disease_predictor")
+MODEL_STAGE = os.getenv("MODEL_STAGE", "Production")
+# Seconds between registry polls for a newly promoted version (0 disables polling)
+MODEL_REGISTRY_POLL_SECONDS = float(os.getenv("MODEL_REGISTRY_POLL_SECONDS", "60"))
+
+
+def warmup_model(model: Any):
+    model.predict(np.zeros((1, getattr(model, "n_features_in_", 1))))
+
+
+class ModelHandle:
+    """
+    An immutable snapshot of one loaded model version. Callers take a handle
+    once per request and use it throughout, so a swap never mixes versions.
+    """
+    def __init__(self, name: str, version: str, model: Any, compiled: Any = None):
+        self.name = name
+        self.version = version
+        self.model = model
+        self.compiled = compiled
+        self.loaded_at = time.time()
+
+    @property
+    def scorer(self) -> Any:
+        return self.compiled if self.compiled is not None else self.model
+
+
+class ModelRegistry:
+    """
+    Owns the loaded production model. `current()` hands out the active
+    ModelHandle; `refresh()` (called by the poll thread) loads a newly promoted
+    version in the background, warms it up and swaps the reference atomically.
+    Requests already holding the old handle finish on it; the old model is
+    freed once the last of them drops its reference.
+    """
+    def __init__(self, name: str = MODEL_NAME, stage: str = MODEL_STAGE, cache: ModelCache = model_cache,
+                 tracking_uri: Optional[str] = MLFLOW_TRACKING_URI, poll_interval: float = MODEL_REGISTRY_POLL_SECONDS,
+                 compiled: bool = PREDICTOR_COMPILED, warmup: Optional[Callable[[Any], Any]] = warmup_model):
+        self.name = name
+        self.stage = stage
+        self.cache = cache
+        self.tracking_uri = tracking_uri
+        self.poll_interval = poll_interval
+        self.compiled = compiled
+        self.warmup = warmup
+        self._current: Optional[ModelHandle] = None
+        self._load_lock = threading.Lock()
+        self._listeners: List[Callable[[ModelHandle], Any]] = []
+        self._preparers: List[Callable[[ModelHandle], Any]] = []
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._swaps = 0
+        self._refresh_errors = 0
+        self.last_swap_seconds: Optional[float] = None
+
+    def configure(self, name: Optional[str] = None, stage: Optional[str] = None, tracking_uri: Optional[str] = None):
+        """
+        Overrides the registry coordinates before the first load (e.g. after load_dotenv()).
+        """
+        if self._current is not None:
+            raise RuntimeError("ModelRegistry.configure() must be called before the model is loaded")
+        self.name = name or self.name
+        self.stage = stage or self.stage
+        self.tracking_uri = tracking_uri or self.tracking_uri
+
+    def _build(self, version: str) -> ModelHandle:
+        model = self.cache.load(self.name, version)
+        compiled = compile_model(model) if self.compiled else None
+        if self.warmup is not None:
+            self.warmup(model)
+            if compiled is not None:
+                self.warmup(compiled)
+        return ModelHandle(self.name, version, model, compiled)
+
+    def load(self) -> "ModelRegistry":
+        """
+        Loads the current stage version if nothing is loaded yet and starts polling.
+        """
+        self.current()
+        if self.poll_interval > 0:
+            self.start()
+        return self
+
+    def current(self) -> ModelHandle:
+        handle = self._current
+        if handle is not None:
+            return handle
+        with self._load_lock:
+            if self._current is None:
+                if self.tracking_uri:
+                    mlflow.set_tracking_uri(self.tracking_uri)
+                version = self.cache.resolve(self.name, self.stage)
+                logging.info(f"Loading model {self.name} version {version} ({self.stage})")
+                self._current = self._build(version)
+            return self._current
+
+    def peek(self) -> Optional[ModelHandle]:
+        """
+        Returns the active handle, or None if no model is loaded (never triggers a load).
+        """
+        return self._current
+
+    def add_listener(self, listener: Callable[[ModelHandle], Any], before_swap: bool = False):
+        """
+        Registers a callback run with the new handle after every swap (e.g. to drop
+        caches of the previous version). With `before_swap=True` it runs on the poll
+        thread before the new version goes live, to build per-version state (explainers, ...)
+        off the request path.
+        """
+        (self._preparers if before_swap else self._listeners).append(listener)
+
+    def _notify(self, listeners: List[Callable[[ModelHandle], Any]], handle: ModelHandle):
+        for listener in listeners:
+            try:
+                listener(handle)
+            except Exception as e:
+                logging.error(f"Model swap listener failed: {e}")
+
+    def refresh(self) -> bool:
+        """
+        Checks the registry for a different version in `stage`; loads and swaps it in.
+        Returns True if a swap happened.
+        """
+        version = self.cache.resolve(self.name, self.stage, refresh=True)
+        current = self._current
+        if current is not None and current.version == version:
+            return False
+        started = time.perf_counter()
+        # Built outside the lock: requests keep using the old handle meanwhile
+        handle = self._build(version)
+        self._notify(self._preparers, handle)
+        with self._load_lock:
+            previous = self._current
+            self._current = handle
+            self._swaps += 1
+        self.last_swap_seconds = time.perf_counter() - started
+        logging.info(f"Swapped model {self.name}: {previous.version if previous else None} -> {version} "
+                     f"(loaded in {self.last_swap_seconds:.2f}s)")
+        self._notify(self._listeners, handle)
+        return True
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="model-registry-poll", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        """
+        Stops polling and waits up to `timeout` seconds for a refresh in progress to finish.
+        """
+        self._stop.set()
+        thread = self._thread
+        if thread is not None and thread.is_alive() and thread is not threading.current_thread():
+            thread.join(timeout)
+
+    def _run(self):
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                self._refresh_errors += 1
+                logging.error(f"Model registry refresh failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        handle = self._current
+        return {
+            "name": self.name,
+            "stage": self.stage,
+            "version": handle.version if handle else None,
+            "compiled": bool(handle and handle.compiled is not None),
+            "loaded_at": handle.loaded_at if handle else None,
+            "swaps": self._swaps,
+            "refresh_errors": self._refresh_errors,
+            "last_swap_seconds": self.last_swap_seconds,
+            "poll_interval": self.poll_interval,
+        }
+
+
+model_registry = ModelRegistry()
@@ -0,0 +1,198 @@
+"""
+Shadow scoring: a candidate model version re-scores live /predict and /symptoms
+inputs on a background thread, and its agreement with the primary is recorded.
+"""
+import logging
+import os
+import queue
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from app.core.predict_batching import labels_and_confidences
+from app.services.model_registry import ModelRegistry
+from app.utils.metrics import Histogram
+
+# Stage (or alias / version number) of the candidate to shadow; unset disables shadow mode
+SHADOW_MODEL_STAGE = os.getenv("SHADOW_MODEL_STAGE", "")
+# Pending shadow jobs; submissions beyond this are dropped rather than queued
+SHADOW_QUEUE_SIZE = int(os.getenv("SHADOW_QUEUE_SIZE", "1000"))
+# Added to the shadow thread's nice value (Linux applies it per thread; higher means lower priority) so it yields CPU to requests
+SHADOW_NICE = int(os.getenv("SHADOW_NICE", "10"))
+
+DELTA_BUCKETS = [0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1.0]
+SCORE_MS_BUCKETS = [0.5, 1, 2, 5, 10, 25, 50, 100, 250]
+ENQUEUE_US_BUCKETS = [1, 2, 5, 10, 25, 50, 100, 250]
+
+_STOP = object()
+
+
+class ShadowComparison:
+    """
+    Running agreement statistics for one (source, primary version, candidate version).
+    """
+    def __init__(self):
+        self.batches = 0
+        self.rows = 0
+        self.agreed = 0
+        self.delta_sum = 0.0
+        self.delta_max = 0.0
+        self.delta_hist = Histogram(DELTA_BUCKETS)
+        self.score_ms_hist = Histogram(SCORE_MS_BUCKETS)
+
+    def record(self, primary_labels: List[Any], primary_confidences: Optional[List[float]],
+               labels: List[Any], confidences: Optional[List[float]], score_ms: float):
+        self.batches += 1
+        self.rows += len(labels)
+        self.agreed += sum(1 for a, b in zip(primary_labels, labels) if a == b)
+        self.score_ms_hist.observe(score_ms)
+        if primary_confidences is not None and confidences is not None:
+            deltas = np.abs(np.asarray(confidences) - np.asarray(primary_confidences))
+            self.delta_sum += float(deltas.sum())
+            self.delta_max = max(self.delta_max, float(deltas.max(initial=0.0)))
+            for delta in deltas:
+                self.delta_hist.observe(float(delta))
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "batches": self.batches,
+            "rows": self.rows,
+            "agreement_rate": self.agreed / self.rows if self.rows else None,
+            "mean_abs_delta": self.delta_sum / self.rows if self.rows else None,
+            "max_abs_delta": self.delta_max,
+            "abs_delta": self.delta_hist.snapshot(),
+            "score_ms": self.score_ms_hist.snapshot(),
+        }
+
+
+class ShadowScorer:
+    """
+    Scores inputs with a candidate model after the primary has answered.
+
+    `submit` only does a non-blocking put on a bounded queue (and drops the job
+    if the queue is full), so the primary response never waits on the shadow.
+    `candidate` is a ModelRegistry for the candidate stage; it is only read on
+    the worker thread, so the candidate is loaded (and hot-swapped) off the
+    request path.
+    """
+    def __init__(self, candidate: Any, queue_size: int = SHADOW_QUEUE_SIZE):
+        self.candidate = candidate
+        self._queue: "queue.Queue" = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+        self._comparisons: Dict[str, ShadowComparison] = {}
+        self._submitted = 0
+        self._dropped = 0
+        self._errors = 0
+        self.enqueue_us_hist = Histogram(ENQUEUE_US_BUCKETS)
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="shadow-scorer", daemon=True)
+                self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+        if thread is not None and thread.is_alive():
+            try:
+                self._queue.put(_STOP, timeout=timeout)
+            except queue.Full:
+                return
+            thread.join(timeout)
+
+    def submit(self, X: Any, primary_labels: List[Any], primary_confidences: Optional[List[float]],
+               primary_version: Optional[str] = None, source: str = "predict") -> bool:
+        """
+        Queues a shadow comparison; returns False if it was shed because the queue is full.
+        """
+        started = time.perf_counter()
+        thread = self._thread
+        if thread is None or not thread.is_alive():
+            self.start()
+        try:
+            self._queue.put_nowait((X, primary_labels, primary_confidences, primary_version, source))
+            accepted = True
+        except queue.Full:
+            accepted = False
+        with self._lock:
+            self._submitted += 1
+            if not accepted:
+                self._dropped += 1
+        self.enqueue_us_hist.observe((time.perf_counter() - started) * 1e6)
+        return accepted
+
+    def drain(self, timeout: float = 5.0) -> bool:
+        """
+        Waits until every queued job has been scored (used by tests and benchmarks).
+        """
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.005)
+        return self._queue.unfinished_tasks == 0
+
+    def _run(self):
+        try:
+            thread_id = threading.get_native_id()
+            os.setpriority(os.PRIO_PROCESS, thread_id, min(os.getpriority(os.PRIO_PROCESS, thread_id) + SHADOW_NICE, 19))
+        except (AttributeError, OSError) as e:
+            logging.info(f"Could not lower shadow thread priority: {e}")
+        while True:
+            job = self._queue.get()
+            try:
+                if job is _STOP:
+                    return
+                self._score(*job)
+            except Exception as e:
+                with self._lock:
+                    self._errors += 1
+                logging.error(f"Shadow scoring failed: {e}")
+            finally:
+                self._queue.task_done()
+
+    def _score(self, X, primary_labels, primary_confidences, primary_version, source):
+        # load() also starts the candidate's promotion polling (idempotent)
+        handle = self.candidate.load().current()
+        started = time.perf_counter()
+        scorer = handle.scorer
+        X = np.asarray(X)
+        if hasattr(scorer, "predict_proba"):
+            labels, confidences = labels_and_confidences(scorer.classes_, scorer.predict_proba(X))
+        else:
+            labels, confidences = scorer.predict(X).tolist(), None
+        score_ms = (time.perf_counter() - started) * 1000.0
+        key = f"{source}:{primary_version or 'unknown'}->{handle.version}"
+        with self._lock:
+            comparison = self._comparisons.setdefault(key, ShadowComparison())
+            comparison.record(primary_labels, primary_confidences, labels, confidences, score_ms)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            comparisons = {key: c.snapshot() for key, c in self._comparisons.items()}
+            submitted, dropped, errors = self._submitted, self._dropped, self._errors
+        return {
+            "queue_depth": self._queue.qsize(),
+            "queue_size": self._queue.maxsize,
+            "submitted": submitted,
+            "dropped": dropped,
+            "errors": errors,
+            "enqueue_us": self.enqueue_us_hist.snapshot(),
+            "comparisons": comparisons,
+        }
+
+
+def build_shadow_scorer(stage: str = SHADOW_MODEL_STAGE) -> Optional[ShadowScorer]:
+    """
+    Shadow scorer for the candidate in `stage`, or None when shadow mode is off.
+    Call `candidate.configure(...)` to point it at the same registry as the primary.
+    """
+    if not stage:
+        return None
+    return ShadowScorer(ModelRegistry(stage=stage))
+
+
+shadow_scorer = build_shadow_scorer()
@@ -0,0 +1,29 @@
+"""
+Process memory readings from /proc (Linux): RSS and PSS per process.
+"""
+import logging
+from typing import Dict, Optional, Union
+
+
+def read_memory_kb(pid: Union[int, str] = "self") -> Dict[str, Optional[int]]:
+    """
+    Returns {"rss_kb", "pss_kb", "shared_kb", "private_kb"} from /proc/<pid>/smaps_rollup.
+    PSS splits each shared page evenly across the processes mapping it, so the
+    PSS of all workers adds up to their real footprint (RSS double-counts).
+    Values are None where the kernel does not provide them.
+    """
+    fields = {"Rss": "rss_kb", "Pss": "pss_kb", "Shared_Clean": "shared_kb", "Shared_Dirty": "shared_kb",
+              "Private_Clean": "private_kb", "Private_Dirty": "private_kb"}
+    result: Dict[str, Optional[int]] = {"rss_kb": None, "pss_kb": None, "shared_kb": None, "private_kb": None}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                key, _, rest = line.partition(":")
+                name = fields.get(key)
+                if name is None:
+                    continue
+                value = int(rest.split()[0])
+                result[name] = (result[name] or 0) + value
+    except (OSError, ValueError) as e:
+        logging.warning(f"Could not read memory usage of process {pid}: {e}")
+    return result
@@ -0,0 +1,74 @@
+"""
+Lightweight in-process metrics for Calmora serving components.
+"""
+import threading
+from typing import Any, Callable, Dict, Iterable
+
+
+class Histogram:
+    """
+    Cumulative bucket histogram (Prometheus-style "le" buckets) with count and sum.
+    """
+    def __init__(self, buckets: Iterable[float]):
+        self.buckets = sorted(float(b) for b in buckets)
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._count = 0
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        with self._lock:
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    self._counts[i] += 1
+                    break
+            else:
+                self._counts[-1] += 1
+            self._count += 1
+            self._sum += value
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            cumulative = 0
+            buckets = {}
+            for bound, count in zip(self.buckets, self._counts):
+                cumulative += count
+                buckets[f"le_{bound:g}"] = cumulative
+            buckets["le_inf"] = self._count
+            return {
+                "buckets": buckets,
+                "count": self._count,
+                "sum": self._sum,
+                "mean": self._sum / self._count if self._count else 0.0,
+            }
+
+
+class MetricsRegistry:
+    """
+    Collects stats from registered providers so they can be served from one endpoint.
+    """
+    def __init__(self):
+        self._providers: Dict[str, Callable[[], Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, provider: Callable[[], Dict[str, Any]]):
+        with self._lock:
+            self._providers[name] = provider
+
+    def unregister(self, name: str):
+        with self._lock:
+            self._providers.pop(name, None)
+
+    def collect(self) -> Dict[str, Any]:
+        with self._lock:
+            providers = dict(self._providers)
+        snapshot = {}
+        for name, provider in providers.items():
+            try:
+                snapshot[name] = provider()
+            except Exception as e:
+                snapshot[name] = {"error": str(e)}
+        return snapshot
+
+
+metrics_registry = MetricsRegistry()
@@ -0,0 +1,14 @@
+"""
+Text normalization helpers shared by the symptom extraction components.
+"""
+import re
+
+_PUNCTUATION_RE = re.compile(r"[^\w\s]+")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+def normalize_text(text: str) -> str:
+    """
+    Canonical form of free text: lower-case, punctuation dropped, whitespace collapsed.
+    """
+    text = _PUNCTUATION_RE.sub(" ", text.lower())
+    return _WHITESPACE_RE.sub(" ", text).strip()
@@ -0,0 +1,57 @@
+"""
+Benchmarks CompiledForest against sklearn's RandomForestClassifier.predict_proba:
+p50/p99 latency per call for batch sizes 1, 32 and 1024, plus an exact-equality check.
+
+Usage: python benchmarks/bench_compiled_forest.py [--trees 100] [--max-depth 10] [--features 5] [--repeat 300]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.core.compiled_forest import CompiledForest  # noqa: E402
+
+
+def latency(fn, X, repeat):
+    latencies = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(X)
+        latencies.append((time.perf_counter() - t0) * 1000.0)
+    return np.percentile(latencies, 50), np.percentile(latencies, 99)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--trees", type=int, default=100)
+    parser.add_argument("--max-depth", type=int, default=10)
+    parser.add_argument("--features", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=300)
+    parser.add_argument("--batch-sizes", default="1,32,1024")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(5000, args.features))
+    y = (X[:, 0] + 0.5 * X[:, 1] + rng.normal(0, 0.5, len(X)) > 0).astype(int)
+    model = RandomForestClassifier(n_estimators=args.trees, max_depth=args.max_depth, random_state=42).fit(X, y)
+    compiled = CompiledForest(model)
+
+    print(f"{args.trees} trees, max_depth={args.max_depth}, {args.features} features")
+    print(f"{'batch':>6} {'sklearn p50':>12} {'sklearn p99':>12} {'compiled p50':>13} {'compiled p99':>13} {'speedup':>8} {'identical':>9}")
+    for batch in [int(b) for b in args.batch_sizes.split(",")]:
+        X_batch = rng.normal(size=(batch, args.features))
+        identical = np.array_equal(model.predict_proba(X_batch), compiled.predict_proba(X_batch))
+        repeat = max(10, args.repeat // max(1, batch // 32))
+        sk_p50, sk_p99 = latency(model.predict_proba, X_batch, repeat)
+        c_p50, c_p99 = latency(compiled.predict_proba, X_batch, repeat)
+        print(f"{batch:>6} {sk_p50:>10.3f}ms {sk_p99:>10.3f}ms {c_p50:>11.3f}ms {c_p99:>11.3f}ms "
+              f"{sk_p50 / c_p50:>7.1f}x {str(identical):>9}")
+
+
+if __name__ == "__main__":
+    main()
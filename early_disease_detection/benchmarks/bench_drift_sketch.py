@@ -0,0 +1,58 @@
+"""
+Drift sketches: time and peak memory to fold a large live window into the
+reference profile's sketches and score it (PSI / KS / Jensen-Shannon), versus
+the row count. Memory stays flat because only per-bin counts are kept.
+
+Usage: python benchmarks/bench_drift_sketch.py [--rows 10000,100000,1000000] [--features 10] [--batch 10000]
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.core.drift_sketch import Profile, drift_scores  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--reference-rows", type=int, default=100000)
+    parser.add_argument("--rows", default="10000,100000,1000000")
+    parser.add_argument("--features", type=int, default=10)
+    parser.add_argument("--batch", type=int, default=10000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    columns = [f"f{i}" for i in range(args.features)]
+    t0 = time.perf_counter()
+    reference = Profile.from_frame(pd.DataFrame(rng.normal(size=(args.reference_rows, args.features)), columns=columns))
+    print(f"reference profile: {args.reference_rows} rows x {args.features} features in "
+          f"{(time.perf_counter() - t0) * 1000.0:.0f} ms")
+
+    print(f"{'rows':>9} {'fold ms':>9} {'score ms':>9} {'peak MB':>8} {'drifted':>8}")
+    for rows in [int(r) for r in args.rows.split(",")]:
+        window = reference.empty()
+        tracemalloc.start()
+        t0 = time.perf_counter()
+        for start in range(0, rows, args.batch):
+            n = min(args.batch, rows - start)
+            # Half the features drift by 0.5 standard deviations
+            batch = rng.normal(size=(n, args.features))
+            batch[:, : args.features // 2] += 0.5
+            window.update(pd.DataFrame(batch, columns=columns))
+        fold_ms = (time.perf_counter() - t0) * 1000.0
+        t0 = time.perf_counter()
+        result = drift_scores(reference, window)
+        score_ms = (time.perf_counter() - t0) * 1000.0
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"{rows:>9} {fold_ms:>9.0f} {score_ms:>9.2f} {peak / 2**20:>8.1f} {len(result['drifted_features']):>8}")
+
+
+if __name__ == "__main__":
+    main()
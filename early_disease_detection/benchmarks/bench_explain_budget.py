@@ -0,0 +1,71 @@
+"""
+Latency and fidelity of budgeted KernelExplainer explanations: for each budget,
+explains a few rows with explain_within_budget and compares the SHAP values to
+a high-nsamples reference (mean absolute error relative to the reference's mean
+magnitude, and top-3 feature agreement).
+
+Usage: python benchmarks/bench_explain_budget.py [--features 20] [--rows 5] [--budgets 25,50,100,250,1000]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import shap
+from sklearn.linear_model import LogisticRegression
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.core.budgeted_shap import explain_within_budget  # noqa: E402
+from app.core.explainer_cache import summarize_background  # noqa: E402
+
+
+def positive_class(values):
+    values = np.asarray(values)
+    return values[..., 1] if values.ndim == 3 else values
+
+
+def top_k(values, k=3):
+    return set(np.argsort(-np.abs(values))[:k])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--features", type=int, default=20)
+    parser.add_argument("--rows", type=int, default=5)
+    parser.add_argument("--background", type=int, default=50)
+    parser.add_argument("--budgets", default="25,50,100,250,1000")
+    parser.add_argument("--reference-samples", type=int, default=20000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    X = rng.random((5000, args.features))
+    weights = rng.normal(0, 1, args.features)
+    y = (X @ weights + rng.normal(0, 0.5, len(X)) > weights.sum() / 2).astype(int)
+    model = LogisticRegression(max_iter=1000).fit(X, y)
+    t0 = time.perf_counter()
+    explainer = shap.KernelExplainer(model.predict_proba, summarize_background(X, args.features, args.background))
+    print(f"{args.features} features, background {args.background} centroids "
+          f"(built in {time.perf_counter() - t0:.2f}s)")
+    rows = X[:args.rows]
+    reference = [positive_class(explainer.shap_values(row[None, :], nsamples=args.reference_samples, silent=True))[0]
+                 for row in rows]
+
+    print(f"{'budget ms':>9} {'p50 ms':>8} {'max ms':>8} {'nsamples':>9} {'rel MAE':>8} {'top-3':>6}")
+    for budget in [float(b) for b in args.budgets.split(",")]:
+        latencies, samples, errors, agreement = [], [], [], []
+        for row, ref in zip(rows, reference):
+            started = time.perf_counter()
+            values, quality = explain_within_budget(explainer, row[None, :], budget_ms=budget)
+            latencies.append((time.perf_counter() - started) * 1000.0)
+            values = positive_class(values)[0]
+            samples.append(quality["nsamples"])
+            errors.append(np.mean(np.abs(values - ref)) / (np.mean(np.abs(ref)) or 1.0))
+            agreement.append(len(top_k(values) & top_k(ref)) / 3)
+        print(f"{budget:>9.0f} {np.median(latencies):>8.1f} {max(latencies):>8.1f} {int(np.median(samples)):>9} "
+              f"{np.mean(errors):>8.3f} {np.mean(agreement):>6.2f}")
+
+
+if __name__ == "__main__":
+    main()
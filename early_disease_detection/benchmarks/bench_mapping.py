@@ -0,0 +1,122 @@
+"""
+Benchmarks SymptomMapping.map_symptoms (precomputed inverted index) against the
+previous per-symptom DataFrame scan on synthetic mapping tables of increasing size.
+
+Compares CSV loading with the compiled, memory-mapped artifact (load time and
+private heap allocated per worker, measured with tracemalloc).
+
+Also times SymptomMapping.map_symptoms_batch (sparse matrix scoring) against a
+loop of map_symptoms calls for offline re-scoring of many records.
+
+Usage: python benchmarks/bench_mapping.py [--sizes 1000,10000,100000,500000] [--queries 200]
+                                          [--batch-records 1000000]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.core.mapping_artifact import compile_mapping  # noqa: E402
+from app.core.mappings import SymptomMapping  # noqa: E402
+
+
+def synthetic_mapping(n_rows: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    n_symptoms = max(10, n_rows // 20)
+    n_diseases = max(5, n_rows // 200)
+    return pd.DataFrame({
+        "symptom": [f"symptom {i}" for i in rng.integers(0, n_symptoms, n_rows)],
+        "disease": [f"disease {i}" for i in rng.integers(0, n_diseases, n_rows)],
+        "weight": rng.random(n_rows).round(3),
+    })
+
+
+def legacy_map_symptoms(df: pd.DataFrame, symptoms):
+    scores = {}
+    for symptom in symptoms:
+        matches = df[df['symptom'].str.lower() == symptom.lower()]
+        for _, row in matches.iterrows():
+            weight = row['weight'] if 'weight' in row and not pd.isnull(row['weight']) else 1.0
+            scores[row['disease']] = scores.get(row['disease'], 0) + float(weight)
+    if scores:
+        max_score = max(scores.values())
+        for k in scores:
+            scores[k] = scores[k] / max_score
+    return scores
+
+
+def load_profile(**kwargs):
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    mapping = SymptomMapping(watch_interval=0, **kwargs)
+    elapsed = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return mapping, elapsed, peak / 2 ** 20
+
+
+def timed(fn, queries):
+    latencies = []
+    for q in queries:
+        t0 = time.perf_counter()
+        fn(q)
+        latencies.append((time.perf_counter() - t0) * 1000.0)
+    return float(np.percentile(latencies, 50)), float(np.percentile(latencies, 99))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1000,10000,100000,500000")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--legacy-queries", type=int, default=10, help="Queries for the slow DataFrame scan")
+    parser.add_argument("--batch-records", type=int, default=1000000, help="Symptom lists for the batch benchmark")
+    args = parser.parse_args()
+
+    print(f"{'rows':>8} {'csv load':>9} {'csv heap':>9} {'bin load':>9} {'bin heap':>9} "
+          f"{'index p50':>10} {'index p99':>10} {'scan p50':>10} {'speedup':>8} {'same':>5}")
+    for n_rows in [int(s) for s in args.sizes.split(",")]:
+        df = synthetic_mapping(n_rows)
+        vocab = df["symptom"].unique()
+        rng = np.random.default_rng(1)
+        queries = [list(rng.choice(vocab, rng.integers(1, 6))) for _ in range(args.queries)]
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "mapping.csv")
+            df.to_csv(path, index=False)
+            artifact = os.path.join(tmpdir, "mapping.calmap")
+            compile_mapping(path, artifact)
+            mapping, load_s, heap_mb = load_profile(mapping_csv=path, artifact_path=None)
+            compiled, bin_load_s, bin_heap_mb = load_profile(mapping_csv=path, artifact_path=artifact)
+            assert all(compiled.map_symptoms(q) == mapping.map_symptoms(q) for q in queries)
+        reference_df = mapping.df
+        index_p50, index_p99 = timed(mapping.map_symptoms, queries)
+        legacy = queries[:args.legacy_queries]
+        scan_p50, _ = timed(lambda q: legacy_map_symptoms(reference_df, q), legacy)
+        same = all(mapping.map_symptoms(q) == legacy_map_symptoms(reference_df, q) for q in legacy)
+        print(f"{n_rows:>8} {load_s:>8.3f}s {heap_mb:>7.1f}MB {bin_load_s:>8.3f}s {bin_heap_mb:>7.1f}MB {index_p50:>9.3f}ms {index_p99:>9.3f}ms {scan_p50:>9.2f}ms "
+              f"{scan_p50 / index_p50:>7.0f}x {str(same):>5}")
+
+    # Batch scoring on the largest table
+    records = [list(rng.choice(vocab, rng.integers(1, 6))) for _ in range(args.batch_records)]
+    sample = records[:min(len(records), 10000)]
+    t0 = time.perf_counter()
+    for symptoms in sample:
+        mapping.map_symptoms(symptoms)
+    loop_s = (time.perf_counter() - t0) * len(records) / len(sample)
+    timings = {}
+    for output in ("sparse", "dict"):
+        t0 = time.perf_counter()
+        mapping.map_symptoms_batch(records, output=output)
+        timings[output] = time.perf_counter() - t0
+    print(f"\nbatch scoring of {len(records)} records on {n_rows} rows: map_symptoms loop ~{loop_s:.1f}s (extrapolated), "
+          f"map_symptoms_batch sparse {timings['sparse']:.1f}s, dict {timings['dict']:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
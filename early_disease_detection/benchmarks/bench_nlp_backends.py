@@ -0,0 +1,104 @@
+"""
+Compares SymptomNLP backends (torch / onnx / onnx-int8): entity parity against
+PyTorch, per-text latency and resident memory.
+
+Usage: python benchmarks/bench_nlp_backends.py [--texts texts.txt] [--repeat 20]
+
+Each backend runs in its own subprocess so RSS numbers are not polluted by the
+other backends' weights. "rss_mb" is the process total after the run,
+"model_mb" the growth from loading and running the backend.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+DEFAULT_TEXTS = [
+    "I have a fever and cough.",
+    "Severe headache and nausea since yesterday.",
+    "Shortness of breath and chest pain when climbing stairs.",
+    "Just feeling tired.",
+    "Loss of taste, sore throat and body aches.",
+    "Dizziness and blurred vision after standing up.",
+]
+
+
+def rss_mb() -> float:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024.0
+    return float("nan")
+
+
+def run_backend(backend: str, texts, repeat: int) -> dict:
+    from app.core.nlp import SymptomNLP
+    rss_before = rss_mb()
+    started = time.perf_counter()
+    nlp = SymptomNLP(backend=backend, batching=False)
+    load_s = time.perf_counter() - started
+    outputs = [nlp.extract_symptoms(t) for t in texts]  # warm-up + parity outputs
+    latencies = []
+    for _ in range(repeat):
+        for text in texts:
+            t0 = time.perf_counter()
+            nlp.extract_symptoms(text)
+            latencies.append((time.perf_counter() - t0) * 1000.0)
+    latencies.sort()
+    rss_after = rss_mb()
+    return {
+        "backend": backend,
+        "load_s": load_s,
+        "rss_mb": rss_after,
+        "model_rss_mb": rss_after - rss_before,
+        "p50_ms": latencies[len(latencies) // 2],
+        "p99_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))],
+        "outputs": outputs,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--texts", help="File with one input text per line")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--backends", default="torch,onnx,onnx-int8")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    texts = DEFAULT_TEXTS
+    if args.texts:
+        with open(args.texts) as f:
+            texts = [line.strip() for line in f if line.strip()]
+
+    if args.worker:
+        print(json.dumps(run_backend(args.worker, texts, args.repeat)))
+        return
+
+    from app.core.onnx_backend import entity_parity
+    results = {}
+    for backend in args.backends.split(","):
+        cmd = [sys.executable, __file__, "--worker", backend, "--repeat", str(args.repeat)]
+        if args.texts:
+            cmd += ["--texts", args.texts]
+        out = subprocess.run(cmd, check=True, capture_output=True, text=True).stdout
+        results[backend] = json.loads(out.strip().splitlines()[-1])
+
+    reference = results.get("torch")
+    print(f"{'backend':<10} {'load_s':>7} {'rss_mb':>8} {'model_mb':>9} {'p50_ms':>8} {'p99_ms':>8} {'parity':>7}")
+    for backend, r in results.items():
+        parity = entity_parity(reference["outputs"], r["outputs"])["exact_match_rate"] if reference else float("nan")
+        print(f"{backend:<10} {r['load_s']:>7.2f} {r['rss_mb']:>8.1f} {r['model_rss_mb']:>9.1f} {r['p50_ms']:>8.2f} "
+              f"{r['p99_ms']:>8.2f} {parity:>7.2%}")
+    if reference:
+        for backend, r in results.items():
+            mismatches = entity_parity(reference["outputs"], r["outputs"])["mismatches"]
+            for m in mismatches:
+                print(f"[{backend}] mismatch on text {m['index']}: torch={m['reference']} {backend}={m['candidate']}")
+
+
+if __name__ == "__main__":
+    main()
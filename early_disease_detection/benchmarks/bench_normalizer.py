@@ -0,0 +1,82 @@
+"""
+Benchmarks SymptomNormalizer lookup latency and recall on synthetic misspellings
+for vocabularies of increasing size.
+
+Usage: python benchmarks/bench_normalizer.py [--sizes 1000,10000,100000] [--queries 2000] [--budget-ms 2]
+"""
+import argparse
+import os
+import random
+import string
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.core.symptom_normalizer import SymptomNormalizer  # noqa: E402
+
+SYLLABLES = ["ach", "al", "an", "ar", "bre", "ch", "co", "di", "en", "fe", "gia", "he", "in", "it", "lo",
+             "ma", "ne", "or", "pa", "ra", "se", "sis", "ta", "th", "ugh", "ver", "zi"]
+
+
+def synthetic_vocabulary(size: int, rng: random.Random):
+    vocab = set()
+    while len(vocab) < size:
+        words = ["".join(rng.choices(SYLLABLES, k=rng.randint(2, 4))) for _ in range(rng.randint(1, 3))]
+        vocab.add(" ".join(words))
+    return sorted(vocab)
+
+
+def misspell(term: str, rng: random.Random) -> str:
+    chars = list(term)
+    op = rng.choice(["delete", "insert", "substitute", "transpose", "plural"])
+    i = rng.randrange(len(chars))
+    if op == "delete" and len(chars) > 3:
+        del chars[i]
+    elif op == "insert":
+        chars.insert(i, rng.choice(string.ascii_lowercase))
+    elif op == "substitute":
+        chars[i] = rng.choice(string.ascii_lowercase)
+    elif op == "transpose" and i < len(chars) - 1:
+        chars[i], chars[i + 1] = chars[i + 1], chars[i]
+    else:
+        chars.append("s")
+    return "".join(chars)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1000,10000,100000")
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--budget-ms", type=float, default=2.0)
+    parser.add_argument("--threshold", type=float, default=0.6)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    print(f"{'vocab':>8} {'build_s':>8} {'p50_ms':>8} {'p99_ms':>8} {'max_ms':>8} {'recall':>7} {'wrong':>6} {'over budget':>11}")
+    for size in [int(s) for s in args.sizes.split(",")]:
+        vocab = synthetic_vocabulary(size, rng)
+        t0 = time.perf_counter()
+        normalizer = SymptomNormalizer(vocab, threshold=args.threshold, time_budget_ms=args.budget_ms)
+        build_s = time.perf_counter() - t0
+        targets = rng.choices(vocab, k=args.queries)
+        queries = [misspell(t, rng) for t in targets]
+        latencies, correct, wrong = [], 0, 0
+        for query, target in zip(queries, targets):
+            t0 = time.perf_counter()
+            found, _ = normalizer.lookup(query)
+            latencies.append((time.perf_counter() - t0) * 1000.0)
+            if found == target:
+                correct += 1
+            elif found is not None:
+                wrong += 1
+        stats = normalizer.stats()
+        print(f"{size:>8} {build_s:>8.2f} {np.percentile(latencies, 50):>8.3f} {np.percentile(latencies, 99):>8.3f} "
+              f"{max(latencies):>8.3f} {correct / len(queries):>7.1%} {wrong / len(queries):>6.1%} "
+              f"{stats['budget_exceeded'] / len(queries):>11.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Compares one shap_values(X) call with chunked SHAP across a process pool
+(parallel_shap_values, pool started once as in the API) on a bulk upload, and
+the JSON payload size of float64 versus float32 values.
+
+Usage: python benchmarks/bench_parallel_shap.py [--rows 50000] [--workers 4] [--chunk-rows 2048] [--trees 100]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import shap
+from sklearn.ensemble import RandomForestClassifier
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.core.parallel_shap import ShapPool, as_float32, to_json_values  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--features", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--chunk-rows", type=int, default=2048)
+    parser.add_argument("--trees", type=int, default=100)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    X_train = rng.random((5000, args.features))
+    y = (X_train[:, 0] + rng.normal(0, 0.3, len(X_train)) > 0.5).astype(int)
+    model = RandomForestClassifier(n_estimators=args.trees, max_depth=10, random_state=0).fit(X_train, y)
+    explainer = shap.TreeExplainer(model)
+    X = rng.random((args.rows, args.features))
+    print(f"{args.rows} rows x {args.features} features, {args.trees} trees, "
+          f"{args.workers} workers, {os.cpu_count()} CPUs")
+
+    t0 = time.perf_counter()
+    single = explainer.shap_values(X)
+    print(f"single process : {time.perf_counter() - t0:.2f}s")
+
+    pool = ShapPool(workers=args.workers, chunk_rows=args.chunk_rows, min_rows=0)
+    t0 = time.perf_counter()
+    pool.executor(explainer, "1").submit(int).result()
+    print(f"pool start     : {time.perf_counter() - t0:.2f}s (once per model version)")
+    t0 = time.perf_counter()
+    parallel, _ = pool.shap_values(explainer, "1", X)
+    print(f"parallel       : {time.perf_counter() - t0:.2f}s, identical: {np.array_equal(single, parallel)}")
+    pool.stop()
+
+    full = len(json.dumps(to_json_values(parallel)))
+    compact = len(json.dumps(to_json_values(as_float32(parallel))))
+    print(f"JSON payload   : float64 {full / 2**20:.1f} MB, float32 {compact / 2**20:.1f} MB "
+          f"({compact / full:.0%})")
+
+
+if __name__ == "__main__":
+    main()
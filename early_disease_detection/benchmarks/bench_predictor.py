@@ -0,0 +1,50 @@
+"""
+Benchmarks Predictor scoring for one /symptoms request: a predict_proba call per
+disease versus a single predict_proba_batch call over all diseases.
+
+Usage: python benchmarks/bench_predictor.py [--diseases 30] [--trees 100] [--repeat 200]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.core.predictor import Predictor  # noqa: E402
+
+
+def percentiles(fn, repeat):
+    latencies = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        latencies.append((time.perf_counter() - t0) * 1000.0)
+    return np.percentile(latencies, 50), np.percentile(latencies, 99)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--diseases", type=int, default=30)
+    parser.add_argument("--trees", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    X = rng.random((2000, 1))
+    y = (X[:, 0] + rng.normal(0, 0.2, len(X)) > 0.5).astype(int)
+    predictor = Predictor(model=RandomForestClassifier(n_estimators=args.trees, max_depth=10, random_state=0).fit(X, y))
+    rows = [[s] for s in rng.random(args.diseases)]
+
+    loop_p50, loop_p99 = percentiles(lambda: [predictor.predict_proba(r) for r in rows], args.repeat)
+    batch_p50, batch_p99 = percentiles(lambda: predictor.predict_proba_batch(rows), args.repeat)
+    print(f"{args.diseases} diseases, {args.trees} trees")
+    print(f"per-disease loop : p50 {loop_p50:.2f}ms  p99 {loop_p99:.2f}ms")
+    print(f"batched          : p50 {batch_p50:.2f}ms  p99 {batch_p99:.2f}ms  ({loop_p50 / batch_p50:.0f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Measures PSS per worker for N workers that each load their own copy of a
+forest model and a reference DataFrame ("independent", like separate uvicorn
+workers) versus N workers forked from a master that loaded them once
+("prefork", like api/prefork.py, with gc.freeze()). Each worker serves a few
+predictions before being measured.
+
+Usage: python benchmarks/bench_prefork_memory.py [--workers 4] [--trees 300] [--reference-rows 200000]
+"""
+import argparse
+import gc
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.utils.memory import read_memory_kb  # noqa: E402
+
+
+def load(model_path, reference_path):
+    return joblib.load(model_path), pd.read_pickle(reference_path)
+
+
+def serve(model, reference, ready, done):
+    rng = np.random.default_rng(os.getpid())
+    for _ in range(20):
+        model.predict_proba(rng.random((32, model.n_features_in_)))
+    reference.describe()
+    ready.set()
+    done.wait()
+
+
+def independent_worker(model_path, reference_path, ready, done):
+    model, reference = load(model_path, reference_path)
+    serve(model, reference, ready, done)
+
+
+def measure(pids):
+    return [read_memory_kb(pid)["pss_kb"] for pid in pids]
+
+
+def run_independent(args, model_path, reference_path):
+    ctx = multiprocessing.get_context("spawn")
+    done = ctx.Event()
+    procs, events = [], []
+    for _ in range(args.workers):
+        ready = ctx.Event()
+        p = ctx.Process(target=independent_worker, args=(model_path, reference_path, ready, done))
+        p.start()
+        procs.append(p)
+        events.append(ready)
+    for e in events:
+        e.wait()
+    pss = measure([p.pid for p in procs])
+    done.set()
+    for p in procs:
+        p.join()
+    return pss
+
+
+def run_prefork(args, model_path, reference_path):
+    ctx = multiprocessing.get_context("fork")
+    model, reference = load(model_path, reference_path)
+    gc.collect()
+    gc.freeze()
+    done = ctx.Event()
+    procs, events = [], []
+    for _ in range(args.workers):
+        ready = ctx.Event()
+        p = ctx.Process(target=serve, args=(model, reference, ready, done))
+        p.start()
+        procs.append(p)
+        events.append(ready)
+    for e in events:
+        e.wait()
+    pss = measure([p.pid for p in procs])
+    master = read_memory_kb()["pss_kb"]
+    done.set()
+    for p in procs:
+        p.join()
+    gc.unfreeze()
+    return pss, master
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--trees", type=int, default=300)
+    parser.add_argument("--reference-rows", type=int, default=200000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    X = rng.random((20000, 10))
+    y = (X[:, 0] + rng.normal(0, 0.3, len(X)) > 0.5).astype(int)
+    model = RandomForestClassifier(n_estimators=args.trees, random_state=0).fit(X, y)
+    reference = pd.DataFrame(rng.random((args.reference_rows, 10)), columns=[f"f{i}" for i in range(10)])
+    with tempfile.TemporaryDirectory() as tmp:
+        model_path = os.path.join(tmp, "model.joblib")
+        reference_path = os.path.join(tmp, "reference.pkl")
+        joblib.dump(model, model_path)
+        reference.to_pickle(reference_path)
+        del model, reference
+        gc.collect()
+        size_mb = (os.path.getsize(model_path) + os.path.getsize(reference_path)) / 2**20
+        print(f"{args.workers} workers, model+reference {size_mb:.0f} MB on disk")
+
+        t0 = time.perf_counter()
+        independent = run_independent(args, model_path, reference_path)
+        print(f"independent: PSS/worker {np.mean(independent) / 1024:.0f} MB, "
+              f"total {sum(independent) / 1024:.0f} MB ({time.perf_counter() - t0:.1f}s)")
+        t0 = time.perf_counter()
+        prefork, master = run_prefork(args, model_path, reference_path)
+        print(f"prefork    : PSS/worker {np.mean(prefork) / 1024:.0f} MB, "
+              f"total {(sum(prefork) + master) / 1024:.0f} MB incl. master ({time.perf_counter() - t0:.1f}s)")
+
+
+if __name__ == "__main__":
+    main()
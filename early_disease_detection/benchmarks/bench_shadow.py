@@ -0,0 +1,76 @@
+"""
+Measures the overhead of shadow scoring on the primary path: p50/p99 latency of
+predict-then-submit versus predict alone, with a candidate model scored in the
+background, plus shadow enqueue time and shed rate.
+
+Usage: python benchmarks/bench_shadow.py [--requests 2000] [--rows 8] [--trees 100] [--queue-size 1000]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.core.predict_batching import predict_with_confidences  # noqa: E402
+from app.services.model_registry import ModelHandle  # noqa: E402
+from app.services.shadow import ShadowScorer  # noqa: E402
+
+
+class FixedCandidate:
+    def __init__(self, model):
+        self.handle = ModelHandle("candidate", "2", model)
+
+    def load(self):
+        return self
+
+    def current(self):
+        return self.handle
+
+
+def run(primary, X_batches, shadow):
+    latencies = []
+    for X in X_batches:
+        t0 = time.perf_counter()
+        labels, confidences = predict_with_confidences(primary, X)
+        if shadow is not None:
+            shadow.submit(X, labels, confidences, "1")
+        latencies.append((time.perf_counter() - t0) * 1000.0)
+    return np.percentile(latencies, 50), np.percentile(latencies, 99)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--rows", type=int, default=8)
+    parser.add_argument("--trees", type=int, default=100)
+    parser.add_argument("--queue-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    X = rng.random((5000, 5))
+    y = (X[:, 0] + rng.normal(0, 0.2, len(X)) > 0.5).astype(int)
+    primary = RandomForestClassifier(n_estimators=args.trees, max_depth=10, random_state=0).fit(X, y)
+    candidate = RandomForestClassifier(n_estimators=args.trees, max_depth=12, random_state=1).fit(X, y)
+    batches = [rng.random((args.rows, 5)) for _ in range(args.requests)]
+
+    base_p50, base_p99 = run(primary, batches, None)
+    shadow = ShadowScorer(FixedCandidate(candidate), queue_size=args.queue_size)
+    shadow_p50, shadow_p99 = run(primary, batches, shadow)
+    shadow.drain(timeout=120)
+    shadow.stop()
+    stats = shadow.stats()
+    comparison = next(iter(stats["comparisons"].values()))
+    print(f"{args.requests} requests x {args.rows} rows, {args.trees} trees")
+    print(f"primary only   : p50 {base_p50:.3f}ms  p99 {base_p99:.3f}ms")
+    print(f"primary+shadow : p50 {shadow_p50:.3f}ms  p99 {shadow_p99:.3f}ms  "
+          f"(p99 overhead {shadow_p99 - base_p99:+.3f}ms)")
+    print(f"enqueue mean {stats['enqueue_us']['mean']:.1f}us, shed {stats['dropped']}/{stats['submitted']}, "
+          f"agreement {comparison['agreement_rate']:.3f}, mean |delta| {comparison['mean_abs_delta']:.4f}")
+
+
+if __name__ == "__main__":
+    main()
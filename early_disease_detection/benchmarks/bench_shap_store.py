@@ -0,0 +1,62 @@
+"""
+Precomputed SHAP store: lookup latency, hit ratio and approximation error of
+nearest-neighbour explanations versus exact TreeExplainer SHAP, for live inputs
+that are training rows plus Gaussian noise (in standardized units).
+
+Usage: python benchmarks/bench_shap_store.py [--store-rows 20000] [--queries 1000] [--noise 0.05,0.1,0.3]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import shap
+from sklearn.ensemble import RandomForestClassifier
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.core.shap_store import SHAP_STORE_MAX_DISTANCE, ShapStore, save_shap_store  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--store-rows", type=int, default=20000)
+    parser.add_argument("--features", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--trees", type=int, default=100)
+    parser.add_argument("--noise", default="0.05,0.1,0.3")
+    parser.add_argument("--max-distance", type=float, default=SHAP_STORE_MAX_DISTANCE)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    X = rng.random((args.store_rows, args.features))
+    y = (X[:, 0] + X[:, 1] + rng.normal(0, 0.2, len(X)) > 1.0).astype(int)
+    model = RandomForestClassifier(n_estimators=args.trees, max_depth=8, random_state=0).fit(X, y)
+    explainer = shap.TreeExplainer(model)
+    t0 = time.perf_counter()
+    values = explainer.shap_values(X)
+    print(f"store: {args.store_rows} rows x {args.features} features, precomputed in {time.perf_counter() - t0:.1f}s")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = save_shap_store(os.path.join(tmp, "shap_store.npz"), X, values, explainer.expected_value)
+        print(f"artifact size: {os.path.getsize(path) / 2**20:.1f} MB")
+        store = ShapStore.load(path)
+
+    print(f"{'noise':>6} {'hit %':>6} {'lookup ms':>10} {'exact ms':>9} {'rel err (hits)':>15}")
+    for noise in [float(n) for n in args.noise.split(",")]:
+        rows = X[rng.integers(0, len(X), args.queries)]
+        queries = rows + rng.normal(0, noise, rows.shape) * store.scale
+        t0 = time.perf_counter()
+        approx, _, hit = store.approximate(queries, max_distance=args.max_distance)
+        lookup_ms = (time.perf_counter() - t0) * 1000.0
+        t0 = time.perf_counter()
+        exact = np.asarray(explainer.shap_values(queries))
+        exact_ms = (time.perf_counter() - t0) * 1000.0
+        errors = np.abs(approx - exact).mean(axis=tuple(range(1, exact.ndim))) / np.abs(exact).mean()
+        print(f"{noise:>6.2f} {hit.mean() * 100:>6.1f} {lookup_ms:>10.1f} {exact_ms:>9.1f} "
+              f"{errors[hit].mean() if hit.any() else float('nan'):>15.3f}")
+
+
+if __name__ == "__main__":
+    main()
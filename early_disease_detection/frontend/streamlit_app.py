@@ -7,6 +7,7 @@ from dotenv import load_dotenv
 from typing import Any, List
 import base64
 import io
+import time
 
 # --- Load environment variables ---
 load_dotenv()
@@ -69,6 +70,28 @@ def patient_view():
     # LLM Symptom Checker Placeholder
     st.info("🤖 LLM-based symptom checker coming soon.")
 
+def poll_explain_job(status_url, headers, interval=1.0, timeout=600):
+    """
+    Polls an async /explain job, showing progress; returns the merged result or None.
+    """
+    progress = st.progress(0.0, text="Computing SHAP explanation...")
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = requests.get(f"{API_URL}{status_url}", params={"include_results": False},
+                           headers=headers, timeout=30).json()
+        progress.progress(job.get("progress", 0.0), text=f"Explained {job.get('rows_done', 0)}/{job.get('rows', 0)} rows")
+        if job.get("status") == "failed":
+            st.error(f"Explain failed: {job.get('error')}")
+            return None
+        if job.get("status") == "done":
+            job = requests.get(f"{API_URL}{status_url}", headers=headers, timeout=30).json()
+            shap_values = [row for chunk in job["chunks"] for row in chunk["shap_values"]]
+            return {"shap_values": shap_values, "feature_names": job["feature_names"],
+                    "plot_base64": job.get("plot_base64")}
+        time.sleep(interval)
+    st.error("Explain timed out; the job is still running on the server.")
+    return None
+
 # --- Doctor Dashboard ---
 def doctor_view():
     st.title("👨‍⚕️ Doctor Dashboard")
@@ -83,7 +106,10 @@ def doctor_view():
             headers = {"Authorization": f"Bearer {st.session_state['jwt_token']}"}
             try:
                 pred_resp = requests.post(f"{API_URL}/predict", json={"data": data}, headers=headers)
-                explain_resp = requests.post(f"{API_URL}/explain", json={"data": data}, headers=headers)
+                # Large uploads are explained as a background job; poll it instead of holding the request open
+                explain_resp = requests.post(f"{API_URL}/explain",
+                                             json={"data": data, "async_job": True, "plot": "summary"},
+                                             headers=headers, timeout=30)
                 if pred_resp.status_code == 200:
                     result = pred_resp.json()
                     st.success(f"Prediction: {result['predictions']}")
@@ -91,14 +117,16 @@ def doctor_view():
                         st.info(f"Confidence scores: {result['confidences']}")
                 else:
                     st.error(f"Prediction failed: {pred_resp.text}")
-                if explain_resp.status_code == 200:
-                    explain = explain_resp.json()
-                    st.write("### SHAP Values (first row):")
-                    st.json(explain['shap_values'][0])
-                    st.write("### Feature Names:")
-                    st.json(explain['feature_names'])
-                    # SHAP plot placeholder (could render image if backend returns it)
-                    st.info("SHAP summary plot coming soon.")
+                if explain_resp.status_code == 202:
+                    explain = poll_explain_job(explain_resp.json()["status_url"], headers)
+                    if explain is not None:
+                        st.write("### SHAP Values (first row):")
+                        st.json(explain['shap_values'][0])
+                        st.write("### Feature Names:")
+                        st.json(explain['feature_names'])
+                        if explain.get('plot_base64'):
+                            img_bytes = base64.b64decode(explain['plot_base64'])
+                            st.image(io.BytesIO(img_bytes), caption="SHAP Summary")
                 else:
                     st.error(f"Explain failed: {explain_resp.text}")
             except Exception as e:
@@ -1,10 +1,16 @@
 import os
+import sys
 import logging
 from zenml import pipeline, step
 from dotenv import load_dotenv
 import mlflow
 import bentoml
 
+# Make the app package importable when run as a script or imported as early_disease_detection.pipelines
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.services.model_cache import load_model  # noqa: E402
+
 # Load environment variables
 load_dotenv()
 MLFLOW_TRACKING_URI = os.getenv("MLFLOW_TRACKING_URI", "http://localhost:5000")
@@ -17,12 +23,12 @@ logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(mess
 @step
 def load_model_from_mlflow_step(model_name: str = MODEL_NAME, model_stage: str = MODEL_STAGE) -> object:
     """
-    Load model from MLflow Model Registry.
+    Load model from MLflow Model Registry (via the local model cache).
     """
     mlflow.set_tracking_uri(MLFLOW_TRACKING_URI)
     model_uri = f"models:/{model_name}/{model_stage}"
     logging.info(f"Loading model from MLflow Registry: {model_uri}")
-    model = mlflow.sklearn.load_model(model_uri)
+    model = load_model(model_uri)
     logging.info("Model loaded from MLflow.")
     return model
 
@@ -1,4 +1,5 @@
 import os
+import sys
 import logging
 import pandas as pd
 from zenml import pipeline, step
@@ -7,6 +8,11 @@ from sklearn.preprocessing import StandardScaler, OneHotEncoder
 from sklearn.feature_selection import SelectKBest, f_classif
 from dotenv import load_dotenv
 
+# Make the app package importable when run as a script or imported as early_disease_detection.pipelines
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.core.drift_sketch import Profile  # noqa: E402
+
 # Load environment variables
 load_dotenv()
 RAW_DATA_DIR = os.getenv("RAW_DATA_DIR", os.path.abspath(os.path.join(os.path.dirname(__file__), '../data/raw')))
@@ -89,6 +95,16 @@ def save_processed_step(df: pd.DataFrame, filename: str = 'processed_data.csv')
     # DVC: Run `dvc add {save_path}` to version this file
     return save_path
 
+@step
+def save_reference_profile_step(df: pd.DataFrame, filename: str = 'reference_profile.json') -> str:
+    """
+    Save the drift reference profile (per-feature quantile histograms and category
+    counts) next to the processed data, so drift monitoring never reloads the full CSV.
+    """
+    save_path = os.path.join(PROCESSED_DATA_DIR, filename)
+    Profile.from_frame(df).save(save_path)
+    return save_path
+
 @pipeline
 def preprocessing_pipeline(raw_filename: str = 'validated_raw.csv', processed_filename: str = 'processed_data.csv', target_col: str = 'target', k_best: int = 5):
     df = load_raw_step(filename=raw_filename)
@@ -96,3 +112,4 @@ def preprocessing_pipeline(raw_filename: str = 'validated_raw.csv', processed_fi
     df_outlier = handle_outliers_step(df_clean)
     df_features = feature_engineering_step(df_outlier, target_col=target_col, k_best=k_best)
     save_processed_step(df_features, filename=processed_filename)
+    save_reference_profile_step(df_features)
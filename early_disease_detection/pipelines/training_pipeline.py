@@ -1,4 +1,5 @@
 import os
+import sys
 import logging
 import pandas as pd
 from zenml import pipeline, step
@@ -11,6 +12,13 @@ import shap
 import joblib
 from dotenv import load_dotenv
 
+# Make the app package importable when run as a script or imported as early_disease_detection.pipelines
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.core.parallel_shap import parallel_shap_values  # noqa: E402
+from app.core.plot_renderer import render_summary_png, select_class  # noqa: E402
+from app.core.shap_store import SHAP_STORE_ARTIFACT, SHAP_STORE_MAX_ROWS, save_shap_store  # noqa: E402
+
 # Load environment variables
 load_dotenv()
 PROCESSED_DATA_DIR = os.getenv("PROCESSED_DATA_DIR", os.path.abspath(os.path.join(os.path.dirname(__file__), '../data/processed')))
@@ -84,15 +92,26 @@ def log_and_save_model_step(model, metrics, best_params, X_train, X_test, y_trai
 @step
 def shap_explainability_step(model, X_train, X_test, run_id: str):
     explainer = shap.TreeExplainer(model)
-    shap_values = explainer.shap_values(X_test)
-    shap.summary_plot(shap_values, X_test, show=False)
+    # Store rows: every test row, then a sample of training rows (SHAP_STORE_MAX_ROWS in total)
+    n_train = min(len(X_train), max(0, SHAP_STORE_MAX_ROWS - len(X_test)))
+    store_X = pd.concat([X_test, X_train.sample(n=n_train, random_state=42)])
+    # Rows split across a process pool (SHAP_WORKERS), same values as one shap_values() call
+    shap_values, _ = parallel_shap_values(explainer, store_X)
+    # Same renderer the API serves plots with (app/core/plot_renderer.py)
+    values, _ = select_class(shap_values, explainer.expected_value)
     shap_path = os.path.join(MODEL_REGISTRY_DIR, f"shap_summary_{run_id}.png")
-    import matplotlib.pyplot as plt
-    plt.savefig(shap_path)
+    with open(shap_path, "wb") as f:
+        f.write(render_summary_png(values[:len(X_test)], X_test, feature_names=list(X_test.columns)))
     logging.info(f"Saved SHAP summary plot to {shap_path}")
-    # Optionally log to MLflow
+    # Precomputed SHAP values for /explain mode="fast", next to the model (app/core/shap_store.py)
+    store_path = save_shap_store(os.path.join(MODEL_REGISTRY_DIR, f"explainability_{run_id}",
+                                              os.path.basename(SHAP_STORE_ARTIFACT)),
+                                 store_X, shap_values, explainer.expected_value, feature_names=list(X_test.columns))
+    # Log to the model's run, where the API looks the store up by model version
     mlflow.set_tracking_uri(MLFLOW_TRACKING_URI)
-    mlflow.log_artifact(shap_path)
+    with mlflow.start_run(run_id=run_id):
+        mlflow.log_artifact(shap_path)
+        mlflow.log_artifact(store_path, artifact_path=os.path.dirname(SHAP_STORE_ARTIFACT))
     return shap_path
 
 @pipeline
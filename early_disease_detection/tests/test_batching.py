@@ -0,0 +1,42 @@
+"""
+Tests for MicroBatcher (dynamic micro-batching).
+"""
+import threading
+import pytest
+from app.core.batching import MicroBatcher
+
+def test_concurrent_submits_are_batched():
+    batch_sizes = []
+
+    def process(items):
+        batch_sizes.append(len(items))
+        return [item * 2 for item in items]
+
+    batcher = MicroBatcher(process, max_batch_size=8, max_wait_ms=50)
+    results = {}
+
+    def worker(i):
+        results[i] = batcher.submit(i, timeout=5)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(16)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    batcher.stop()
+    assert results == {i: i * 2 for i in range(16)}
+    assert max(batch_sizes) <= 8
+    assert len(batch_sizes) < 16
+    stats = batcher.stats()
+    assert stats["items"] == 16
+    assert stats["batch_size"]["count"] == len(batch_sizes)
+
+def test_batch_errors_propagate_to_callers():
+    def process(items):
+        raise ValueError("boom")
+
+    batcher = MicroBatcher(process, max_batch_size=4, max_wait_ms=1)
+    with pytest.raises(ValueError):
+        batcher.submit("x", timeout=5)
+    batcher.stop()
+    assert batcher.stats()["errors"] == 1
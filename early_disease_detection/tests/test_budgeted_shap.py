@@ -0,0 +1,47 @@
+"""
+Tests for latency-budgeted SHAP explanations.
+"""
+import numpy as np
+import pytest
+import shap
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from app.core.budgeted_shap import explain_within_budget
+from app.core.explainability import ExplainabilityEngine
+
+@pytest.fixture
+def data():
+    rng = np.random.default_rng(0)
+    X = rng.random((200, 12))
+    return X, (X[:, 0] + X[:, 1] > 1.0).astype(int)
+
+def test_tree_explainer_runs_once(data):
+    X, y = data
+    explainer = shap.TreeExplainer(RandomForestClassifier(n_estimators=5, random_state=0).fit(X, y))
+    _, quality = explain_within_budget(explainer, X[:1], budget_ms=1)
+    assert quality["complete"] and quality["nsamples"] is None
+    assert quality["method"] == "TreeExplainer"
+
+def test_kernel_sampling_capped_by_budget(data):
+    X, y = data
+    explainer = shap.KernelExplainer(LogisticRegression().fit(X, y).predict_proba, X[:10])
+    _, tight = explain_within_budget(explainer, X[:1], budget_ms=0, min_samples=32, max_samples=4096)
+    assert tight["nsamples"] == 32 and not tight["complete"]
+    assert tight["relative_change"] is None
+    _, loose = explain_within_budget(explainer, X[:1], budget_ms=60000, min_samples=32, max_samples=256)
+    assert loose["nsamples"] == 256 and loose["complete"]
+    assert loose["relative_change"] is not None
+
+def test_kernel_full_enumeration_is_complete(data):
+    X, y = data
+    small = X[:, :3]
+    explainer = shap.KernelExplainer(LogisticRegression().fit(small, y).predict_proba, small[:10])
+    _, quality = explain_within_budget(explainer, small[:1], budget_ms=60000, min_samples=64)
+    assert quality["nsamples"] == 2 ** 3 - 2 and quality["complete"]
+
+def test_engine_reports_quality(data):
+    X, y = data
+    engine = ExplainabilityEngine(LogisticRegression().fit(X, y), budget_ms=0)
+    explanation = engine.explain(X[0], None)
+    assert explanation["quality"]["method"] == "KernelExplainer"
+    assert len(explanation["shap_values"]) > 0
@@ -0,0 +1,51 @@
+"""
+Tests for the LRU/TTL result caches (in-memory and shared SQLite).
+"""
+import os
+import time
+import pytest
+from app.utils.cache import LRUCache, SQLiteCache
+
+def test_lru_eviction_and_counters():
+    cache = LRUCache(maxsize=2)
+    cache.set("fever", ["fever"])
+    cache.set("cough", ["cough"])
+    assert cache.get("fever") == ["fever"]  # "cough" is now least recently used
+    cache.set("headache", ["headache"])
+    assert cache.get("cough") is None
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["evictions"] == 1
+    assert stats["size"] == 2
+
+def test_lru_ttl_expiry():
+    cache = LRUCache(maxsize=10, ttl_seconds=0.01)
+    cache.set("fever", ["fever"])
+    time.sleep(0.02)
+    assert cache.get("fever") is None
+    assert cache.stats()["expirations"] == 1
+
+def test_sqlite_cache_is_shared_between_instances(tmp_path):
+    path = os.path.join(tmp_path, "nlp_cache.sqlite")
+    writer = SQLiteCache(path, maxsize=2)
+    reader = SQLiteCache(path, maxsize=2)
+    writer.set("fever and cough", ["fever", "cough"])
+    assert reader.get("fever and cough") == ["fever", "cough"]
+    writer.set("headache", ["headache"])
+    writer.set("nausea", ["nausea"])
+    assert len(reader) == 2
+    assert writer.stats()["evictions"] == 1
+
+def test_sqlite_cache_evicts_every_n_writes(tmp_path):
+    cache = SQLiteCache(os.path.join(tmp_path, "nlp_cache.sqlite"), maxsize=3, evict_every=5)
+    for i in range(4):
+        cache.set(f"text {i}", [i])
+    assert len(cache) == 4  # not checked yet
+    cache.set("text 4", [4])
+    assert len(cache) == 3
+    assert cache.stats()["evictions"] == 2
+    assert cache.get("text 0") is None and cache.get("text 4") == [4]
+    # Size as of the last check; stats() does not count the table itself
+    cache.set("text 5", [5])
+    assert cache.stats()["size"] == 3
@@ -0,0 +1,33 @@
+"""
+Tests for CompiledForest (flat-array tree ensemble evaluation).
+"""
+import numpy as np
+import pytest
+from sklearn.ensemble import ExtraTreesClassifier, RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from app.core.compiled_forest import CompiledForest, compile_model
+
+@pytest.mark.parametrize("estimator,n_classes", [
+    (RandomForestClassifier(n_estimators=25, max_depth=6, random_state=0), 2),
+    (RandomForestClassifier(n_estimators=10, random_state=1), 3),
+    (ExtraTreesClassifier(n_estimators=10, random_state=2), 2),
+])
+def test_probabilities_identical_to_sklearn(estimator, n_classes):
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(300, 5))
+    y = rng.integers(0, n_classes, len(X))
+    model = estimator.fit(X, y)
+    compiled = CompiledForest(model)
+    X_new = rng.normal(size=(257, 5))
+    np.testing.assert_array_equal(compiled.predict_proba(X_new), model.predict_proba(X_new))
+    np.testing.assert_array_equal(compiled.predict(X_new), model.predict(X_new))
+    np.testing.assert_array_equal(compiled.predict_proba(X_new[:1]), model.predict_proba(X_new[:1]))
+
+def test_single_feature_and_unsupported_models():
+    X = np.linspace(0, 1, 50).reshape(-1, 1)
+    y = (X[:, 0] > 0.5).astype(int)
+    model = RandomForestClassifier(n_estimators=5, random_state=0).fit(X, y)
+    np.testing.assert_array_equal(compile_model(model).predict_proba(X), model.predict_proba(X))
+    assert compile_model(LogisticRegression().fit(X, y)) is None
+    with pytest.raises(ValueError):
+        compile_model(model).predict_proba(np.zeros((1, 3)))
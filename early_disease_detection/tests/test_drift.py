@@ -3,6 +3,8 @@ Test DataMonitor drift detection and logging.
 """
 import os
 import tempfile
+import time
+import numpy as np
 from app.services.data_monitor import DataMonitor
 
 def test_drift_detection_and_logging():
@@ -22,4 +24,63 @@ def test_drift_detection_and_logging():
         # Check log file was written
         with open(log_path) as f:
             log_content = f.read()
-        assert "Drift Detected" in log_content or "Drift Score" in log_content 
\ No newline at end of file
+        assert "Drift Detected" in log_content or "Drift Score" in log_content 
+
+
+def make_monitor(tmp_path, **kwargs):
+    """
+    DataMonitor with a uniform reference "a" in [0, 1) and no saved profile.
+    """
+    ref_path = tmp_path / "ref.csv"
+    np.random.seed(0)
+    with open(ref_path, "w") as f:
+        f.write("a\n" + "\n".join(str(v) for v in np.random.rand(2000)) + "\n")
+    kwargs.setdefault("check_every_n", 10 ** 6)
+    return DataMonitor(reference_data_path=str(ref_path), drift_log_path=str(tmp_path / "drift.log"),
+                       profile_path=str(tmp_path / "missing_profile.json"), **kwargs)
+
+
+def test_record_defers_drift_check_to_background_window(tmp_path):
+    monitor = make_monitor(tmp_path, buffer_size=100, window_size=20, check_every_n=10,
+                           check_interval_seconds=60, min_samples=5)
+    for i in range(9):
+        monitor.record({"a": i / 10})
+    time.sleep(0.1)
+    assert monitor.latest()["checked_at"] is None
+    monitor.record([{"a": 0.9}, {"a": 0.95}])
+    deadline = time.time() + 5
+    while monitor.latest()["checked_at"] is None and time.time() < deadline:
+        time.sleep(0.01)
+    monitor.stop(timeout=5)
+    latest = monitor.latest()
+    assert latest["window_size"] == 11 and latest["samples_seen"] == 11
+
+
+def test_window_slides_over_most_recent_panes(tmp_path):
+    monitor = make_monitor(tmp_path, buffer_size=50, window_size=20, window_panes=4, min_samples=5)
+    for i in range(100):
+        monitor.record({"a": 0.5})
+    result = monitor.check_window()
+    monitor.stop()
+    assert result["window_size"] == 20
+    assert monitor.stats()["buffered"] == 50
+    # Only the last 50 rows were still buffered when the window was folded
+    assert monitor.stats()["dropped"] == 50
+
+
+def test_shifted_inputs_are_flagged(tmp_path):
+    monitor = make_monitor(tmp_path, window_size=1000, min_samples=5)
+    monitor.record([{"a": v} for v in (i / 500 for i in range(500))])
+    assert monitor.check_window()["drift"] is False
+    monitor.record([{"a": 2.0 + i / 500} for i in range(1000)])
+    result = monitor.check_window()
+    monitor.stop()
+    assert result["drift"] is True and result["drifted_features"] == ["a"]
+    assert monitor.last_report["features"]["a"]["ks"] > 0.9
+
+
+def test_small_windows_are_not_checked(tmp_path):
+    monitor = make_monitor(tmp_path, min_samples=5)
+    monitor.record([{"a": 1}] * 4)
+    assert monitor.check_window() is None
+    monitor.stop()
@@ -0,0 +1,75 @@
+"""
+Test the mergeable drift sketches and their PSI / KS / Jensen-Shannon scores.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+from app.core.drift_sketch import NumericSketch, Profile, drift_scores, js_distance, ks_statistic, psi
+
+
+def reference_frame(n=5000, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({"x": rng.normal(size=n), "colour": rng.choice(["red", "green", "blue"], size=n)})
+
+
+def test_sketches_merge_like_one_pass():
+    frame = reference_frame()
+    reference = Profile.from_frame(frame)
+    whole = reference.empty()
+    whole.update(frame)
+    halves = reference.empty()
+    first, second = reference.empty(), reference.empty()
+    first.update(frame.iloc[:1234])
+    second.update(frame.iloc[1234:].to_dict("records"))
+    halves.merge(first).merge(second)
+    for name in ("x", "colour"):
+        assert halves.sketches[name].counts.tolist() == whole.sketches[name].counts.tolist()
+        assert whole.sketches[name].counts.tolist() == reference.sketches[name].counts.tolist()
+    assert halves.rows == len(frame)
+
+
+def test_numeric_bins_are_reference_quantiles():
+    sketch = NumericSketch.from_values(np.arange(1000), bins=10)
+    assert len(sketch.counts) == len(sketch.edges) + 1
+    # Out-of-range values land in the open tail bins
+    live = sketch.empty()
+    live.update([-5, 5000, np.nan, "bad"])
+    assert live.counts[0] == 1 and live.counts[-1] == 1 and live.missing == 2
+
+
+def test_identical_distributions_score_zero():
+    counts = np.array([10, 20, 30, 40])
+    assert psi(counts, counts) == pytest.approx(0.0)
+    assert js_distance(counts, counts * 3) == pytest.approx(0.0, abs=1e-6)
+    assert ks_statistic(counts, counts * 3) == pytest.approx(0.0)
+    assert ks_statistic(np.array([10, 0]), np.array([0, 10])) == pytest.approx(1.0)
+
+
+def test_drift_scores_flag_shifted_features_only():
+    reference = Profile.from_frame(reference_frame())
+    live = reference.empty()
+    shifted = reference_frame(2000, seed=1)
+    shifted["x"] += 1.5
+    live.update(shifted)
+    result = drift_scores(reference, live)
+    assert result["drifted_features"] == ["x"]
+    assert result["drift_score"] == pytest.approx(0.5)
+    assert result["features"]["colour"]["ks"] is None
+    assert result["features"]["x"]["psi"] > 0.2
+
+
+def test_features_missing_from_live_data_are_skipped():
+    reference = Profile.from_frame(reference_frame())
+    live = reference.empty()
+    live.update([{"x": 0.1, "unknown": 3}])
+    assert set(drift_scores(reference, live)["features"]) == {"x"}
+
+
+def test_profile_round_trips_through_json(tmp_path):
+    reference = Profile.from_frame(reference_frame())
+    path = reference.save(str(tmp_path / "profile" / "reference_profile.json"))
+    loaded = Profile.load(path)
+    for name, sketch in reference.sketches.items():
+        assert loaded.sketches[name].counts.tolist() == sketch.counts.tolist()
+    assert np.allclose(loaded.sketches["x"].edges, reference.sketches["x"].edges)
+    assert loaded.sketches["colour"].categories == reference.sketches["colour"].categories
@@ -0,0 +1,87 @@
+"""
+Tests for asynchronous explanation jobs (ExplainJobQueue, JobStore).
+"""
+import time
+import numpy as np
+import pytest
+import shap
+from sklearn.ensemble import RandomForestClassifier
+from app.services.explain_jobs import DONE, FAILED, ExplainJobQueue, JobStore
+
+@pytest.fixture
+def explainer():
+    rng = np.random.default_rng(0)
+    X = rng.random((200, 4))
+    model = RandomForestClassifier(n_estimators=5, random_state=0).fit(X, (X[:, 0] > 0.5).astype(int))
+    return shap.TreeExplainer(model)
+
+def test_job_results_match_synchronous_explanation(tmp_path, explainer):
+    jobs = ExplainJobQueue(JobStore(str(tmp_path)), workers=2, chunk_rows=7, start_method="fork")
+    X = np.random.default_rng(1).random((30, 4))
+    job = jobs.submit(explainer, "1", X, owner="doctor")
+    assert jobs.wait(job["job_id"])["status"] == DONE
+    result = jobs.get(job["job_id"], owner="doctor")
+    jobs.stop()
+    assert result["progress"] == 1.0
+    assert [chunk["start"] for chunk in result["chunks"]] == [0, 7, 14, 21, 28]
+    values = np.concatenate([np.asarray(chunk["shap_values"]) for chunk in result["chunks"]])
+    assert np.allclose(values, explainer.shap_values(X))
+    assert len(result["quality"]) == 5
+
+def test_job_renders_plot_over_all_rows(tmp_path, explainer):
+    jobs = ExplainJobQueue(JobStore(str(tmp_path)), workers=2, chunk_rows=7, start_method="fork")
+    X = np.random.default_rng(1).random((30, 4))
+    rendered = []
+    job = jobs.submit(explainer, "1", X, render=lambda values: rendered.append(values) or "png")
+    result = jobs.wait(job["job_id"])
+    jobs.stop()
+    assert result["status"] == DONE and result["plot_base64"] == "png"
+    assert np.allclose(np.asarray(rendered[0]), np.asarray(explainer.shap_values(X)))
+
+def test_jobs_are_private_and_expire(tmp_path, explainer):
+    store = JobStore(str(tmp_path), ttl_seconds=0.2)
+    jobs = ExplainJobQueue(store, workers=1, start_method="fork")
+    job = jobs.submit(explainer, "1", np.zeros((2, 4)), owner="doctor")
+    jobs.wait(job["job_id"])
+    with pytest.raises(KeyError):
+        jobs.get(job["job_id"], owner="someone-else")
+    with pytest.raises(KeyError):
+        jobs.get("../../etc")
+    time.sleep(0.3)
+    with pytest.raises(KeyError):
+        jobs.get(job["job_id"])
+    assert store.purge_expired() == 1
+    jobs.stop()
+
+def test_failed_chunk_marks_job_failed(tmp_path, explainer):
+    jobs = ExplainJobQueue(JobStore(str(tmp_path)), workers=1, start_method="fork")
+    job = jobs.submit(explainer, "1", np.array([["a", "b", "c", "d"]]))
+    result = jobs.wait(job["job_id"])
+    jobs.stop()
+    assert result["status"] == FAILED and result["error"]
+    assert jobs.stats()[FAILED] == 1
+
+class SlowExplainer:
+    """
+    Explainer that takes longer per chunk than the store's TTL.
+    """
+    expected_value = [0.0]
+
+    def shap_values(self, X):
+        time.sleep(0.3)
+        return np.zeros(np.shape(X))
+
+def test_running_jobs_do_not_expire(tmp_path):
+    jobs = ExplainJobQueue(JobStore(str(tmp_path), ttl_seconds=0.1), workers=1, chunk_rows=1, start_method="fork")
+    slow = jobs.submit(SlowExplainer(), "1", np.zeros((2, 4)))
+    queued = jobs.submit(SlowExplainer(), "1", np.zeros((1, 4)))
+    assert jobs.wait(slow["job_id"])["status"] == DONE
+    assert jobs.wait(queued["job_id"])["status"] == DONE
+    assert jobs._thread.is_alive()
+    jobs.stop()
+
+def test_purge_skips_jobs_being_created(tmp_path):
+    store = JobStore(str(tmp_path))
+    (tmp_path / "abc123").mkdir()
+    assert store.purge_expired() == 0
+    assert (tmp_path / "abc123").is_dir()
@@ -0,0 +1,39 @@
+"""
+Tests for the per-model-version SHAP explainer cache.
+"""
+import numpy as np
+import pytest
+import shap
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from app.core.explainer_cache import ExplainerCache, build_explainer, summarize_background
+from app.services.model_registry import ModelHandle
+
+@pytest.fixture
+def data():
+    rng = np.random.default_rng(0)
+    X = rng.random((300, 3))
+    return X, (X[:, 0] > 0.5).astype(int)
+
+def test_explainer_kind_follows_model(data):
+    X, y = data
+    assert isinstance(build_explainer(RandomForestClassifier(n_estimators=5).fit(X, y)), shap.TreeExplainer)
+    kernel = build_explainer(LogisticRegression().fit(X, y), background=X, background_size=10)
+    assert isinstance(kernel, shap.KernelExplainer)
+    assert kernel.data.data.shape == (10, 3)
+
+def test_summarize_background_without_reference():
+    assert summarize_background(None, 4).shape == (1, 4)
+
+def test_explainers_built_once_per_version(data):
+    X, y = data
+    loads = []
+    cache = ExplainerCache(background_loader=lambda model: loads.append(1) or X, max_versions=2)
+    model = RandomForestClassifier(n_estimators=5).fit(X, y)
+    first = cache.get(ModelHandle("m", "1", model))
+    assert cache.get(ModelHandle("m", "1", model)) is first
+    assert len(loads) == 1
+    cache.prebuild(ModelHandle("m", "2", model))
+    cache.prebuild(ModelHandle("m", "3", model))
+    assert cache.stats()["versions"] == ["2", "3"]
+    assert cache.peek("1") is None
@@ -0,0 +1,82 @@
+"""
+Tests for ComponentManager (lazy loading, warm-up and readiness).
+"""
+import pytest
+from app.services.lifecycle import ComponentManager, ComponentUnavailableError, READY, FAILED
+
+def test_lazy_load_and_warmup():
+    manager = ComponentManager()
+    calls = []
+    manager.register("engine", lambda: calls.append("load") or "engine", warmup=lambda e: calls.append("warmup"))
+    assert manager.peek("engine") is None
+    assert not manager.is_ready()
+    assert manager.get("engine") == "engine"
+    assert manager.get("engine") == "engine"
+    assert calls == ["load", "warmup"]
+    assert manager.status()["components"]["engine"]["state"] == READY
+    assert manager.is_ready()
+
+def test_load_all_records_failures_and_readiness():
+    manager = ComponentManager()
+
+    def broken():
+        raise RuntimeError("registry unreachable")
+
+    manager.register("model", lambda: object())
+    manager.register("optional", broken, required=False)
+    status = manager.load_all()
+    assert status["ready"] is True
+    assert status["startup_seconds"] is not None
+    assert status["components"]["optional"]["state"] == FAILED
+    with pytest.raises(ComponentUnavailableError):
+        manager.get("optional")
+    manager.register("required", broken)
+    manager.load_all()
+    assert manager.is_ready() is False
+
+def test_deferred_warmup_and_exclude():
+    manager = ComponentManager()
+    calls = []
+    manager.register("model", lambda: calls.append("load") or "model", warmup=lambda m: calls.append("warmup"))
+    manager.register("nlp", lambda: calls.append("nlp") or "nlp")
+    manager.load_all(warmup=False, exclude=["nlp"])
+    assert calls == ["load"]
+    assert manager.peek("model") == "model"
+    assert manager.peek("nlp") is None
+    assert not manager.is_ready()
+    # e.g. in a forked worker: builds what was excluded, warms what was preloaded
+    manager.load_all()
+    assert calls == ["load", "nlp", "warmup"] or calls == ["load", "warmup", "nlp"]
+    assert manager.is_ready()
+
+def test_failed_component_is_retried_after_backoff():
+    import time
+    manager = ComponentManager(retry_seconds=0.05, retry_max_seconds=1.0)
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise RuntimeError("registry unreachable")
+        return "model"
+
+    manager.register("model", flaky)
+    manager.load_all()
+    assert manager.status()["components"]["model"]["state"] == FAILED
+    # Within the backoff the failure is reported without calling the factory again
+    with pytest.raises(ComponentUnavailableError):
+        manager.get("model")
+    assert len(attempts) == 1
+    time.sleep(0.06)
+    with pytest.raises(ComponentUnavailableError):
+        manager.get("model")
+    assert manager.status()["components"]["model"]["failures"] == 2
+    # The readiness probe retries in the background once the (doubled) backoff has passed
+    assert manager.retry_failed() == []
+    time.sleep(0.11)
+    assert manager.retry_failed() == ["model"]
+    deadline = time.time() + 5
+    while not manager.is_ready() and time.time() < deadline:
+        time.sleep(0.01)
+    assert manager.get("model") == "model"
+    assert manager.status()["components"]["model"]["failures"] == 0
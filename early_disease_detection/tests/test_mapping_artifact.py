@@ -0,0 +1,82 @@
+"""
+Tests for the compiled symptom mapping artifact and hot reload.
+"""
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from app.core.mapping_artifact import compile_mapping, load_artifact, read_header
+from app.core.mappings import SymptomMapping
+
+def write_csv(path, weight):
+    pd.DataFrame({
+        "symptom": ["Fever", "fever", "cough", "headache", "nausea"],
+        "disease": ["flu", "covid", "flu", "migraine", "migraine"],
+        "weight": [weight, 1.0, 1.0, None, 0.5],
+    }).to_csv(path, index=False)
+
+def test_artifact_matches_csv_mapping(tmp_path):
+    csv_path = str(tmp_path / "mapping.csv")
+    artifact_path = str(tmp_path / "mapping.calmap")
+    write_csv(csv_path, 2.0)
+    header = compile_mapping(csv_path, artifact_path)
+    assert read_header(artifact_path)["version"] == header["version"]
+    index, _ = load_artifact(artifact_path)
+    assert isinstance(index.weights, np.memmap) or isinstance(index.weights.base, np.memmap)
+    from_csv = SymptomMapping(csv_path, artifact_path=None)
+    from_artifact = SymptomMapping(csv_path, artifact_path=artifact_path, watch_interval=0)
+    assert from_artifact.df is None
+    for symptoms in (["fever"], ["fever", "cough"], ["headache", "nausea"], ["unknown"]):
+        assert from_artifact.map_symptoms(symptoms) == from_csv.map_symptoms(symptoms)
+    assert from_artifact.vocabulary() == from_csv.vocabulary()
+
+def test_hot_reload_swaps_index_atomically(tmp_path):
+    csv_path = str(tmp_path / "mapping.csv")
+    artifact_path = str(tmp_path / "mapping.calmap")
+    write_csv(csv_path, 2.0)
+    compile_mapping(csv_path, artifact_path, version="v1")
+    mapping = SymptomMapping(csv_path, artifact_path=artifact_path, watch_interval=0)
+    in_flight = mapping.index
+    assert mapping.map_symptoms(["fever"]) == {"flu": 1.0, "covid": 0.5}
+    write_csv(csv_path, 0.5)
+    compile_mapping(csv_path, artifact_path, version="v2")
+    assert mapping.reload_if_changed() is True
+    assert mapping.version == "v2"
+    assert mapping.map_symptoms(["fever"]) == {"flu": 0.5, "covid": 1.0}
+    # A lookup that started before the swap still sees the old, intact version
+    assert in_flight.score(["fever"]) == {"flu": 1.0, "covid": 0.5}
+    assert mapping.reload_if_changed() is False
+
+def test_reload_listeners_rebuild_vocabulary_indexes(tmp_path):
+    from app.core.symptom_matcher import SymptomMatcher
+    csv_path = str(tmp_path / "mapping.csv")
+    artifact_path = str(tmp_path / "mapping.calmap")
+    write_csv(csv_path, 1.0)
+    compile_mapping(csv_path, artifact_path, version="v1")
+    mapping = SymptomMapping(csv_path, artifact_path=artifact_path, watch_interval=0)
+    matchers = [SymptomMatcher(mapping.vocabulary())]
+    mapping.add_listener(lambda m: matchers.append(SymptomMatcher(m.vocabulary())))
+    mapping.add_listener(lambda m: 1 / 0)  # a failing listener does not block the others or the reload
+    assert matchers[-1].match("fever and rash") == ["fever"]
+    pd.DataFrame({"symptom": ["fever", "rash"], "disease": ["flu", "measles"]}).to_csv(csv_path, index=False)
+    compile_mapping(csv_path, artifact_path, version="v2")
+    assert mapping.reload_if_changed() is True
+    assert len(matchers) == 2
+    assert matchers[-1].match("fever and rash") == ["fever", "rash"]
+    assert mapping.reload_if_changed() is False
+    assert len(matchers) == 2
+
+def test_watcher_stops_and_restarts(tmp_path):
+    csv_path = str(tmp_path / "mapping.csv")
+    artifact_path = str(tmp_path / "mapping.calmap")
+    write_csv(csv_path, 1.0)
+    compile_mapping(csv_path, artifact_path, version="v1")
+    mapping = SymptomMapping(csv_path, artifact_path=artifact_path, watch_interval=0.01)
+    watcher = mapping._watcher
+    assert watcher.is_alive()
+    mapping.stop_watcher(timeout=5)
+    assert not watcher.is_alive()
+    # e.g. in a forked worker
+    mapping.start_watcher()
+    assert mapping._watcher.is_alive()
+    mapping.stop_watcher(timeout=5)
@@ -1,6 +1,8 @@
 """
 Tests for SymptomMapping (symptom-to-disease mapping).
 """
+import numpy as np
+import pandas as pd
 import pytest
 from app.core.mappings import SymptomMapping
 
@@ -8,4 +10,61 @@ def test_map_symptoms():
     mapping = SymptomMapping()
     symptoms = ["fever", "cough"]
     result = mapping.map_symptoms(symptoms)
-    assert "flu" in result or "covid" in result 
\ No newline at end of file
+    assert "flu" in result or "covid" in result 
+
+def legacy_map_symptoms(df, symptoms):
+    # Row-by-row DataFrame scan the index replaced; used as the reference output
+    scores = {}
+    for symptom in symptoms:
+        matches = df[df['symptom'].str.lower() == symptom.lower()]
+        for _, row in matches.iterrows():
+            weight = row['weight'] if 'weight' in row and not pd.isnull(row['weight']) else 1.0
+            scores[row['disease']] = scores.get(row['disease'], 0) + float(weight)
+    if scores:
+        max_score = max(scores.values())
+        for k in scores:
+            scores[k] = scores[k] / max_score
+    return scores
+
+def test_index_scores_match_dataframe_scan(tmp_path):
+    rng = np.random.default_rng(0)
+    n = 500
+    df = pd.DataFrame({
+        "symptom": rng.choice(["Fever", "fever", "cough", "headache", "nausea", "Chest Pain"], n),
+        "disease": rng.choice(["flu", "covid", "migraine", "angina", "cold"], n),
+        "weight": np.where(rng.random(n) < 0.1, np.nan, rng.random(n) * 3),
+    })
+    csv_path = tmp_path / "mapping.csv"
+    df.to_csv(csv_path, index=False)
+    mapping = SymptomMapping(str(csv_path))
+    df = pd.read_csv(csv_path)
+    for symptoms in (["fever"], ["FEVER", "cough"], ["chest pain", "nausea", "fever"], ["unknown"], [],
+                     ["cough", "cough"]):
+        expected = legacy_map_symptoms(df, symptoms)
+        result = mapping.map_symptoms(symptoms)
+        assert result == expected
+        assert list(result) == list(expected)
+
+def test_index_without_weight_column(tmp_path):
+    csv_path = tmp_path / "mapping.csv"
+    pd.DataFrame({"symptom": ["fever", "fever", "cough"], "disease": ["flu", "covid", "flu"]}).to_csv(csv_path, index=False)
+    mapping = SymptomMapping(str(csv_path))
+    assert mapping.map_symptoms(["fever", "cough"]) == {"flu": 1.0, "covid": 0.5}
+    assert mapping.vocabulary() == ["cough", "fever"]
+
+def test_map_symptoms_batch_matches_single(tmp_path):
+    csv_path = tmp_path / "mapping.csv"
+    pd.DataFrame({
+        "symptom": ["fever", "fever", "cough", "Cough", "headache", "nausea"],
+        "disease": ["flu", "covid", "flu", "covid", "migraine", "migraine"],
+        "weight": [2.0, 1.0, 1.0, 3.0, None, 0.5],
+    }).to_csv(csv_path, index=False)
+    mapping = SymptomMapping(str(csv_path))
+    lists = [["fever"], ["fever", "cough"], [], ["unknown"], ["headache", "nausea", "cough"]]
+    batch = mapping.map_symptoms_batch(lists)
+    for symptoms, scores in zip(lists, batch):
+        assert scores == pytest.approx(mapping.map_symptoms(symptoms))
+    dense = mapping.map_symptoms_batch(lists, output="dense")
+    assert dense.shape == (len(lists), len(mapping.disease_names()))
+    assert np.allclose(dense.max(axis=1), [1.0, 1.0, 0.0, 0.0, 1.0])
+    assert mapping.map_symptoms_batch(lists, output="sparse").nnz == sum(len(s) for s in batch)
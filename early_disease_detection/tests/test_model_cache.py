@@ -0,0 +1,56 @@
+"""
+Tests for the local MLflow model cache (file-based registry, no tracking server).
+"""
+import os
+import numpy as np
+import pytest
+import mlflow
+from mlflow.tracking import MlflowClient
+from sklearn.ensemble import RandomForestClassifier
+from app.services.model_cache import ModelCache, parse_model_uri
+
+@pytest.fixture
+def registry(tmp_path):
+    tracking_uri = f"sqlite:///{tmp_path / 'mlflow.db'}"
+    mlflow.set_tracking_uri(tracking_uri)
+    mlflow.set_experiment("model_cache_test")
+    rng = np.random.default_rng(0)
+    X = rng.random((100, 3))
+    model = RandomForestClassifier(n_estimators=5, random_state=0).fit(X, (X[:, 0] > 0.5).astype(int))
+    with mlflow.start_run() as run:
+        mlflow.sklearn.log_model(model, artifact_path="model", serialization_format="cloudpickle")
+    version = mlflow.register_model(f"runs:/{run.info.run_id}/model", "disease_predictor").version
+    MlflowClient().transition_model_version_stage("disease_predictor", version, "Production")
+    yield tracking_uri, model, X
+    mlflow.set_tracking_uri(None)
+
+def test_parse_model_uri():
+    assert parse_model_uri("models:/disease_predictor/Production") == ("disease_predictor", "Production")
+    assert parse_model_uri("models:/disease_predictor/3") == ("disease_predictor", "3")
+    assert parse_model_uri("runs:/abc/model") is None
+
+def test_load_caches_and_memory_maps(registry, tmp_path):
+    tracking_uri, model, X = registry
+    cache = ModelCache(str(tmp_path / "cache"), tracking_uri=tracking_uri)
+    loaded = cache.load_uri("models:/disease_predictor/Production")
+    np.testing.assert_array_equal(loaded.predict_proba(X), model.predict_proba(X))
+    # Fitted arrays are read-only maps of the cached blob, not private copies
+    assert isinstance(loaded.classes_, np.memmap)
+    again = cache.load_uri("models:/disease_predictor/1")
+    np.testing.assert_array_equal(again.predict_proba(X), model.predict_proba(X))
+    stats = cache.stats()
+    assert stats["misses"] == 1 and stats["hits"] == 1
+    assert len(os.listdir(tmp_path / "cache" / "blobs")) == 1
+
+def test_offline_load_uses_persisted_resolution(registry, tmp_path):
+    tracking_uri, model, X = registry
+    cache_dir = str(tmp_path / "cache")
+    ModelCache(cache_dir, tracking_uri=tracking_uri).load_uri("models:/disease_predictor/Production")
+    # Expired TTL and an unreachable registry: the last known version is served from disk
+    offline = ModelCache(cache_dir, tracking_uri=f"sqlite:///{tmp_path / 'missing' / 'x.db'}", stage_ttl_seconds=0)
+    loaded = offline.load_uri("models:/disease_predictor/Production")
+    np.testing.assert_array_equal(loaded.predict(X), model.predict(X))
+    assert offline.stats()["stale_stage_resolutions"] == 1
+    with pytest.raises(Exception):
+        ModelCache(str(tmp_path / "empty"), tracking_uri=f"sqlite:///{tmp_path / 'missing' / 'x.db'}") \
+            .load_uri("models:/disease_predictor/Production")
@@ -0,0 +1,69 @@
+"""
+Tests for the in-process ModelRegistry (shared model, hot swap on promotion).
+"""
+import numpy as np
+import pytest
+import mlflow
+from mlflow.tracking import MlflowClient
+from sklearn.ensemble import RandomForestClassifier
+from app.core.predictor import Predictor
+from app.services.model_cache import ModelCache
+from app.services.model_registry import ModelRegistry
+
+def log_version(n_estimators):
+    rng = np.random.default_rng(n_estimators)
+    X = rng.random((100, 2))
+    model = RandomForestClassifier(n_estimators=n_estimators, random_state=0).fit(X, (X[:, 0] > 0.5).astype(int))
+    with mlflow.start_run() as run:
+        mlflow.sklearn.log_model(model, artifact_path="model", serialization_format="cloudpickle")
+    return mlflow.register_model(f"runs:/{run.info.run_id}/model", "disease_predictor").version
+
+@pytest.fixture
+def registry(tmp_path):
+    tracking_uri = f"sqlite:///{tmp_path / 'mlflow.db'}"
+    mlflow.set_tracking_uri(tracking_uri)
+    mlflow.set_experiment("model_registry_test")
+    version = log_version(3)
+    MlflowClient().transition_model_version_stage("disease_predictor", version, "Production")
+    cache = ModelCache(str(tmp_path / "cache"), tracking_uri=tracking_uri)
+    yield ModelRegistry("disease_predictor", "Production", cache=cache, tracking_uri=tracking_uri, poll_interval=0)
+    mlflow.set_tracking_uri(None)
+
+def test_registry_swaps_on_promotion(registry):
+    assert registry.peek() is None
+    first = registry.current()
+    assert first.version == "1" and len(first.model.estimators_) == 3
+    assert registry.refresh() is False
+    swapped, prepared = [], []
+    registry.add_listener(swapped.append)
+    registry.add_listener(lambda h: prepared.append((h.version, registry.current().version)), before_swap=True)
+    version = log_version(5)
+    MlflowClient().transition_model_version_stage("disease_predictor", version, "Production")
+    assert registry.refresh() is True
+    assert registry.current().version == "2" and len(registry.current().model.estimators_) == 5
+    assert [h.version for h in swapped] == ["2"]
+    assert prepared == [("2", "1")]  # prepared while version 1 was still serving
+    # A request holding the old handle keeps a working model
+    assert first.model.predict(np.zeros((1, 2))).shape == (1,)
+    assert registry.stats()["swaps"] == 1
+
+def test_predictor_shares_registry_model(registry):
+    a = Predictor(registry=registry)
+    b = Predictor(registry=registry)
+    assert a.model is b.model is registry.current().model
+    assert len(a.predict_proba([0.2, 0.8])) == 2
+
+def test_predictor_memoizes_per_version(registry):
+    from app.core.prediction_cache import PredictionCache
+    cache = PredictionCache(maxsize=10)
+    predictor = Predictor(registry=registry, cache=cache)
+    first = predictor.predict_proba_batch([[0.2, 0.8], [0.2, 0.8]])
+    assert predictor.predict_proba_batch([[0.2, 0.8]]) == first[:1]
+    assert cache.stats()["rows_saved"] == 2
+
+def test_stop_joins_poll_thread(tmp_path):
+    registry = ModelRegistry("disease_predictor", "Production", cache=ModelCache(str(tmp_path / "cache")),
+                             poll_interval=60)
+    registry.start()
+    registry.stop(timeout=5)
+    assert not registry._thread.is_alive()
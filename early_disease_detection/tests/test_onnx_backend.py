@@ -0,0 +1,17 @@
+"""
+Tests for the ONNX Runtime NER backend helpers.
+"""
+import pytest
+from app.core.onnx_backend import entity_parity, onnx_model_dir
+
+def test_entity_parity():
+    reference = [["fever", "cough"], ["headache"], []]
+    candidate = [["cough", "fever"], ["headache", "nausea"], []]
+    report = entity_parity(reference, candidate)
+    assert report["texts"] == 3
+    assert report["exact_match_rate"] == pytest.approx(2 / 3)
+    assert report["mismatches"][0]["index"] == 1
+
+def test_onnx_model_dir_is_filesystem_safe():
+    path = onnx_model_dir("emilyalsentzer/Bio_ClinicalBERT", cache_dir="cache")
+    assert path == "cache/emilyalsentzer__Bio_ClinicalBERT"
@@ -0,0 +1,62 @@
+"""
+Tests for chunked, multi-process SHAP computation.
+"""
+import json
+import numpy as np
+import pandas as pd
+import pytest
+import shap
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from app.core.parallel_shap import ShapPool, as_float32, parallel_shap_values, stitch, to_json_values
+
+@pytest.fixture
+def data():
+    rng = np.random.default_rng(0)
+    X = rng.random((300, 4))
+    return X, (X[:, 0] + X[:, 1] > 1.0).astype(int)
+
+def test_tree_values_match_single_process(data):
+    X, y = data
+    explainer = shap.TreeExplainer(RandomForestClassifier(n_estimators=10, random_state=0).fit(X, y))
+    values, quality = parallel_shap_values(explainer, X, workers=2, chunk_rows=64, start_method="fork")
+    assert np.array_equal(values, explainer.shap_values(X))
+    assert quality["chunks"] == 5 and quality["complete"]
+
+def test_dataframe_rows_keep_order(data):
+    X, y = data
+    frame = pd.DataFrame(X, columns=list("abcd"))
+    explainer = shap.TreeExplainer(RandomForestClassifier(n_estimators=5, random_state=0).fit(frame, y))
+    values, _ = parallel_shap_values(explainer, frame, workers=2, chunk_rows=100, start_method="fork")
+    assert np.array_equal(values, explainer.shap_values(frame))
+
+def test_kernel_values_match_with_full_enumeration(data):
+    X, y = data
+    explainer = shap.KernelExplainer(LogisticRegression().fit(X, y).predict_proba, X[:10])
+    values, _ = parallel_shap_values(explainer, X[:20], workers=2, chunk_rows=7, start_method="fork")
+    assert np.allclose(values, explainer.shap_values(X[:20], silent=True))
+
+def test_pool_runs_small_requests_inline(data):
+    X, y = data
+    explainer = shap.TreeExplainer(RandomForestClassifier(n_estimators=5, random_state=0).fit(X, y))
+    pool = ShapPool(workers=2, chunk_rows=50, min_rows=100, start_method="fork")
+    pool.shap_values(explainer, "1", X[:10])
+    values, _ = pool.shap_values(explainer, "1", X)
+    pool.shap_values(explainer, "2", X)
+    pool.stop()
+    assert np.array_equal(values, explainer.shap_values(X))
+    stats = pool.stats()
+    assert stats["inline_requests"] == 1 and stats["parallel_requests"] == 2
+    assert stats["rebuilds"] == 2
+
+def test_stitch_list_outputs():
+    chunks = [[np.ones((2, 3)), np.zeros((2, 3))], [np.ones((1, 3)), np.zeros((1, 3))]]
+    stitched = stitch(chunks)
+    assert [v.shape for v in stitched] == [(3, 3), (3, 3)]
+
+def test_float32_halves_payload(data):
+    values = np.random.default_rng(1).normal(size=(200, 10))
+    full = json.dumps(to_json_values(values))
+    compact = to_json_values(as_float32(values))
+    assert len(json.dumps(compact)) < 0.6 * len(full)
+    assert np.allclose(compact, values, rtol=1e-6)
@@ -0,0 +1,63 @@
+"""
+Tests for SHAP plot rendering in a process pool with a render cache.
+"""
+import base64
+import numpy as np
+import pytest
+import shap
+from sklearn.ensemble import RandomForestClassifier
+from app.core.explainability import ExplainabilityEngine
+from app.core.plot_renderer import PlotRenderer, select_class
+
+PNG_MAGIC = b"\x89PNG"
+
+@pytest.fixture
+def explained():
+    rng = np.random.default_rng(0)
+    X = rng.random((100, 4))
+    model = RandomForestClassifier(n_estimators=5, random_state=0).fit(X, (X[:, 0] > 0.5).astype(int))
+    explainer = shap.TreeExplainer(model)
+    return model, explainer, X[:10], explainer.shap_values(X[:10])
+
+@pytest.fixture
+def renderer():
+    renderer = PlotRenderer(workers=1, start_method="fork", timeout=60)
+    yield renderer
+    renderer.stop()
+
+def test_select_class_positive_output(explained):
+    _, explainer, X, shap_values = explained
+    values, base_value = select_class(shap_values, explainer.expected_value)
+    assert values.shape == X.shape
+    assert base_value == pytest.approx(explainer.expected_value[1])
+
+def test_plots_rendered_and_cached(explained, renderer):
+    _, explainer, X, shap_values = explained
+    values, base_value = select_class(shap_values, explainer.expected_value)
+    first = renderer.waterfall("1", values[0], base_value, X[0], ["a", "b", "c", "d"])
+    assert base64.b64decode(first).startswith(PNG_MAGIC)
+    assert renderer.waterfall("1", values[0], base_value, X[0], ["a", "b", "c", "d"]) == first
+    summary = renderer.summary("1", values, X)
+    assert base64.b64decode(summary).startswith(PNG_MAGIC)
+    # New model version: rendered again
+    renderer.waterfall("2", values[0], base_value, X[0], ["a", "b", "c", "d"])
+    stats = renderer.stats()
+    assert stats["rendered"] == 3
+    assert stats["cache"]["hits"] == 1
+    assert stats["render_ms"]["count"] == 3
+
+def test_feature_names_are_part_of_the_cache_key(explained, renderer):
+    _, explainer, X, shap_values = explained
+    values, _ = select_class(shap_values, explainer.expected_value)
+    renderer.summary("1", values, X, ["a", "b", "c", "d"])
+    renderer.summary("1", values, X, ["w", "x", "y", "z"])
+    assert renderer.stats()["rendered"] == 2
+
+def test_render_failure_returns_none(renderer):
+    assert renderer.waterfall("1", np.zeros(3), 0.0, np.zeros(2)) is None
+    assert renderer.stats()["errors"] == 1
+
+def test_engine_returns_waterfall(explained, renderer):
+    model, explainer, X, _ = explained
+    explanation = ExplainabilityEngine(model, explainer=explainer, renderer=renderer, version="1").explain(X[0], None)
+    assert base64.b64decode(explanation["plot_base64"]).startswith(PNG_MAGIC)
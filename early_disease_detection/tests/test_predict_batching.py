@@ -0,0 +1,54 @@
+"""
+Tests for /predict request batching (PredictBatcher).
+"""
+import threading
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+from app.core.predict_batching import PredictBatcher, predict_with_confidences
+
+@pytest.fixture
+def model():
+    rng = np.random.default_rng(0)
+    X = rng.random((200, 2))
+    y = (X[:, 0] > 0.5).astype(int)
+    return RandomForestClassifier(n_estimators=10, random_state=0).fit(X, y)
+
+def test_predict_with_confidences_matches_model(model):
+    X = np.random.default_rng(1).random((20, 2))
+    labels, confidences = predict_with_confidences(model, X)
+    assert labels == model.predict(X).tolist()
+    assert confidences == model.predict_proba(X)[:, 1].tolist()
+
+def test_concurrent_requests_are_merged_and_scattered(model):
+    batcher = PredictBatcher(lambda: model, max_batch_size=8, max_wait_ms=50)
+    rng = np.random.default_rng(2)
+    requests = [rng.random((i % 3 + 1, 2)) for i in range(16)]
+    results = {}
+
+    def worker(i):
+        results[i] = batcher.predict(requests[i], timeout=5)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(16)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    batcher.stop()
+    for i, X in enumerate(requests):
+        assert results[i] == predict_with_confidences(model, X)
+    stats = batcher.stats()
+    assert stats["batches"] < 16
+    assert stats["batch_rows"]["sum"] == sum(len(X) for X in requests)
+
+def test_malformed_request_only_fails_itself(model):
+    batcher = PredictBatcher(lambda: model, max_batch_size=8, max_wait_ms=50)
+    good = np.array([[0.9, 0.1]])
+    futures = [batcher.batcher.submit_async(good), batcher.batcher.submit_async(np.array([[0.1, 0.2, 0.3]])),
+               batcher.batcher.submit_async(good)]
+    results = [f.result(timeout=5) for f in futures]
+    batcher.stop()
+    assert results[0] == results[2] == predict_with_confidences(model, good)
+    assert isinstance(results[1], ValueError)
+    with pytest.raises(ValueError):
+        batcher.predict(np.array([[0.1, 0.2, 0.3]]), timeout=5)
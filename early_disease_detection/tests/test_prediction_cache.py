@@ -0,0 +1,63 @@
+"""
+Tests for prediction memoization (PredictionCache).
+"""
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+from app.core.prediction_cache import PredictionCache, row_key
+
+class CountingModel:
+    def __init__(self, model):
+        self.model = model
+        self.rows_scored = 0
+        self.classes_ = model.classes_
+
+    def predict_proba(self, X):
+        self.rows_scored += len(X)
+        return self.model.predict_proba(X)
+
+@pytest.fixture
+def model():
+    rng = np.random.default_rng(0)
+    X = rng.random((200, 2))
+    return CountingModel(RandomForestClassifier(n_estimators=5, random_state=0).fit(X, (X[:, 0] > 0.5).astype(int)))
+
+def test_row_key_is_canonical():
+    assert row_key(np.array([1, 0])) == row_key(np.array([1.0, -0.0]))
+    assert row_key(np.array([1.0, 2.0])) != row_key(np.array([2.0, 1.0]))
+    assert row_key(np.array([1.0])) != row_key(np.array([1.0, 0.0]))
+
+def test_only_missing_rows_reach_the_model(model):
+    cache = PredictionCache(maxsize=100)
+    scorer = cache.wrap(model, "1")
+    X = np.array([[0.1, 0.2], [0.9, 0.8], [0.1, 0.2]])
+    np.testing.assert_array_equal(scorer.predict_proba(X), model.model.predict_proba(X))
+    assert model.rows_scored == 2  # duplicate row scored once
+    X2 = np.array([[0.9, 0.8], [0.5, 0.5]])
+    np.testing.assert_array_equal(scorer.predict_proba(X2), model.model.predict_proba(X2))
+    assert model.rows_scored == 3
+    stats = cache.stats()
+    assert stats["rows_saved"] == 2
+    assert stats["hits"] == 1
+
+def test_cached_rows_do_not_keep_the_batch_alive(model):
+    cache = PredictionCache(maxsize=100)
+    cache.wrap(model, "1").predict_proba(np.array([[0.1, 0.2], [0.9, 0.8]]))
+    cached = cache.cache.get(("1", row_key(np.array([0.1, 0.2]))))
+    assert cached is not None and cached.base is None
+
+def test_new_version_never_serves_old_rows(model):
+    cache = PredictionCache(maxsize=100)
+    X = np.array([[0.3, 0.4]])
+    cache.wrap(model, "1").predict_proba(X)
+    cache.wrap(model, "2").predict_proba(X)
+    assert model.rows_scored == 2
+    cache.invalidate("2")
+    assert len(cache.cache) == 0
+    assert cache.stats()["model_version"] == "2"
+
+def test_ttl_and_lru_bounds(model):
+    cache = PredictionCache(maxsize=2, ttl_seconds=None)
+    scorer = cache.wrap(model, "1")
+    scorer.predict_proba(np.array([[0.1, 0.1], [0.2, 0.2], [0.3, 0.3]]))
+    assert len(cache.cache) == 2
@@ -0,0 +1,54 @@
+"""
+Tests for Predictor (single-row and batched risk prediction).
+"""
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+from app.core.predictor import Predictor
+from app.services.model_registry import ModelHandle
+
+@pytest.fixture
+def model():
+    rng = np.random.default_rng(0)
+    X = rng.random((200, 1))
+    y = (X[:, 0] > 0.5).astype(int)
+    return RandomForestClassifier(n_estimators=10, random_state=0).fit(X, y)
+
+def test_predict_proba_batch_matches_single_rows(model):
+    predictor = Predictor(model=model)
+    rows = [[0.1], [0.5], [0.9]]
+    batch = predictor.predict_proba_batch(rows)
+    assert batch == [predictor.predict_proba(row) for row in rows]
+    assert predictor.predict_proba_batch([]) == []
+
+def test_predict_proba_batch_falls_back_per_row(model):
+    predictor = Predictor(model=model)
+    batch = predictor.predict_proba_batch([[0.9], ["not a number"], [0.1]])
+    assert batch[0] == predictor.predict_proba([0.9])
+    assert batch[1] == [0.0, 0.0]
+    assert batch[2] == predictor.predict_proba([0.1])
+
+class SwappingRegistry:
+    """
+    Registry that promotes a new version on every current() call.
+    """
+    def __init__(self, models):
+        self.models = models
+        self.calls = 0
+
+    def current(self):
+        self.calls += 1
+        return ModelHandle("m", str(self.calls), self.models[(self.calls - 1) % len(self.models)])
+
+def test_registry_handle_resolved_once_per_call(model):
+    class PredictOnly:
+        def predict(self, X):
+            return np.ones(len(X))
+
+    registry = SwappingRegistry([PredictOnly(), model])
+    predictor = Predictor(registry=registry)
+    # The first handle has no predict_proba: the fallback must use that handle's model, not a newer one
+    assert predictor.predict_proba([0.9]) == [0.0, 1.0]
+    assert registry.calls == 1
+    predictor.predict_proba_batch([[0.9], ["not a number"], [0.1]])
+    assert registry.calls == 2
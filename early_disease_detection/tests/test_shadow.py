@@ -0,0 +1,69 @@
+"""
+Tests for shadow scoring of a candidate model (ShadowScorer).
+"""
+import threading
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+from app.core.predict_batching import predict_with_confidences
+from app.services.model_registry import ModelHandle
+from app.services.shadow import ShadowScorer
+
+class FixedCandidate:
+    def __init__(self, model, version="2", gate=None):
+        self.handle = ModelHandle("disease_predictor", version, model)
+        self.gate = gate
+
+    def load(self):
+        if self.gate is not None:
+            self.gate.wait(5)
+        return self
+
+    def current(self):
+        return self.handle
+
+def fit(seed, n_estimators):
+    rng = np.random.default_rng(seed)
+    X = rng.random((200, 2))
+    return RandomForestClassifier(n_estimators=n_estimators, random_state=seed).fit(X, (X[:, 0] > 0.5).astype(int))
+
+@pytest.fixture
+def X():
+    return np.random.default_rng(9).random((50, 2))
+
+def test_identical_candidate_agrees(X):
+    model = fit(0, 5)
+    scorer = ShadowScorer(FixedCandidate(model))
+    labels, confidences = predict_with_confidences(model, X)
+    assert scorer.submit(X, labels, confidences, "1")
+    assert scorer.drain()
+    scorer.stop()
+    comparison = scorer.stats()["comparisons"]["predict:1->2"]
+    assert comparison["rows"] == 50
+    assert comparison["agreement_rate"] == 1.0
+    assert comparison["max_abs_delta"] == 0.0
+
+def test_different_candidate_records_deltas(X):
+    primary, candidate = fit(0, 5), fit(1, 3)
+    scorer = ShadowScorer(FixedCandidate(candidate))
+    labels, confidences = predict_with_confidences(primary, X)
+    scorer.submit(X, labels, confidences, "1", source="symptoms")
+    assert scorer.drain()
+    scorer.stop()
+    comparison = scorer.stats()["comparisons"]["symptoms:1->2"]
+    cand_labels, cand_confidences = predict_with_confidences(candidate, X)
+    assert comparison["agreement_rate"] == np.mean(np.array(labels) == np.array(cand_labels))
+    assert comparison["mean_abs_delta"] == pytest.approx(np.mean(np.abs(np.array(confidences) - cand_confidences)))
+
+def test_full_queue_sheds_load(X):
+    gate = threading.Event()
+    scorer = ShadowScorer(FixedCandidate(fit(0, 5), gate=gate), queue_size=2)
+    labels, confidences = predict_with_confidences(scorer.candidate.handle.model, X)
+    accepted = [scorer.submit(X, labels, confidences, "1") for _ in range(10)]
+    assert not all(accepted)
+    gate.set()
+    assert scorer.drain()
+    scorer.stop()
+    stats = scorer.stats()
+    assert stats["dropped"] == accepted.count(False)
+    assert stats["submitted"] == 10
@@ -0,0 +1,91 @@
+"""
+Tests for the precomputed SHAP store and nearest-neighbour approximate explanations.
+"""
+import os
+import numpy as np
+import pytest
+import mlflow
+import shap
+from sklearn.ensemble import RandomForestClassifier
+from app.core.shap_store import FastExplainer, ShapStore, ShapStoreCache, save_shap_store
+from app.services.model_cache import ModelCache
+from app.services.model_registry import ModelHandle
+
+@pytest.fixture
+def trained(tmp_path):
+    rng = np.random.default_rng(0)
+    X = rng.random((400, 4))
+    model = RandomForestClassifier(n_estimators=10, random_state=0).fit(X, (X[:, 0] + X[:, 1] > 1.0).astype(int))
+    explainer = shap.TreeExplainer(model)
+    path = save_shap_store(str(tmp_path / "shap_store.npz"), X, explainer.shap_values(X), explainer.expected_value,
+                           feature_names=list("abcd"))
+    return model, explainer, X, path
+
+def test_neighbours_match_brute_force(trained):
+    _, _, X, path = trained
+    store = ShapStore.load(path)
+    queries = np.random.default_rng(1).random((300, 4))
+    distances, indices = store.neighbours(queries, k=3)
+    Z, Q = (X - store.mean) / store.scale, (queries - store.mean) / store.scale
+    brute = np.sqrt(((Q[:, None, :] - Z[None, :, :]) ** 2).mean(axis=2))
+    assert np.array_equal(indices[:, 0], brute.argmin(axis=1))
+    assert np.allclose(distances, np.sort(brute, axis=1)[:, :3], atol=1e-4)
+
+def test_stored_rows_are_returned_exactly(trained):
+    _, explainer, X, path = trained
+    values, confidence, hit = ShapStore.load(path).approximate(X[:5])
+    assert hit.all() and np.allclose(confidence, 1.0, atol=1e-3)
+    assert np.allclose(values, explainer.shap_values(X[:5]), atol=1e-3)
+
+def test_far_rows_fall_back_to_exact(trained):
+    _, explainer, X, path = trained
+    fast = FastExplainer(max_distance=0.25, audit_rate=1.0)
+    queries = np.vstack([X[:3] + 0.01, np.full((2, 4), 5.0)])
+    values, info = fast.explain(ShapStore.load(path), queries, explainer.shap_values)
+    assert info["approximated"] == 3 and info["exact"] == 2
+    assert np.allclose(values[3:], explainer.shap_values(queries[3:]))
+    assert np.abs(values[:3] - explainer.shap_values(queries[:3])).mean() < 0.05
+    fast._auditor.shutdown(wait=True)
+    stats = fast.stats()
+    assert stats["hit_ratio"] == pytest.approx(0.6)
+    assert stats["lookup_ms"]["count"] == 1
+    assert stats["relative_error"]["count"] == 1
+
+def test_store_fetched_from_model_run(trained, tmp_path):
+    model, _, _, path = trained
+    tracking_uri = f"sqlite:///{tmp_path / 'mlflow.db'}"
+    mlflow.set_tracking_uri(tracking_uri)
+    try:
+        mlflow.set_experiment("shap_store_test")
+        with mlflow.start_run() as run:
+            mlflow.sklearn.log_model(model, artifact_path="model", serialization_format="cloudpickle")
+            mlflow.log_artifact(path, artifact_path="explainability")
+        version = mlflow.register_model(f"runs:/{run.info.run_id}/model", "disease_predictor").version
+        cache = ModelCache(str(tmp_path / "cache"), tracking_uri=tracking_uri)
+        stores = ShapStoreCache(loader=lambda handle: cache.fetch_artifact(
+            handle.name, handle.version, "explainability/shap_store.npz"))
+        store = stores.get(ModelHandle("disease_predictor", version, model))
+        assert store is not None and len(store) == 400
+        assert cache.fetch_artifact("disease_predictor", version, "explainability/missing.npz") is None
+        assert cache.fetch_artifact("disease_predictor", version, "missing/shap_store.npz") is None
+        assert os.path.exists(cache.fetch_artifact("disease_predictor", version, "explainability/shap_store.npz"))
+    finally:
+        mlflow.set_tracking_uri(None)
+
+def test_transient_fetch_errors_are_not_cached(trained):
+    model, _, _, path = trained
+    calls = []
+
+    def flaky(handle):
+        calls.append(handle.version)
+        if len(calls) == 1:
+            raise ConnectionError("registry unreachable")
+        return path if handle.version == "1" else None
+
+    stores = ShapStoreCache(loader=flaky)
+    assert stores.get(ModelHandle("disease_predictor", "1", model)) is None
+    assert len(stores.get(ModelHandle("disease_predictor", "1", model))) == 400
+    # A version without a store is remembered
+    assert stores.get(ModelHandle("disease_predictor", "2", model)) is None
+    assert stores.get(ModelHandle("disease_predictor", "2", model)) is None
+    assert calls == ["1", "1", "2"]
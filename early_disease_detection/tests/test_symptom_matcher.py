@@ -0,0 +1,42 @@
+"""
+Tests for the dictionary fast path (SymptomMatcher) and SymptomExtractor routing.
+"""
+import pytest
+from app.core.symptom_matcher import SymptomMatcher
+from app.core.extraction import SymptomExtractor
+
+VOCABULARY = ["Fever", "cough", "headache", "breath", "shortness of breath", "body aches"]
+
+def test_match_known_symptoms_on_word_boundaries():
+    matcher = SymptomMatcher(VOCABULARY, synonyms={"high temperature": "fever"})
+    assert matcher.match("I have a FEVER, and a bad cough!") == ["fever", "cough"]
+    assert matcher.match("Shortness of breath since Monday") == ["shortness of breath"]
+    assert matcher.match("running a high temperature") == ["fever"]
+    assert matcher.match("coughing a lot") == []
+
+class FakeNLP:
+    def __init__(self):
+        self.calls = 0
+
+    def extract_symptoms(self, text):
+        self.calls += 1
+        return ["nausea"]
+
+def test_extractor_routes_between_paths():
+    nlp = FakeNLP()
+    extractor = SymptomExtractor(SymptomMatcher(VOCABULARY), nlp_provider=lambda: nlp, mode="auto",
+                                 max_fast_path_words=8)
+    assert extractor.extract("fever and cough") == (["fever", "cough"], "dictionary")
+    assert extractor.extract("I feel sick to my stomach") == (["nausea"], "transformer")
+    assert extractor.extract("no fever but cough")[1] == "transformer"
+    assert extractor.extract("fever " * 9)[1] == "transformer"
+    stats = extractor.stats()
+    assert stats["requests"] == 4
+    assert stats["dictionary_fraction"] == pytest.approx(0.25)
+    assert nlp.calls == 3
+
+def test_dictionary_mode_never_calls_transformer():
+    def fail():
+        raise AssertionError("transformer must not be loaded")
+    extractor = SymptomExtractor(SymptomMatcher(VOCABULARY), nlp_provider=fail, mode="dictionary")
+    assert extractor.extract("nothing known here") == ([], "dictionary")
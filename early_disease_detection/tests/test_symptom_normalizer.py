@@ -0,0 +1,28 @@
+"""
+Tests for SymptomNormalizer (fuzzy n-gram symptom normalization).
+"""
+import pytest
+from app.core.symptom_normalizer import SymptomNormalizer
+
+VOCABULARY = ["fever", "headache", "cough", "shortness of breath", "nausea", "sore throat"]
+
+def test_lookup_exact_fuzzy_and_synonym():
+    normalizer = SymptomNormalizer(VOCABULARY, synonyms={"high temperature": "fever"}, threshold=0.5)
+    assert normalizer.lookup("Headache") == ("headache", 1.0)
+    assert normalizer.lookup("headaches")[0] == "headache"
+    assert normalizer.lookup("shortnes of breth")[0] == "shortness of breath"
+    assert normalizer.lookup("high temp")[0] == "fever"
+    assert normalizer.lookup("xylophone")[0] is None
+    stats = normalizer.stats()
+    assert stats["lookups"] == 5
+    assert stats["exact"] == 1
+    assert stats["miss"] == 1
+
+def test_normalize_keeps_unknown_and_dedupes():
+    normalizer = SymptomNormalizer(VOCABULARY, threshold=0.5)
+    assert normalizer.normalize(["coughing", "cough", "xylophone"]) == ["cough", "xylophone"]
+
+def test_time_budget_bounds_lookup():
+    normalizer = SymptomNormalizer(VOCABULARY, time_budget_ms=0.0, threshold=0.5)
+    normalizer.lookup("headaches")
+    assert normalizer.stats()["budget_exceeded"] == 1
@@ -0,0 +1,121 @@
+"""
+Route-level tests for /symptoms: the explanation is computed on the feature
+rows the model scored, not on the raw text, and the shadow comparison is
+attributed to the model version that scored them.
+"""
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+routes = pytest.importorskip("api.routes.symptoms")
+from fastapi import FastAPI  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from app.core.predictor import Predictor  # noqa: E402
+from app.services.lifecycle import ComponentManager  # noqa: E402
+from app.services.model_registry import ModelHandle  # noqa: E402
+
+
+class FakeExtractor:
+    def extract(self, text):
+        return ["fever", "cough"], "dictionary"
+
+
+class FakeMapping:
+    def map_symptoms(self, symptoms):
+        return {"flu": 0.9, "cold": 0.2}
+
+
+class FakeMonitor:
+    def __init__(self):
+        self.rows = []
+
+    def record(self, row):
+        self.rows.append(row)
+
+
+def route_client(monkeypatch, data_monitor=FakeMonitor):
+    rng = np.random.default_rng(0)
+    X = rng.random((200, 1))
+    model = RandomForestClassifier(n_estimators=10, random_state=0).fit(X, (X[:, 0] > 0.5).astype(int))
+    handle = ModelHandle("disease_predictor", "1", model)
+    monkeypatch.setattr(routes.model_registry, "_current", handle)
+    monkeypatch.setattr(routes, "plot_renderer", None)
+    monkeypatch.setattr(routes, "shadow_scorer", None)
+    components = ComponentManager()
+    components.register("extractor", FakeExtractor)
+    components.register("mapping", FakeMapping)
+    components.register("predictor", lambda: Predictor(registry=routes.model_registry))
+    components.register("data_monitor", data_monitor, required=False)
+    monkeypatch.setattr(routes, "components", components)
+    app = FastAPI()
+    app.include_router(routes.router)
+    return TestClient(app)
+
+
+def test_symptoms_route_returns_shap_values(monkeypatch):
+    response = route_client(monkeypatch).post("/symptoms", json={"text": "I have a fever and cough"})
+    assert response.status_code == 200
+    shap_values = response.json()["shap"]["shap_values"]
+    assert len(shap_values) > 0
+    assert np.asarray(shap_values).shape[0] == 1  # one row: the highest-risk disease's features
+
+
+def test_symptoms_route_works_without_drift_monitor(monkeypatch):
+    def broken():
+        raise RuntimeError("reference data missing")
+
+    response = route_client(monkeypatch, data_monitor=broken).post("/symptoms", json={"text": "fever"})
+    assert response.status_code == 200
+
+
+def test_mapping_reload_rebuilds_matcher_and_normalizer(monkeypatch):
+    class ReloadedMapping:
+        def vocabulary(self):
+            return ["fever", "rash"]
+
+    components = ComponentManager()
+    components.register("extractor", lambda: routes.SymptomExtractor(routes.SymptomMatcher(["fever"]),
+                                                                     nlp_provider=lambda: None))
+    components.register("normalizer", lambda: routes.SymptomNormalizer(["fever"]))
+    components.load_all()
+    monkeypatch.setattr(routes, "components", components)
+    routes.rebuild_vocabulary_indexes(ReloadedMapping())
+    assert components.get("extractor").matcher.match("a rash") == ["rash"]
+    assert components.get("normalizer").lookup("rashes")[0] == "rash"
+
+
+def test_shadow_record_uses_the_version_that_scored(monkeypatch):
+    class SwappingRegistry:
+        """
+        A new version goes live right after each current() call.
+        """
+        def __init__(self, handles):
+            self.handles = handles
+            self.calls = 0
+            self._current = None
+
+        def current(self):
+            self.calls += 1
+            return self.handles[(self.calls - 1) % len(self.handles)]
+
+        def peek(self):
+            return self.handles[self.calls % len(self.handles)]
+
+    class FakeShadow:
+        def __init__(self):
+            self.versions = []
+
+        def submit(self, X, labels, confidences, primary_version=None, source="predict"):
+            self.versions.append(primary_version)
+
+    X = np.random.default_rng(0).random((200, 1))
+    model = RandomForestClassifier(n_estimators=10, random_state=0).fit(X, (X[:, 0] > 0.5).astype(int))
+    registry = SwappingRegistry([ModelHandle("disease_predictor", "1", model),
+                                 ModelHandle("disease_predictor", "2", model)])
+    monkeypatch.setattr(routes, "model_registry", registry)
+    client = route_client(monkeypatch)
+    shadow = FakeShadow()
+    monkeypatch.setattr(routes, "shadow_scorer", shadow)
+    assert client.post("/symptoms", json={"text": "fever"}).status_code == 200
+    assert registry.calls == 1
+    assert shadow.versions == ["1"]